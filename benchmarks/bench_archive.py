@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Snapshot archive: append, memory-mapped load and compaction vs re-parsing JSON
+Usage: python benchmarks/bench_archive.py [--size SPX] [--days 20] [--per-day 4] [--output FILE]
+
+Archives the same synthetic chain under days x per-day timestamps, then
+times loading every snapshot back as OptionChains (and summing one column,
+which faults the pages in) before and after compaction, against ingesting
+and pairing the JSON payload once. Append time is reported for the first
+and the last day, which should match: appends do not re-read the index.
+Before timing, an append is retried over the segment a crashed run left
+behind; the run exits non-zero if that fails.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chain_ingest import ingest_chain
+from option_chain import OptionChain
+from snapshot_archive import SnapshotArchive, _safe_name
+from synthetic import payload_bytes, preset_payload
+
+
+def load_all(archiveDir, ticker):
+    start = time.perf_counter()
+    chains = [chain for _, chain in SnapshotArchive(archiveDir).iter_chains(ticker)]
+    opened = time.perf_counter() - start
+    total = sum(float(chain.call_oi.sum()) for chain in chains)
+    return opened, time.perf_counter() - start, len(chains), total
+
+
+def check_crash_retry(chain, timestamp="2026-01-02 10:00:00"):
+    """An append that crashed after publishing its segment but before indexing it can be retried"""
+    with tempfile.TemporaryDirectory() as archiveDir:
+        segment = os.path.join(archiveDir, _safe_name(chain.ticker), timestamp[:10], f"seg-{_safe_name(timestamp)}")
+        os.makedirs(segment)
+        with open(os.path.join(segment, "call_oi.npy"), 'wb') as f:
+            f.write(b"partial")
+        archive = SnapshotArchive(archiveDir)
+        entry = archive.append(chain, timestamp)
+        reopened = SnapshotArchive(archiveDir)
+        assert entry is not None and len(reopened) == 1, "append over a leftover segment was not indexed"
+        assert float(reopened.load(entry).call_oi.sum()) == float(chain.call_oi.sum()), "leftover segment was kept"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', default='SPX', help="synthetic preset")
+    parser.add_argument('--days', type=int, default=20)
+    parser.add_argument('--per-day', type=int, default=4)
+    parser.add_argument('--output', default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    raw = payload_bytes(preset_payload(args.size))
+    start = time.perf_counter()
+    chain = OptionChain.from_ingested(args.size, ingest_chain([raw]), date.today())
+    parse = time.perf_counter() - start
+
+    try:
+        check_crash_retry(chain)
+    except AssertionError as e:
+        print(f"❌ {e}")
+        return 1
+
+    report = {'config': vars(args), 'pairs': len(chain), 'json_mb': len(raw) / 1e6, 'json_parse_seconds': parse}
+    with tempfile.TemporaryDirectory() as archiveDir:
+        archive = SnapshotArchive(archiveDir)
+        first = date.today() - timedelta(days=args.days)
+        dayTimes = []
+        for d in range(args.days):
+            start = time.perf_counter()
+            for k in range(args.per_day):
+                archive.append(chain, f"{first + timedelta(days=d)} {10 + k:02d}:00:00")
+            dayTimes.append((time.perf_counter() - start) / args.per_day)
+        report['append_seconds'] = sum(dayTimes) / args.days
+        report['append_first_day_seconds'], report['append_last_day_seconds'] = dayTimes[0], dayTimes[-1]
+
+        report['segments'] = dict(zip(('open_seconds', 'load_seconds', 'snapshots'),
+                                      load_all(archiveDir, args.size)[:3]))
+        start = time.perf_counter()
+        archive.compact()
+        report['compact_seconds'] = time.perf_counter() - start
+        report['compacted'] = dict(zip(('open_seconds', 'load_seconds', 'snapshots'),
+                                       load_all(archiveDir, args.size)[:3]))
+        report['archive_mb'] = archive.size_report()[args.size]['bytes'] / 1e6
+
+    n = report['compacted']['snapshots']
+    print(f"{args.size}: {len(chain):,} pairs, JSON {report['json_mb']:.1f} MB parsed + paired in {parse * 1000:.0f}ms")
+    print(f"  append        {report['append_seconds'] * 1000:7.1f}ms per snapshot (first day "
+          f"{report['append_first_day_seconds'] * 1000:.1f}ms, last day {report['append_last_day_seconds'] * 1000:.1f}ms)")
+    for name in ('segments', 'compacted'):
+        r = report[name]
+        print(f"  {name:<13} {n} snapshots opened in {r['open_seconds'] * 1000:.1f}ms, read in "
+              f"{r['load_seconds'] * 1000:.1f}ms (JSON would take {parse * n:.1f}s)")
+    print(f"  compact       {report['compact_seconds']:.2f}s, archive {report['archive_mb']:.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Load test of the fetch path against the local mock CBOE server
+Usage: python benchmarks/bench_fetch.py [--tickers 40] [--contracts 5000] [--latency 0.2]
+                                        [--error-rate 0.1] [--workers 16] [--per-host 8]
+                                        [--output FILE]
+
+Runs three passes over the same tickers: cold (no cache), cached within the
+TTL, and revalidation (TTL 0, every request conditional, answered 304).
+Reports wall time, requests seen by the server (retries included), status
+counts and peak concurrency per pass.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cboe_fetch
+from cboe_fetch import fetch_chains
+from mock_cboe import MockCBOE
+from snapshot_cache import SnapshotCache
+
+
+def run_pass(server, tickers, args, cache=None):
+    with server._lock:
+        server.stats.update(requests=0, statuses={}, bytes=0, max_in_flight=0)
+    start = time.perf_counter()
+    results = fetch_chains(tickers, timeout=args.timeout, max_workers=args.workers, per_host=args.per_host,
+                           retries=args.retries, backoff=args.backoff, cache=cache, ingest=True)
+    wall = time.perf_counter() - start
+    with server._lock:
+        stats = json.loads(json.dumps(server.stats))
+    return {
+        'wall': wall,
+        'ok': sum(r.ok for r in results.values()),
+        'failed': sum(not r.ok for r in results.values()),
+        'sources': {s: sum(r.source == s for r in results.values() if r.ok) for s in ('network', 'cache', 'revalidated')},
+        'server_requests': stats['requests'],
+        'server_statuses': stats['statuses'],
+        'server_mb': stats['bytes'] / 1e6,
+        'max_in_flight': stats['max_in_flight'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tickers', type=int, default=40)
+    parser.add_argument('--contracts', type=int, default=5_000)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.1)
+    parser.add_argument('--workers', type=int, default=cboe_fetch.DEFAULT_MAX_WORKERS)
+    parser.add_argument('--per-host', type=int, default=cboe_fetch.DEFAULT_PER_HOST)
+    parser.add_argument('--retries', type=int, default=cboe_fetch.DEFAULT_RETRIES)
+    parser.add_argument('--backoff', type=float, default=0.05)
+    parser.add_argument('--timeout', type=float, default=cboe_fetch.DEFAULT_TIMEOUT)
+    parser.add_argument('--output', default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    report = {'config': vars(args), 'passes': {}}
+
+    with MockCBOE(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                  contracts=args.contracts) as server, tempfile.TemporaryDirectory() as cacheDir:
+        cboe_fetch.set_base_url(server.base_url)
+        for t in tickers:
+            server.body(t)                  # build payloads up front so generation isn't timed
+
+        report['passes']['cold'] = run_pass(server, tickers, args)
+        cache = SnapshotCache(cacheDir, ttl=3600)
+        run_pass(server, tickers, args, cache)
+        report['passes']['cached'] = run_pass(server, tickers, args, cache)
+        cache.ttl = 0
+        report['passes']['revalidate'] = run_pass(server, tickers, args, cache)
+
+    print(f"{len(tickers)} tickers x {args.contracts:,} contracts, latency {args.latency}s +/- {args.jitter}s, "
+          f"error rate {args.error_rate:.0%}, {args.workers} workers / {args.per_host} per host")
+    for name, p in report['passes'].items():
+        print(f"  {name:<10} {p['wall']:6.2f}s  ok {p['ok']}/{len(tickers)}  "
+              f"server requests {p['server_requests']} {p['server_statuses']}  "
+              f"{p['server_mb']:.1f} MB  peak in flight {p['max_in_flight']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Peak RSS and parse time: response.json() + DataFrame vs streaming ingest_chain
+Usage: python benchmarks/bench_ingest.py [N_CONTRACTS]
+Each path runs in a fresh interpreter so ru_maxrss is not shared between them.
+Expect the RSS column to differ by ~4x and the times to be about equal: both
+paths are bound by decoding the JSON objects, streaming only avoids holding them.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_path(path, filename):
+    """Executed in the child process; prints a JSON result line"""
+    import pandas as pd
+    from chain_ingest import ingest_chain
+
+    base = peak_rss_mb()
+    start = time.perf_counter()
+    if path == 'json':
+        with open(filename, 'rb') as f:
+            options = json.loads(f.read())
+        data_df = pd.DataFrame(options["data"]["options"])
+        rows = len(data_df)
+    else:
+        with open(filename, 'rb') as f:
+            chain = ingest_chain(iter(lambda: f.read(1 << 16), b''), size_hint=os.path.getsize(filename))
+        rows = len(chain)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'path': path, 'rows': rows, 'seconds': elapsed,
+                      'peak_rss_mb': peak_rss_mb(), 'delta_mb': peak_rss_mb() - base}))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        filename = f.name
+    # Build the payload in its own process: ru_maxrss survives fork+exec into the children
+    subprocess.run([sys.executable, __file__, '--write', str(n), filename], check=True)
+
+    try:
+        size = os.path.getsize(filename) / 1e6
+        print(f"Payload: {n:,} contracts requested, {size:.1f} MB of JSON")
+        for path in ('json', 'ingest'):
+            out = subprocess.run([sys.executable, __file__, '--child', path, filename],
+                                 capture_output=True, text=True, check=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            label = 'response.json() + DataFrame' if path == 'json' else 'ingest_chain (streamed)'
+            print(f"  {label:30s}: {r['seconds'] * 1000:8.0f} ms, peak RSS {r['peak_rss_mb']:7.1f} MB "
+                  f"(+{r['delta_mb']:.1f} MB over imports), {r['rows']:,} rows")
+    finally:
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        run_path(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) > 1 and sys.argv[1] == '--write':
+        from synthetic import synthetic_payload
+        with open(sys.argv[3], 'wb') as f:
+            f.write(json.dumps(synthetic_payload(int(sys.argv[2]))).encode())
+    else:
+        main()
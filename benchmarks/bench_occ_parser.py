@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the columnar OCC symbol parser against the pandas .str slicing it replaces
+Usage: python benchmarks/bench_occ_parser.py [N_SYMBOLS]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from option_chain import parse_occ_symbols
+
+
+def make_symbols(n, seed=0):
+    """n SPX/SPXW-style symbols over 60 expiries with 5-point and 2.5-point strikes"""
+    rng = np.random.default_rng(seed)
+    roots = rng.choice(['SPX', 'SPXW'], n)
+    expiries = pd.Timestamp('2025-01-02') + pd.to_timedelta(rng.integers(0, 700, n), unit='D')
+    flags = rng.choice(['C', 'P'], n)
+    strikes = (rng.integers(800, 3200, n) * 2500)
+    return [f"{r}{e:%y%m%d}{f}{k:08d}" for r, e, f, k in zip(roots, expiries, flags, strikes)]
+
+
+def parse_pandas(symbols):
+    """The .str.slice / to_datetime / lstrip path from the scripts"""
+    data_df = pd.DataFrame({'option': symbols})
+    data_df['CallPut'] = data_df['option'].str.slice(start=-9,stop=-8)
+    data_df['ExpirationDate'] = data_df['option'].str.slice(start=-15,stop=-9)
+    data_df['ExpirationDate'] = pd.to_datetime(data_df['ExpirationDate'], format='%y%m%d')
+    data_df['Strike'] = data_df['option'].str.slice(start=-8,stop=-3)
+    data_df['Strike'] = data_df['Strike'].str.lstrip('0')
+    data_df['Strike'] = data_df['Strike'].astype(float)
+    return data_df
+
+
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    symbols = make_symbols(n)
+
+    old = parse_pandas(symbols)
+    new = parse_occ_symbols(symbols)
+    assert (old['ExpirationDate'].to_numpy().astype('datetime64[D]') == new.expiry).all()
+    assert ((old['CallPut'] == 'C').to_numpy() == new.is_call).all()
+    assert (np.floor(new.strike) == old['Strike'].to_numpy()).all()
+
+    tOld = best_of(lambda: parse_pandas(symbols))
+    tNew = best_of(lambda: parse_occ_symbols(symbols))
+
+    print(f"Parsing {n:,} OCC symbols (best of 5)")
+    print(f"  pandas .str slicing : {tOld * 1000:8.1f} ms")
+    print(f"  parse_occ_symbols   : {tNew * 1000:8.1f} ms  ({tOld / tNew:.1f}x)")
+    print(f"  fractional strikes kept: {(new.strike % 1 != 0).sum():,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Per-stage timings of the generate_all_charts pipeline on synthetic chains
+Usage: python benchmarks/bench_pipeline.py [--sizes DJX,SPX] [--repeat 3]
+                                           [--output FILE] [--compare BASELINE.json]
+
+Stages, in compute_ticker order: parse (streaming ingest of the JSON body),
+pairing (OCC decode + call/put join into an OptionChain), spot_gex,
+aggregate (per-strike groupby), profile, flips and render. Results are
+written as JSON (benchmarks/results/pipeline-<time>.json by default) so
+runs can be compared; --compare exits non-zero when a stage is slower than
+the baseline by more than --tolerance and by at least --min-delta seconds.
+Before timing, gex_engine.self_check compares the batched profile with the
+scalar calcGammaEx path for several chunk sizes; a mismatch exits non-zero.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+from chain_ingest import ingest_chain
+from chart_render import render_analysis
+from gex_engine import PreparedChain, gamma_flip_points, gamma_profile, self_check
+from option_chain import OptionChain
+from synthetic import PRESETS, payload_bytes, preset_payload
+
+STAGES = ('parse', 'pairing', 'spot_gex', 'aggregate', 'profile', 'flips', 'render')
+MOVE = 0.001                            # generate_all_charts works in 10bps moves
+CHUNK = 1 << 16
+
+
+def run_stages(index, raw: bytes, todayDate, output_dir):
+    """Run the pipeline once on a serialised payload; returns ({stage: seconds}, pairs)"""
+    times = {}
+    clock = time.perf_counter
+
+    t = clock()
+    ingested = ingest_chain((raw[i:i + CHUNK] for i in range(0, len(raw), CHUNK)), size_hint=len(raw))
+    times['parse'] = clock() - t
+
+    t = clock()
+    chain = OptionChain.from_ingested(index, ingested, todayDate)
+    times['pairing'] = clock() - t
+
+    t = clock()
+    callGEX, putGEX = chain.spot_gex(move=MOVE)
+    totalGammaSum = np.nansum(callGEX + putGEX) / 10**9
+    times['spot_gex'] = clock() - t
+
+    t = clock()
+    dfAgg = chain.by_strike(CallOpenInt=chain.call_oi, PutOpenInt=chain.put_oi, CallGEX=callGEX, PutGEX=putGEX,
+                            TotalGamma=(np.nan_to_num(callGEX) + np.nan_to_num(putGEX)) / 10**9)
+    times['aggregate'] = clock() - t
+
+    spotPrice = chain.spot
+    levels = np.linspace(0.8 * spotPrice, 1.2 * spotPrice, 30)
+    nextExpiry = chain.next_expiry()
+    nextMonthlyExp = chain.next_monthly_expiry()
+    if np.isnat(nextMonthlyExp):
+        nextMonthlyExp = nextExpiry
+
+    t = clock()
+    prepared = PreparedChain.from_chain(chain, move=MOVE)
+    profile = gamma_profile(prepared, levels, nextExpiry, nextMonthlyExp, move=MOVE)
+    times['profile'] = clock() - t
+
+    t = clock()
+    gammaFlips = gamma_flip_points(prepared, levels, profile[0], move=MOVE)
+    times['flips'] = clock() - t
+
+    result = {
+        'ticker': index, 'date': todayDate, 'spot_price': spotPrice,
+        'from_strike': levels[0], 'to_strike': levels[-1],
+        'total_gamma': totalGammaSum,
+        'gamma_flip': gammaFlips[0] if len(gammaFlips) else None,
+        'strikes': dfAgg.index.values,
+        'strike_total_gamma': dfAgg['TotalGamma'].to_numpy(),
+        'strike_call_oi': dfAgg['CallOpenInt'].to_numpy(),
+        'strike_put_oi': dfAgg['PutOpenInt'].to_numpy(),
+        'strike_call_gex': dfAgg['CallGEX'].to_numpy(),
+        'strike_put_gex': dfAgg['PutGEX'].to_numpy(),
+        'levels': levels,
+        'profile_total': profile[0] / 10**9,
+        'profile_ex_next': profile[1] / 10**9,
+        'profile_ex_fri': profile[2] / 10**9,
+    }
+    t = clock()
+    render_analysis(result, output_dir)
+    times['render'] = clock() - t
+
+    return times, len(chain)
+
+
+def bench_size(name, repeat, seed, output_dir):
+    todayDate = date.today()
+    root = PRESETS[name][0]
+    raw = payload_bytes(preset_payload(name, seed=seed, today=todayDate))
+
+    runs = []
+    for _ in range(repeat):
+        times, pairs = run_stages(root, raw, todayDate, output_dir)
+        runs.append(times)
+
+    stages = {s: {'min': min(r[s] for r in runs), 'median': float(np.median([r[s] for r in runs]))}
+              for s in STAGES}
+    total = min(sum(r.values()) for r in runs)
+    return {'contracts': PRESETS[name][1], 'pairs': pairs, 'payload_mb': len(raw) / 1e6,
+            'stages': stages, 'total': total}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'commit': commit}
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """Print per-stage ratios against a baseline run; returns the regressed (size, stage) pairs"""
+    regressions = []
+    print(f"\nvs {baseline.get('created')} ({baseline.get('environment', {}).get('commit')}), "
+          f"tolerance {tolerance:.0%}")
+    for name, res in results.items():
+        base = baseline.get('sizes', {}).get(name)
+        if base is None:
+            continue
+        cells = []
+        for stage in STAGES:
+            old, new = base['stages'].get(stage, {}).get('min'), res['stages'][stage]['min']
+            if not old:
+                continue
+            ratio = new / old
+            flag = ' ❌' if ratio > 1 + tolerance and new - old > min_delta else ''
+            if flag:
+                regressions.append((name, stage))
+            cells.append(f"{stage} {ratio:.2f}x{flag}")
+        print(f"  {name:<9} " + ', '.join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default=','.join(PRESETS), help=f"comma-separated of {', '.join(PRESETS)}")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="JSON results file")
+    parser.add_argument('--compare', default=None, help="baseline JSON results file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument('--min-delta', type=float, default=0.005,
+                        help="slowdowns below this many seconds are treated as noise")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in PRESETS]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    # A faster engine that computes the wrong curve is not a result worth recording
+    try:
+        self_check()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        return 1
+
+    results = {}
+    header = f"{'size':<9} {'pairs':>8} " + ' '.join(f"{s:>9}" for s in STAGES) + f" {'total':>9}"
+    print(header)
+    with tempfile.TemporaryDirectory() as chartDir:
+        # Untimed warm-up so first-call costs (imports, font cache) don't land on the first size
+        run_stages('DJX', payload_bytes(preset_payload('DJX', seed=args.seed)), date.today(), chartDir)
+        for name in sizes:
+            res = bench_size(name, args.repeat, args.seed, chartDir)
+            results[name] = res
+            print(f"{name:<9} {res['pairs']:>8,} "
+                  + ' '.join(f"{res['stages'][s]['min'] * 1000:>7.1f}ms" for s in STAGES)
+                  + f" {res['total'] * 1000:>7.1f}ms")
+
+    created = datetime.now()
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results',
+                                         f"pipeline-{created:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'created': created.isoformat(timespec='seconds'), 'repeat': args.repeat, 'seed': args.seed,
+                   'environment': environment(), 'sizes': results}, f, indent=2)
+    print(f"\n✓ Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta)
+        if regressions:
+            print(f"❌ {len(regressions)} stage(s) slower than baseline")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
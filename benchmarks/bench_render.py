@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Strike-ladder bar panels: one Rectangle per strike vs chart_render.strike_bars
+Usage: python benchmarks/bench_render.py [--sizes DJX,SPX,SPX-500k] [--repeat 3] [--output FILE]
+
+Draws charts 1-3 of the analysis figure (total gamma, OI, gamma by type) on
+a synthetic chain both ways and times figure build + savefig. The legacy
+path is the previous ax.bar over every strike clipped with set_xlim. For
+the visual check both figures are drawn with the same axis limits and the
+PNGs compared pixel by pixel.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from chain_ingest import ingest_chain
+from chart_render import strike_bars
+from option_chain import OptionChain
+from synthetic import payload_bytes, preset_payload
+
+MOVE = 0.001
+
+
+def panel_data(name):
+    """Per-strike arrays and the +/-20% window of a synthetic preset chain"""
+    chain = OptionChain.from_ingested(name, ingest_chain([payload_bytes(preset_payload(name))]), date.today())
+    callGEX, putGEX = chain.spot_gex(move=MOVE)
+    strikes, agg = chain.strike_sums(CallOpenInt=chain.call_oi, PutOpenInt=chain.put_oi, CallGEX=callGEX / 10**9,
+                                     PutGEX=putGEX / 10**9,
+                                     TotalGamma=(np.nan_to_num(callGEX) + np.nan_to_num(putGEX)) / 10**9)
+    return strikes, agg, (0.8 * chain.spot, 1.2 * chain.spot)
+
+
+def draw(strikes, agg, window, fast, limits=None):
+    """Charts 1-3 on one figure; returns (PNG bytes, axis limits, artists drawn)"""
+    fig, axes = plt.subplots(1, 3, figsize=(20, 6))
+    series = ((('TotalGamma', 1, 'steelblue', None),),
+              (('CallOpenInt', 1, 'green', 0.7), ('PutOpenInt', -1, 'red', 0.7)),
+              (('CallGEX', 1, 'green', 0.7), ('PutGEX', 1, 'red', 0.7)))
+    for ax, panel in zip(axes, series):
+        ax.grid(True, alpha=0.3)
+        for key, sign, color, alpha in panel:
+            if fast:
+                strike_bars(ax, strikes, sign * agg[key], window, color=color, alpha=alpha, label=key)
+            else:
+                ax.bar(strikes, sign * agg[key], width=6, linewidth=0.1, edgecolor='k', color=color, alpha=alpha,
+                       label=key)
+        ax.set_xlim(window)
+        ax.legend(loc='best')
+    if limits is not None:
+        for ax, ylim in zip(axes, limits):
+            ax.set_ylim(ylim)
+    artists = sum(len(ax.patches) + len(ax.collections) for ax in axes)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=100)
+    plt.close(fig)
+    return buf.getvalue(), [ax.get_ylim() for ax in axes], artists
+
+
+def timed(fn, repeat):
+    best, out = float('inf'), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def pixels(png):
+    return plt.imread(io.BytesIO(png))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='DJX,SPX,SPX-500k')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    report = {}
+    for name in [s.strip() for s in args.sizes.split(',') if s.strip()]:
+        strikes, agg, window = panel_data(name)
+        legacy, (_, _, legacyArtists) = timed(lambda: draw(strikes, agg, window, fast=False), args.repeat)
+        fast, (_, limits, fastArtists) = timed(lambda: draw(strikes, agg, window, fast=True), args.repeat)
+
+        # Same y limits on both so only the drawing path differs
+        a = pixels(draw(strikes, agg, window, fast=False, limits=limits)[0])
+        b = pixels(draw(strikes, agg, window, fast=True, limits=limits)[0])
+        diff = np.abs(a - b).max(axis=-1)
+        report[name] = {'strikes': len(strikes), 'legacy_seconds': legacy, 'fast_seconds': fast,
+                        'legacy_artists': legacyArtists, 'fast_artists': fastArtists,
+                        'pixels_differing': float((diff > 1 / 255).mean()), 'max_pixel_diff': float(diff.max())}
+        r = report[name]
+        print(f"{name:<9} {len(strikes):6,} strikes  legacy {legacy * 1000:7.0f}ms ({legacyArtists:,} artists)  "
+              f"fast {fast * 1000:6.0f}ms ({fastArtists} artists)  x{legacy / fast:.1f}  "
+              f"pixels differing {r['pixels_differing']:.3%}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
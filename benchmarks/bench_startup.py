@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Interpreter start-up and import cost of each entry point
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--top 8] [--output FILE]
+
+Each module is imported in a fresh interpreter with -X importtime, so the
+numbers are what a cron job or per-request invocation pays before doing
+any work. Reports the median wall time, the slowest top-level imports and
+which heavy modules (matplotlib, pandas, scipy) were pulled in.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ('gex_compute', 'cboe_fetch', 'gex_engine', 'gex_watch', 'generate_all_charts', 'chart_render')
+HEAVY_MODULES = ('matplotlib', 'pandas', 'scipy')
+
+# import time: self [us] | cumulative | imported package
+_IMPORTTIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(module):
+    """
+    (wall seconds, {package: cumulative seconds}, all module names) for one
+    fresh-interpreter import; packages are those the entry point imports directly
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"], cwd=ROOT,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    # Children are printed before their parent, so depth-2 lines collected since the previous
+    # depth-1 line belong to the entry point once its own depth-1 line arrives
+    packages, names, pending = {}, set(), []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m is None:
+            continue
+        names.add(m.group(4).split('.')[0])
+        depth = (len(m.group(3)) + 1) // 2
+        if depth == 2:
+            pending.append((m.group(4).split('.')[0], int(m.group(2)) / 1e6))
+        elif depth == 1:
+            if m.group(4) == module:
+                for name, seconds in pending:
+                    packages[name] = packages.get(name, 0.0) + seconds
+            pending = []
+    return wall, packages, names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--modules', default=','.join(ENTRY_POINTS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help="slowest imports listed per module")
+    parser.add_argument('--output', default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    report = {}
+    for module in [m.strip() for m in args.modules.split(',') if m.strip()]:
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        walls = sorted(w for w, _, _ in runs)
+        _, packages, names = runs[0]
+        heavy = [m for m in HEAVY_MODULES if m in names]
+        report[module] = {'wall_median': walls[len(walls) // 2], 'wall_min': walls[0], 'heavy': heavy,
+                          'imports': dict(sorted(packages.items(), key=lambda kv: -kv[1]))}
+
+        top = list(report[module]['imports'].items())[:args.top]
+        print(f"{module:<20} {walls[len(walls) // 2] * 1000:6.0f}ms  "
+              f"heavy: {', '.join(heavy) if heavy else 'none':<28} "
+              + ', '.join(f"{name} {t * 1000:.0f}ms" for name, t in top))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Summary store: one transaction per run vs a commit per row, and indexed lookups vs re-reading CSVs
+Usage: python benchmarks/bench_store.py [--tickers 10] [--runs 2000] [--expiries 40] [--output FILE]
+
+Records --runs synthetic runs of --tickers results (with --expiries per-expiry
+totals each) into a fresh SQLite store, once batched per run and once with
+a commit after every row, then times the latest-per-ticker and 30 day range
+queries against scanning one summary CSV per run, which is what keeping a
+dated copy of charts/summary.csv would need.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from summary_store import SummaryStore, summary_row
+
+
+def synthetic_runs(tickers, runs, expiries, seed=0):
+    """runs lists of compute_ticker-like results, one run every 15 minutes"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 2, 9, 30)
+    expiryDates = np.datetime64('2025-01-03') + np.arange(expiries) * 7
+    for i in range(runs):
+        timestamp = (start + timedelta(minutes=15 * i)).strftime('%Y-%m-%d %H:%M:%S')
+        yield [{'ticker': f"T{t:02d}", 'timestamp': timestamp, 'spot_price': 5000 + rng.normal(),
+                'total_gamma': rng.normal(), 'gamma_flip': 4900 + rng.normal(), 'description': None,
+                'expiries': expiryDates, 'expiry_gamma': rng.normal(size=expiries)} for t in range(tickers)]
+
+
+def record_per_row(store, results, move=0.001):
+    """Baseline: each snapshot and expiry total inserted and committed on its own"""
+    conn = store._conn
+    recordedAt = time.strftime('%Y-%m-%d %H:%M:%S')
+    for r in results:
+        row = summary_row(r, move, recordedAt)
+        cursor = conn.execute(f"INSERT INTO snapshots ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                              tuple(row.values()))
+        conn.commit()
+        for expiry, value in zip(r['expiries'], r['expiry_gamma']):
+            conn.execute("INSERT INTO expiry_gamma VALUES (?, ?, ?)", (cursor.lastrowid, str(expiry), float(value)))
+            conn.commit()
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tickers', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=2000)
+    parser.add_argument('--expiries', type=int, default=40)
+    parser.add_argument('--output', default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    runs = list(synthetic_runs(args.tickers, args.runs, args.expiries))
+    report = {'config': vars(args), 'sqlite': sqlite3.sqlite_version}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SummaryStore(os.path.join(tmp, "batched.db"))
+        start = time.perf_counter()
+        for i, results in enumerate(runs):
+            store.record(results, recorded_at=f"run-{i}")
+        report['batched_run_ms'] = (time.perf_counter() - start) / len(runs) * 1000
+
+        # The per-row baseline on a slice of the runs: it is the slow one
+        baseline = SummaryStore(os.path.join(tmp, "per_row.db"))
+        sample = runs[:max(1, len(runs) // 20)]
+        start = time.perf_counter()
+        for results in sample:
+            record_per_row(baseline, results)
+        report['per_row_run_ms'] = (time.perf_counter() - start) / len(sample) * 1000
+        baseline.close()
+
+        last = runs[-1][0]['timestamp'][:10]
+        first = (datetime.fromisoformat(last) - timedelta(days=30)).date().isoformat()
+        report['latest_ms'] = timed(lambda: store.latest()) * 1000
+        report['range_30d_ms'] = timed(lambda: store.history('T00', first, last)) * 1000
+        report['rows_30d'] = len(store.history('T00', first, last))
+
+        # One summary CSV per run, as dashboards would have to re-scan them
+        csvDir = os.path.join(tmp, "csv")
+        os.makedirs(csvDir)
+        for i, results in enumerate(runs):
+            with open(os.path.join(csvDir, f"summary-{i:06d}.csv"), 'w', newline='') as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(('ticker', 'timestamp', 'spot', 'total_gamma', 'gamma_flip'))
+                writer.writerows((r['ticker'], r['timestamp'], r['spot_price'], r['total_gamma'], r['gamma_flip'])
+                                 for r in results)
+
+        def scan():
+            rows = []
+            for name in sorted(os.listdir(csvDir)):
+                with open(os.path.join(csvDir, name), newline='') as f:
+                    rows.extend(row for row in csv.DictReader(f)
+                                if row['ticker'] == 'T00' and first <= row['timestamp'][:10] <= last)
+            return rows
+        report['csv_scan_ms'] = timed(scan, repeat=2) * 1000
+        report['db_mb'] = os.path.getsize(store.db_path) / 1e6
+        store.close()
+
+    n = args.runs * args.tickers
+    print(f"{args.runs:,} runs x {args.tickers} tickers ({n:,} snapshots, {n * args.expiries:,} expiry totals), "
+          f"SQLite {report['sqlite']}, {report['db_mb']:.1f} MB")
+    print(f"  record run   batched {report['batched_run_ms']:7.2f}ms   per-row commits "
+          f"{report['per_row_run_ms']:7.2f}ms  x{report['per_row_run_ms'] / report['batched_run_ms']:.0f}")
+    print(f"  latest       {report['latest_ms']:7.2f}ms ({args.tickers} tickers)")
+    print(f"  30d range    {report['range_30d_ms']:7.2f}ms ({report['rows_30d']} rows)   "
+          f"CSV re-scan {report['csv_scan_ms']:7.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the CBOE delayed-quotes endpoint
+Serves /_{TICKER}.json from recorded snapshots or seeded synthetic chains,
+with configurable latency, injected error rate and payload size, so the
+fetch path (concurrency, caching, retries) can be exercised offline.
+
+Usage: python benchmarks/mock_cboe.py [--port 8765] [--latency 0.2] [--jitter 0.1]
+                                      [--error-rate 0.1] [--contracts 50000]
+                                      [--recorded .cache/cboe] [--forbidden SPY,QQQ]
+Then: CBOE_BASE_URL=http://127.0.0.1:8765 python generate_all_charts.py
+GET /stats returns request, status and concurrency counters as JSON.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from snapshot_cache import SnapshotCache
+from synthetic import PRESETS, payload_bytes, synthetic_payload
+
+DEFAULT_PORT = 8765
+DEFAULT_CONTRACTS = 20_000
+
+_CHAIN_PATH = re.compile(r'/_([A-Za-z0-9^.]+)\.json$')
+
+
+class MockCBOE:
+    """
+    Threaded mock server; use as a context manager in tests and benchmarks
+
+        with MockCBOE(latency=0.05, error_rate=0.1) as server:
+            cboe_fetch.set_base_url(server.base_url)
+            ...
+
+    Payloads come from recorded (a SnapshotCache directory or a directory of
+    TICKER.json / TICKER.json.gz files) when the ticker is there, otherwise
+    from a synthetic chain: the PRESETS shape when the ticker has one, else
+    contracts contracts around spot 100. contracts overrides every size.
+    Responses carry an ETag and Last-Modified and honour If-None-Match.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_statuses: Iterable[int] = (503,),
+                 contracts: Optional[int] = None, recorded: Optional[str] = None,
+                 forbidden: Iterable[str] = (), seed: int = 0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.contracts = contracts
+        self.recorded = recorded
+        self.forbidden = {t.upper() for t in forbidden}
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies: Dict[str, Optional[tuple]] = {}
+        self._server = None
+        self._thread = None
+        self.stats = {'requests': 0, 'statuses': {}, 'bytes': 0, 'in_flight': 0, 'max_in_flight': 0}
+
+    # ---=== PAYLOADS ===---
+    def _load_recorded(self, ticker) -> Optional[bytes]:
+        if not self.recorded:
+            return None
+        if os.path.exists(os.path.join(self.recorded, "index.json")):
+            return SnapshotCache(self.recorded).load_raw(ticker)
+        for name, opener in ((f"{ticker}.json", open), (f"{ticker}.json.gz", gzip.open)):
+            path = os.path.join(self.recorded, name)
+            if os.path.exists(path):
+                with opener(path, 'rb') as f:
+                    return f.read()
+        return None
+
+    def _synthetic(self, ticker) -> bytes:
+        if ticker in PRESETS:
+            root, n, spot, step = PRESETS[ticker]
+        else:
+            root, n, spot, step = ticker, DEFAULT_CONTRACTS, 100.0, 1.0
+        return payload_bytes(synthetic_payload(self.contracts or n, spot=spot, root=root, seed=self.seed, step=step))
+
+    def body(self, ticker: str):
+        """(bytes, etag, last_modified) for ticker, built once and then reused"""
+        with self._lock:
+            if ticker not in self._bodies:
+                raw = self._load_recorded(ticker) or self._synthetic(ticker)
+                self._bodies[ticker] = (raw, '"' + hashlib.sha1(raw).hexdigest() + '"', formatdate(usegmt=True))
+            return self._bodies[ticker]
+
+    def refresh(self, ticker: Optional[str] = None):
+        """Drop cached bodies so the next request rebuilds them (new ETag for recorded changes)"""
+        with self._lock:
+            if ticker is None:
+                self._bodies.clear()
+            else:
+                self._bodies.pop(ticker, None)
+
+    # ---=== SERVER ===---
+    def _count(self, status, nbytes=0):
+        with self._lock:
+            self.stats['statuses'][str(status)] = self.stats['statuses'].get(str(status), 0) + 1
+            self.stats['bytes'] += nbytes
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b'', headers=None):
+                self.send_response(status)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+                mock._count(status, len(body))
+
+            def do_GET(self):
+                if self.path == '/stats':
+                    with mock._lock:
+                        body = json.dumps(mock.stats).encode()
+                    return self._send(200, body, {'Content-Type': 'application/json'})
+
+                with mock._lock:
+                    mock.stats['requests'] += 1
+                    mock.stats['in_flight'] += 1
+                    mock.stats['max_in_flight'] = max(mock.stats['max_in_flight'], mock.stats['in_flight'])
+                    delay = max(0.0, mock.latency + mock._rng.uniform(-mock.jitter, mock.jitter))
+                    fail = mock._rng.random() < mock.error_rate
+                    failStatus = mock._rng.choice(mock.error_statuses) if fail else None
+                try:
+                    time.sleep(delay)
+                    m = _CHAIN_PATH.search(self.path.split('?')[0])
+                    if m is None:
+                        return self._send(404)
+                    ticker = m.group(1).upper()
+                    if ticker in mock.forbidden:
+                        return self._send(403)
+                    if fail:
+                        return self._send(failStatus)
+
+                    raw, etag, lastModified = mock.body(ticker)
+                    headers = {'ETag': etag, 'Last-Modified': lastModified, 'Content-Type': 'application/json'}
+                    if self.headers.get('If-None-Match') == etag:
+                        return self._send(304, headers=headers)
+                    self._send(200, raw, headers)
+                finally:
+                    with mock._lock:
+                        mock.stats['in_flight'] -= 1
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def start(self) -> 'MockCBOE':
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the CBOE delayed-quotes endpoint")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="+/- uniform jitter on the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of chain requests that fail")
+    parser.add_argument('--error-status', default="503", help="comma-separated statuses to fail with")
+    parser.add_argument('--contracts', type=int, default=None, help="synthetic contracts per chain")
+    parser.add_argument('--recorded', default=None, help="SnapshotCache dir or dir of TICKER.json[.gz]")
+    parser.add_argument('--forbidden', default="", help="comma-separated tickers answered with 403")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockCBOE(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                      [int(s) for s in args.error_status.split(',')], args.contracts, args.recorded,
+                      [t for t in args.forbidden.split(',') if t], args.seed).start()
+    print(f"Mock CBOE serving on {server.base_url}  (CBOE_BASE_URL={server.base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
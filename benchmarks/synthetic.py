@@ -0,0 +1,77 @@
+"""
+Seeded synthetic CBOE delayed_quotes payloads for offline benchmarks
+"""
+
+import json
+from datetime import date, timedelta
+
+import numpy as np
+
+# Chain shapes from a small DJX-like chain up to a 500k-contract SPX-like one:
+# name -> (root, contracts, spot, strike grid step)
+PRESETS = {
+    'DJX': ('DJX', 5_000, 430.0, 1.0),
+    'RUT': ('RUT', 30_000, 2300.0, 5.0),
+    'NDX': ('NDX', 60_000, 21000.0, 25.0),
+    'SPX': ('SPX', 150_000, 5800.0, 5.0),
+    'SPX-500k': ('SPX', 500_000, 5800.0, 1.0),
+}
+
+
+def synthetic_payload(n_contracts=20_000, spot=5000.0, root="SPX", seed=0, today=None, step=5.0):
+    """
+    CBOE-shaped payload dict with about n_contracts contracts
+
+    Expiries run from today out to two years, strikes span +/-40% of spot on a
+    step-point grid; every (expiry, strike) is listed as a call and a put.
+    IV follows a smile and OI decays away from the money and with time.
+    """
+    rng = np.random.default_rng(seed)
+    today = today or date.today()
+
+    nStrikes = max(2, int(np.sqrt(n_contracts / 2) * 2.5))
+    strikes = np.unique(np.round(np.linspace(0.6 * spot, 1.4 * spot, nStrikes) / step) * step)
+    nExpiries = int(np.clip(round(n_contracts / (2 * len(strikes))), 1, 730))
+    offsets = np.unique(np.concatenate([[0], np.sort(rng.choice(np.arange(1, 730), nExpiries - 1, replace=False))]))
+    expiries = [today + timedelta(days=int(d)) for d in offsets]
+
+    m = np.log(strikes / spot)
+    options = []
+    for e in expiries:
+        t = max((e - today).days, 1) / 365
+        n = 2 * len(strikes)
+        iv = np.maximum(np.tile(0.18 - 0.3 * m + 0.4 * m * m, 2) + rng.normal(0, 0.01, n), 0.05).round(4)
+        oi = rng.poisson(np.tile(3000 * np.exp(-8 * m * m) / np.sqrt(1 + 4 * t), 2)).astype(float)
+        bid = rng.uniform(0.05, 50, n).round(2)
+        ask = rng.uniform(0.1, 51, n).round(2)
+        volume = rng.poisson(50, n).astype(float)
+        delta = rng.uniform(-1, 1, n).round(4)
+        gamma = rng.uniform(0, 0.003, n).round(6)
+        symbols = [f"{root}{e:%y%m%d}{cp}{int(round(k * 1000)):08d}" for cp in "CP" for k in strikes]
+        for i, symbol in enumerate(symbols):
+            options.append({
+                "option": symbol,
+                "bid": bid[i], "ask": ask[i],
+                "iv": iv[i], "open_interest": oi[i], "volume": volume[i],
+                "delta": delta[i], "gamma": gamma[i],
+                "vega": 1.2, "theta": -0.8, "rho": 0.3, "theo": 10.5, "change": 0.0,
+                "open": 10.0, "high": 11.0, "low": 9.5, "tick": "up", "last_trade_price": 10.25,
+                "last_trade_time": f"{today}T15:59:00", "percent_change": 0.0, "prev_day_close": 10.0,
+            })
+
+    return {
+        "timestamp": f"{today} 16:15:00",
+        "data": {"symbol": "_" + root, "close": spot, "current_price": spot, "prev_day_close": spot,
+                 "iv30": 15.2, "options": options},
+    }
+
+
+def preset_payload(name, seed=0, today=None):
+    """synthetic_payload for one of PRESETS"""
+    root, n, spot, step = PRESETS[name]
+    return synthetic_payload(n, spot=spot, root=root, seed=seed, today=today, step=step)
+
+
+def payload_bytes(payload) -> bytes:
+    """Serialise like the CBOE endpoint (numpy scalars included)"""
+    return json.dumps(payload, default=float).encode()
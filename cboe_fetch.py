@@ -0,0 +1,190 @@
+"""
+Concurrent CBOE delayed-quotes fetch layer
+Pulls many option chains through one pooled requests.Session with
+per-host concurrency limits and retry with exponential backoff
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from chain_ingest import ingest_chain
+from snapshot_cache import SnapshotCache
+
+DEFAULT_BASE_URL = "https://cdn.cboe.com/api/global/delayed_quotes/options"
+
+# CBOE_BASE_URL points every script at another host, e.g. benchmarks/mock_cboe.py
+CBOE_URL = os.environ.get("CBOE_BASE_URL", DEFAULT_BASE_URL).rstrip('/') + "/_{ticker}.json"
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_PER_HOST = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+INGEST_CHUNK = 1 << 16
+
+# Transient statuses worth retrying; 403 (ETF chains) and 404 are final
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FetchResult(NamedTuple):
+    ticker: str
+    status_code: Optional[int]
+    payload: Optional[dict]             # IngestedChain when fetched with ingest=True
+    error: Optional[Exception]
+    elapsed: float
+    source: str = 'network'             # 'network', 'cache' (within TTL) or 'revalidated' (HTTP 304)
+    cpu: float = 0.0                    # CPU seconds of the fetching thread (decode/ingest)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200 and self.payload is not None
+
+
+def chain_url(ticker: str) -> str:
+    return CBOE_URL.format(ticker=ticker)
+
+
+def set_base_url(base_url: str):
+    """Fetch from base_url/_{ticker}.json from now on (same as setting CBOE_BASE_URL)"""
+    global CBOE_URL
+    CBOE_URL = base_url.rstrip('/') + "/_{ticker}.json"
+
+
+def make_session(pool_size: int = DEFAULT_MAX_WORKERS, retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF) -> requests.Session:
+    """Session with a connection pool sized for pool_size threads and backoff retries"""
+    retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                  backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                  allowed_methods=frozenset(['GET']), raise_on_status=False,
+                  respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class HostLimiter:
+    """Caps in-flight requests per host across all worker threads"""
+
+    def __init__(self, per_host: int = DEFAULT_PER_HOST):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    def __call__(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+def _decode(response, ingest: bool, cache: Optional[SnapshotCache], ticker: str):
+    """Payload of a 200 response, stored in the cache if one is given"""
+    if not ingest:
+        payload = response.json()
+        if cache is not None:
+            cache.store(ticker, response.content, payload, response.headers)
+        return payload
+
+    raw = [] if cache is not None else None
+
+    def chunks():
+        for chunk in response.iter_content(chunk_size=INGEST_CHUNK):
+            if raw is not None:
+                raw.append(chunk)
+            yield chunk
+
+    size = response.headers.get('Content-Length')
+    chain = ingest_chain(chunks(), size_hint=int(size) if size else None)
+    if cache is not None:
+        cache.store(ticker, b''.join(raw), {'timestamp': chain.timestamp}, response.headers)
+    return chain
+
+
+def fetch_chain(ticker: str, session: Optional[requests.Session] = None, timeout: float = DEFAULT_TIMEOUT,
+                limiter: Optional[HostLimiter] = None, cache: Optional[SnapshotCache] = None,
+                ingest: bool = False, reload_unchanged: bool = True) -> FetchResult:
+    """
+    Download and decode one chain; errors are captured in the result instead of raised
+    With a cache, a snapshot inside its TTL costs no request and older ones are
+    revalidated with a conditional GET. With ingest=True the body is streamed
+    into a chain_ingest.IngestedChain instead of being decoded to dicts.
+    With reload_unchanged=False an HTTP 304 returns status 304 and no payload,
+    for pollers that already hold the snapshot.
+    Without a session a one-connection session is made for this call and closed
+    again; callers fetching repeatedly should pass their own.
+    """
+    url = chain_url(ticker)
+    ownSession = session is None
+    session = session or make_session(pool_size=1)
+    limiter = limiter or HostLimiter()
+
+    def cached():
+        return ingest_chain(cache.iter_raw(ticker)) if ingest else cache.load(ticker)
+
+    start = time.perf_counter()
+    cpuStart = time.thread_time()
+
+    def result(status, payload=None, error=None, source='network'):
+        return FetchResult(ticker, status, payload, error, time.perf_counter() - start, source,
+                           time.thread_time() - cpuStart)
+
+    try:
+        if cache is not None and cache.is_fresh(ticker):
+            return result(200, cached(), source='cache')
+
+        headers = cache.validators(ticker) if cache is not None else {}
+        with limiter(url), session.get(url, timeout=timeout, headers=headers, stream=ingest) as response:
+            if response.status_code == 304 and cache is not None:
+                cache.touch(ticker, response.headers)
+                if not reload_unchanged:
+                    return result(304, source='revalidated')
+                return result(200, cached(), source='revalidated')
+            if response.status_code != 200:
+                return result(response.status_code)
+
+            payload = _decode(response, ingest, cache, ticker)
+        return result(200, payload)
+    except Exception as e:
+        return result(None, error=e)
+    finally:
+        if ownSession:
+            session.close()
+
+
+def fetch_chains(tickers: Iterable[str], timeout: float = DEFAULT_TIMEOUT,
+                 max_workers: int = DEFAULT_MAX_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 session: Optional[requests.Session] = None,
+                 cache: Optional[SnapshotCache] = None, ingest: bool = False) -> Dict[str, FetchResult]:
+    """
+    Fetch many chains concurrently through one pooled session
+    Returns {ticker: FetchResult} in the order the tickers were given
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+
+    workers = max(1, min(max_workers, len(tickers)))
+    ownSession = session is None
+    session = session or make_session(pool_size=workers, retries=retries, backoff=backoff)
+    limiter = HostLimiter(per_host)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {t: pool.submit(fetch_chain, t, session, timeout, limiter, cache, ingest) for t in tickers}
+            return {t: f.result() for t, f in futures.items()}
+    finally:
+        if ownSession:
+            session.close()
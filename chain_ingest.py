@@ -0,0 +1,155 @@
+"""
+Streaming, column-projected ingestion of CBOE chain payloads
+Parses the response body chunk by chunk and copies only the needed
+contract fields into typed NumPy arrays, so the full list of contract
+dicts is never materialised. This cuts peak memory, not parse time: each
+batch is still decoded by json, which dominates either way
+"""
+
+import codecs
+import json
+import re
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from option_chain import PAIR_FIELDS
+
+# Fields read from every contract; everything else in the payload is skipped
+INGEST_FIELDS: Sequence[str] = tuple(PAIR_FIELDS)
+
+# Rough size of one serialised contract, used to pre-size the arrays
+BYTES_PER_CONTRACT = 420
+
+_OPTIONS_KEY = re.compile(r'"options"\s*:\s*\[')
+_SKIP = re.compile(r'[\s,]*')
+_decoder = json.JSONDecoder()
+
+
+class IngestedChain(NamedTuple):
+    timestamp: Optional[str]
+    spot: float
+    data: dict                          # payload["data"] without the options list
+    columns: Dict[str, np.ndarray]      # one array per ingested field, option as bytes
+
+    def __len__(self):
+        return len(self.columns['option'])
+
+
+class _Columns:
+    """Growable struct-of-arrays; object dtype for text fields, float64 otherwise"""
+
+    def __init__(self, fields, capacity):
+        self.fields = list(fields)
+        self.n = 0
+        self.arrays = {f: self._alloc(f, max(capacity, 16)) for f in self.fields}
+
+    @staticmethod
+    def _alloc(field, size):
+        return np.empty(size, dtype=object) if field == 'option' else np.full(size, np.nan)
+
+    def extend(self, contracts):
+        """Copy the projected fields of a batch of contract dicts, growing by doubling"""
+        k = len(contracts)
+        if self.n + k > len(self.arrays[self.fields[0]]):
+            size = max(2 * len(self.arrays[self.fields[0]]), self.n + k)
+            for f in self.fields:
+                grown = self._alloc(f, size)
+                grown[:self.n] = self.arrays[f][:self.n]
+                self.arrays[f] = grown
+        for f in self.fields:
+            values = [c.get(f) for c in contracts]
+            if f != 'option':
+                values = [np.nan if v is None else v for v in values]
+            self.arrays[f][self.n:self.n + k] = values
+        self.n += k
+
+    def finish(self) -> Dict[str, np.ndarray]:
+        out = {f: a[:self.n] for f, a in self.arrays.items()}
+        if 'option' in out:
+            out['option'] = out['option'].astype('S')
+        return out
+
+
+def ingest_chain(chunks: Iterable[bytes], fields: Sequence[str] = INGEST_FIELDS,
+                 size_hint: Optional[int] = None) -> IngestedChain:
+    """
+    Stream-parse a delayed_quotes payload into typed columns
+
+    chunks is any iterable of bytes (response.iter_content, a file read loop).
+    Contracts are decoded one buffer at a time and only the projected fields
+    are kept. size_hint (e.g. Content-Length) pre-sizes the arrays.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    cols = _Columns(fields, (size_hint or 0) // BYTES_PER_CONTRACT)
+    skeleton = []                       # payload text with the options array emptied
+    buf = ''
+    pos = 0
+    state = 'head'
+    chunks = iter(chunks)
+    exhausted = False
+
+    def more():
+        nonlocal buf, pos, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buf = buf[pos:] + decoder.decode(b'', final=True)
+        else:
+            buf = buf[pos:] + decoder.decode(chunk)
+        pos = 0
+
+    while True:
+        if state == 'head':
+            m = _OPTIONS_KEY.search(buf, pos)
+            if m:
+                skeleton.append(buf[pos:m.end()])
+                pos = m.end()
+                state = 'array'
+                continue
+            # Keep a tail in case the key straddles two chunks
+            keep = max(pos, len(buf) - 32)
+            skeleton.append(buf[pos:keep])
+            pos = keep
+        elif state == 'array':
+            # Decode every complete contract in the buffer, then project them as one batch
+            batch = []
+            while True:
+                pos = _SKIP.match(buf, pos).end()
+                if pos >= len(buf) or buf[pos] == ']':
+                    break
+                try:
+                    contract, pos = _decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise
+                    break
+                batch.append(contract)
+            cols.extend(batch)
+            if pos < len(buf) and buf[pos] == ']':
+                state = 'tail'
+                continue
+        else:
+            skeleton.append(buf[pos:])
+            pos = len(buf)
+
+        if exhausted:
+            break
+        more()
+
+    if state != 'tail':
+        raise ValueError("Payload has no data.options array")
+
+    payload = json.loads(''.join(skeleton))
+    data = payload.get('data', {})
+    data.pop('options', None)
+    return IngestedChain(payload.get('timestamp'), data.get('close'), data, cols.finish())
+
+
+def ingest_payload(payload: dict, fields: Sequence[str] = INGEST_FIELDS) -> IngestedChain:
+    """Column-project an already decoded payload dict"""
+    data = dict(payload['data'])
+    options = data.pop('options')
+    cols = _Columns(fields, len(options))
+    cols.extend(options)
+    return IngestedChain(payload.get('timestamp'), data.get('close'), data, cols.finish())
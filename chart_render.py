@@ -0,0 +1,439 @@
+"""
+Chart rendering stage for generate_all_charts
+Draws the 2x3 gamma analysis figure (plus per-expiry and surface charts) from a
+precomputed per-ticker result and fans a batch of results out across a process pool
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+
+from pipeline_metrics import StageRecorder
+
+
+def strike_bars(ax, strikes, heights, window=None, width=6, color='C0', alpha=None, label=None,
+                edgecolor='k', linewidth=0.1):
+    """
+    ax.bar(strikes, heights, width=width, ...) drawn as one PolyCollection
+
+    Strikes outside window (xmin, xmax) are dropped before drawing, so a dense
+    ladder costs one artist instead of a Rectangle per strike, most of them
+    off-screen. The y range autoscales to the bars that remain visible.
+    """
+    from matplotlib.collections import PolyCollection
+
+    x = np.asarray(strikes, dtype=float)
+    h = np.asarray(heights, dtype=float)
+    keep = np.isfinite(h)
+    if window is not None:
+        keep &= (x + width / 2 >= window[0]) & (x - width / 2 <= window[1])
+    x, h = x[keep], h[keep]
+    left, right, zero = x - width / 2, x + width / 2, np.zeros_like(h)
+    verts = np.stack([np.column_stack(corner) for corner in ((left, zero), (left, h), (right, h), (right, zero))],
+                     axis=1)
+
+    bars = PolyCollection(verts, facecolors=color, edgecolors=edgecolor, linewidths=linewidth, alpha=alpha,
+                          label=label)
+    bars.sticky_edges.y.append(0)       # like ax.bar: no margin below a zero baseline
+    ax.add_collection(bars)
+    ax.autoscale_view()
+    return bars
+
+
+def _init_worker():
+    # Workers never open windows; force the non-interactive backend
+    matplotlib.use('Agg')
+
+
+def render_analysis(result, output_dir="charts"):
+    """
+    Render the 2x3 analysis figure for one ticker and save it as PNG
+
+    result is the dict built by gex_compute.compute_ticker: scalars
+    (ticker, date, spot_price, from_strike, to_strike, total_gamma, gamma_flip)
+    plus per-strike arrays (strikes, strike_*) and profile arrays (levels, profile_*).
+    Results computed with second_order=True get a third row of vanna / charm charts.
+    Returns the saved filename.
+    """
+    index = result['ticker']
+    todayDate = result['date']
+    spotPrice = result['spot_price']
+    fromStrike = result['from_strike']
+    toStrike = result['to_strike']
+    strikes = result['strikes']
+    levels = result['levels']
+    totalGamma = result['profile_total']
+    totalGammaExNext = result['profile_ex_next']
+    totalGammaExFri = result['profile_ex_fri']
+    totalGammaSum = result['total_gamma']
+    zeroGamma = result['gamma_flip'] or 0
+
+    secondOrder = 'profile_vanna' in result
+
+    # CREATE 2x3 GRID OF ALL CHARTS (INCLUDING TABLE), 3x3 WITH VANNA / CHARM
+    fig = plt.figure(figsize=(20, 18 if secondOrder else 12), constrained_layout=True)
+    fig.suptitle(f'Gamma Exposure Analysis - {index} - {todayDate.strftime("%d %b %Y")}', fontsize=16, fontweight='bold')
+
+    # Create grid spec for 2x3 layout
+    gs = fig.add_gridspec(3 if secondOrder else 2, 3)
+    ax1 = fig.add_subplot(gs[0, 0])
+    ax2 = fig.add_subplot(gs[0, 1])
+    ax3 = fig.add_subplot(gs[0, 2])
+    ax4 = fig.add_subplot(gs[1, 0])
+    ax5 = fig.add_subplot(gs[1, 1:])  # Table spans 2 columns
+
+    # Chart 1: Total Gamma Exposure
+    ax1.grid(True, alpha=0.3)
+    window = (fromStrike, toStrike)
+    strike_bars(ax1, strikes, result['strike_total_gamma'], window, label="Gamma Exposure", color='steelblue')
+    ax1.set_xlim([fromStrike, toStrike])
+    ax1.set_title(f"Total Gamma: ${totalGammaSum:.2f} Bn per 10bps (0.1%) {index} Move", fontweight="bold", fontsize=12)
+    ax1.set_xlabel('Strike', fontweight="bold")
+    ax1.set_ylabel('Spot Gamma Exposure ($ billions/10bps move)', fontweight="bold")
+    ax1.axvline(x=spotPrice, color='r', lw=1.5, label=f"{index} Spot: ${spotPrice:,.0f}")
+    ax1.legend(loc='best')
+
+    # Chart 2: Open Interest Distribution
+    ax2.grid(True, alpha=0.3)
+    strike_bars(ax2, strikes, result['strike_call_oi'], window, label="Call OI", color='green', alpha=0.7)
+    strike_bars(ax2, strikes, -1 * result['strike_put_oi'], window, label="Put OI", color='red', alpha=0.7)
+    ax2.set_xlim([fromStrike, toStrike])
+    ax2.set_title(f"Total Open Interest for {index}", fontweight="bold", fontsize=12)
+    ax2.set_xlabel('Strike', fontweight="bold")
+    ax2.set_ylabel('Open Interest (number of contracts)', fontweight="bold")
+    ax2.axvline(x=spotPrice, color='r', lw=1.5, label=f"{index} Spot: ${spotPrice:,.0f}")
+    ax2.axhline(y=0, color='black', lw=0.5)
+    ax2.legend(loc='best')
+
+    # Chart 3: Gamma by Type
+    ax3.grid(True, alpha=0.3)
+    strike_bars(ax3, strikes, result['strike_call_gex'] / 10**9, window, label="Call Gamma", color='green', alpha=0.7)
+    strike_bars(ax3, strikes, result['strike_put_gex'] / 10**9, window, label="Put Gamma", color='red', alpha=0.7)
+    ax3.set_xlim([fromStrike, toStrike])
+    ax3.set_title(f"Gamma by Type: ${totalGammaSum:.2f} Bn per 10bps (0.1%) {index} Move", fontweight="bold", fontsize=12)
+    ax3.set_xlabel('Strike', fontweight="bold")
+    ax3.set_ylabel('Spot Gamma Exposure ($ billions/10bps move)', fontweight="bold")
+    ax3.axvline(x=spotPrice, color='r', lw=1.5, label=f"{index} Spot: ${spotPrice:,.0f}")
+    ax3.axhline(y=0, color='black', lw=0.5)
+    ax3.legend(loc='best')
+
+    # Chart 4: Gamma Profile
+    ax4.grid(True, alpha=0.3)
+    ax4.plot(levels, totalGamma, label="All Expiries", linewidth=2, color='blue')
+    ax4.plot(levels, totalGammaExNext, label="Ex-Next Expiry", linewidth=1.5, color='orange', linestyle='--')
+    ax4.plot(levels, totalGammaExFri, label="Ex-Next Monthly Expiry", linewidth=1.5, color='purple', linestyle=':')
+    ax4.set_title(f"Gamma Exposure Profile - {index}", fontweight="bold", fontsize=12)
+    ax4.set_xlabel('Index Price', fontweight="bold")
+    ax4.set_ylabel('Gamma Exposure ($ billions/10bps move)', fontweight="bold")
+    ax4.axvline(x=spotPrice, color='r', lw=1.5, label=f"{index} Spot: ${spotPrice:,.0f}")
+    if zeroGamma != 0:
+        ax4.axvline(x=zeroGamma, color='g', lw=1.5, label=f"Gamma Flip: ${zeroGamma:,.0f}")
+    ax4.axhline(y=0, color='grey', lw=1)
+    ax4.set_xlim([fromStrike, toStrike])
+
+    trans = ax4.get_xaxis_transform()
+    if zeroGamma != 0:
+        ax4.fill_between([fromStrike, zeroGamma], min(totalGamma), max(totalGamma),
+                         facecolor='red', alpha=0.1, transform=trans)
+        ax4.fill_between([zeroGamma, toStrike], min(totalGamma), max(totalGamma),
+                         facecolor='green', alpha=0.1, transform=trans)
+
+    ax4.legend(loc='best', fontsize=9)
+
+    # Chart 5: Gamma Exposure Table for Different Move Sizes
+    ax5.axis('tight')
+    ax5.axis('off')
+
+    # Calculate gamma for different basis point moves
+    move_sizes = [1, 5, 10, 25, 50, 100, 200, 300, 400, 500]
+
+    # Calculate total gamma at current spot for each move size
+    current_total_gamma = totalGammaSum  # This is already for 10bps
+
+    # Create table data
+    table_data = []
+    headers = ['Move Size', 'Gamma ($Bn)', '% of Spot', 'Notional ($Bn)']
+
+    # Estimate ADTV based on typical volumes for indices
+    # These are rough estimates - actual ADTV varies
+    adtv_estimates = {
+        'SPX': 250,  # $250Bn typical SPX futures/options notional
+        'NDX': 100,  # $100Bn typical NDX
+        'RUT': 50,   # $50Bn typical RUT
+        'VIX': 30,   # $30Bn VIX products
+        'DJX': 10,   # $10Bn DJX
+        'XSP': 20,   # $20Bn mini-SPX
+        'XND': 10,   # $10Bn mini-NDX
+        'MRUT': 5,   # $5Bn mini-RUT
+        'MXEA': 5,   # $5Bn MXEA
+        'MXEF': 5    # $5Bn MXEF
+    }
+
+    adtv = adtv_estimates.get(index, 10)  # Default to $10Bn if not found
+
+    for bps in move_sizes:
+        # Scale gamma from 10bps base
+        gamma_for_move = current_total_gamma * (bps / 10)
+        pct_move = bps / 100  # Convert bps to percentage
+        notional = abs(gamma_for_move)
+
+        # Format the row
+        if bps < 100:
+            move_label = f"{bps}bps"
+        else:
+            move_label = f"{bps/100:.0f}%"
+
+        # Add ADTV context for significant moves
+        adtv_context = ""
+        if notional > 0:
+            adtv_ratio = notional / adtv
+            if adtv_ratio >= 0.1:  # If more than 10% of ADTV
+                adtv_context = f" ({adtv_ratio:.1f}x ADTV)"
+
+        table_data.append([
+            move_label,
+            f"${gamma_for_move:+.2f}",
+            f"{pct_move:.2f}%",
+            f"${notional:.2f}{adtv_context}"
+        ])
+
+    # Create the table
+    table = ax5.table(cellText=table_data,
+                     colLabels=headers,
+                     cellLoc='center',
+                     loc='center',
+                     colWidths=[0.15, 0.2, 0.15, 0.35])
+
+    table.auto_set_font_size(False)
+    table.set_fontsize(10)
+    table.scale(1, 2)
+
+    # Style the header
+    for i in range(len(headers)):
+        table[(0, i)].set_facecolor('#40466e')
+        table[(0, i)].set_text_props(weight='bold', color='white')
+
+    # Color code the rows based on gamma size
+    for i in range(1, len(table_data) + 1):
+        gamma_val = float(table_data[i-1][1].replace('$', '').replace('+', ''))
+
+        # Color intensity based on magnitude
+        if abs(gamma_val) > 10:
+            color = '#ffcccc' if gamma_val < 0 else '#ccffcc'
+        elif abs(gamma_val) > 5:
+            color = '#ffe6e6' if gamma_val < 0 else '#e6ffe6'
+        else:
+            color = '#f9f9f9'
+
+        for j in range(len(headers)):
+            table[(i, j)].set_facecolor(color)
+
+    # Add title and context
+    ax5.set_title(f'Gamma Exposure by Move Size (Est. 20D ADTV: ${adtv}Bn)',
+                 fontweight='bold', fontsize=12, pad=20)
+
+    # Add explanatory text
+    explanation = (f"Negative gamma = Dealers sell into weakness, buy into strength (amplifies moves)\n"
+                  f"Positive gamma = Dealers buy into weakness, sell into strength (dampens moves)\n"
+                  f"Current Gamma Flip: ${zeroGamma:,.0f}" if zeroGamma != 0 else "")
+
+    if explanation:
+        ax5.text(0.5, -0.1, explanation, transform=ax5.transAxes,
+                ha='center', fontsize=9, style='italic')
+
+    if secondOrder:
+        # Chart 6: Vanna Exposure by strike
+        ax6 = fig.add_subplot(gs[2, 0])
+        ax6.grid(True, alpha=0.3)
+        strike_bars(ax6, strikes, result['strike_vanna'], window, label="Vanna Exposure", color='darkcyan')
+        ax6.set_xlim([fromStrike, toStrike])
+        ax6.set_title(f"Total Vanna: ${result['total_vanna']:.2f} Bn per Vol Point", fontweight="bold", fontsize=12)
+        ax6.set_xlabel('Strike', fontweight="bold")
+        ax6.set_ylabel('Vanna Exposure ($ billions delta/1 vol pt)', fontweight="bold")
+        ax6.axvline(x=spotPrice, color='r', lw=1.5, label=f"{index} Spot: ${spotPrice:,.0f}")
+        ax6.axhline(y=0, color='black', lw=0.5)
+        ax6.legend(loc='best')
+
+        # Chart 7: Charm Exposure by strike
+        ax7 = fig.add_subplot(gs[2, 1])
+        ax7.grid(True, alpha=0.3)
+        strike_bars(ax7, strikes, result['strike_charm'], window, label="Charm Exposure", color='darkorange')
+        ax7.set_xlim([fromStrike, toStrike])
+        ax7.set_title(f"Total Charm: ${result['total_charm']:.2f} Bn per Day", fontweight="bold", fontsize=12)
+        ax7.set_xlabel('Strike', fontweight="bold")
+        ax7.set_ylabel('Charm Exposure ($ billions delta/day)', fontweight="bold")
+        ax7.axvline(x=spotPrice, color='r', lw=1.5, label=f"{index} Spot: ${spotPrice:,.0f}")
+        ax7.axhline(y=0, color='black', lw=0.5)
+        ax7.legend(loc='best')
+
+        # Chart 8: Vanna and Charm Profiles
+        ax8 = fig.add_subplot(gs[2, 2])
+        ax8.grid(True, alpha=0.3)
+        ax8.plot(levels, result['profile_vanna'], label="Vanna ($Bn/vol pt)", linewidth=2, color='darkcyan')
+        ax8.plot(levels, result['profile_charm'], label="Charm ($Bn/day)", linewidth=2, color='darkorange')
+        ax8.set_title(f"Vanna & Charm Profile - {index}", fontweight="bold", fontsize=12)
+        ax8.set_xlabel('Index Price', fontweight="bold")
+        ax8.set_ylabel('Exposure ($ billions delta)', fontweight="bold")
+        ax8.axvline(x=spotPrice, color='r', lw=1.5, label=f"{index} Spot: ${spotPrice:,.0f}")
+        ax8.axhline(y=0, color='grey', lw=1)
+        ax8.set_xlim([fromStrike, toStrike])
+        ax8.legend(loc='best', fontsize=9)
+
+    # Save the figure
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    filename = f"{output_dir}/{index}_gamma_analysis.png"
+    fig.savefig(filename, dpi=100, bbox_inches='tight')
+    plt.close(fig)
+
+    return filename
+
+
+def render_expiry_breakdown(result, output_dir="charts", max_labels: int = 30):
+    """
+    Render the per-expiry decomposition of the gamma profile and save it as PNG
+
+    Left: expiries x levels heatmap of result['expiry_profile'] ($Bn), nearest
+    expiry on top. Right: each expiry's exposure at spot. Returns the filename.
+    """
+    index = result['ticker']
+    expiries = np.asarray(result['expiries'], dtype='datetime64[D]')
+    levels = result['levels']
+    matrix = np.asarray(result['expiry_profile'])
+    spotPrice = result['spot_price']
+    zeroGamma = result['gamma_flip'] or 0
+    atSpot = np.array([np.interp(spotPrice, levels, row) for row in matrix])
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(20, max(6, 0.22 * len(expiries) + 3)), sharey=True,
+                                   gridspec_kw={'width_ratios': [3, 1]}, constrained_layout=True)
+    fig.suptitle(f'Gamma Exposure by Expiry - {index} - {result["date"].strftime("%d %b %Y")}',
+                 fontsize=16, fontweight='bold')
+
+    rows = np.arange(len(expiries))
+    limit = np.abs(matrix).max() or 1.0
+    mesh = ax1.pcolormesh(levels, rows, matrix, cmap='RdYlGn', vmin=-limit, vmax=limit, shading='nearest')
+    fig.colorbar(mesh, ax=ax1, label='Gamma Exposure ($ billions/move)', pad=0.01)
+    ax1.axvline(x=spotPrice, color='k', lw=1.5, label=f"{index} Spot: ${spotPrice:,.0f}")
+    if zeroGamma != 0:
+        ax1.axvline(x=zeroGamma, color='b', lw=1.5, linestyle='--', label=f"Gamma Flip: ${zeroGamma:,.0f}")
+    step = max(1, int(np.ceil(len(expiries) / max_labels)))
+    ax1.set_yticks(rows[::step])
+    ax1.set_yticklabels([str(e) for e in expiries[::step]])
+    ax1.invert_yaxis()
+    ax1.set_title("Profile per Expiry", fontweight="bold", fontsize=12)
+    ax1.set_xlabel('Index Price', fontweight="bold")
+    ax1.set_ylabel('Expiry', fontweight="bold")
+    ax1.legend(loc='lower right')
+
+    ax2.grid(True, alpha=0.3)
+    ax2.barh(rows, atSpot, color=np.where(atSpot < 0, 'red', 'green'), alpha=0.7, edgecolor='k', linewidth=0.1)
+    ax2.axvline(x=0, color='black', lw=0.5)
+    ax2.set_title(f"At Spot (total ${atSpot.sum():.2f} Bn)", fontweight="bold", fontsize=12)
+    ax2.set_xlabel('Gamma Exposure ($ billions/move)', fontweight="bold")
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    filename = f"{output_dir}/{index}_expiry_breakdown.png"
+    fig.savefig(filename, dpi=100, bbox_inches='tight')
+    plt.close(fig)
+
+    return filename
+
+
+def render_surface(result, output_dir="charts", kind='time'):
+    """
+    Render result['surfaces'][kind] as a spot x (forward date | IV shift) heatmap
+    The black contour is the zero-gamma line, i.e. how the flip level moves.
+    Returns the filename.
+    """
+    index = result['ticker']
+    surface = result['surfaces'][kind]
+    values = np.asarray(surface.values)
+    spotPrice = result['spot_price']
+
+    fig, ax = plt.subplots(figsize=(14, 8), constrained_layout=True)
+    if kind == 'time':
+        labels = [str(d) for d in np.asarray(surface.axis, dtype='datetime64[D]')]
+        title, ylabel = "Gamma Exposure Toward Expiry", 'As of Date'
+    else:
+        labels = [f"{dv * 100:+.1f} vols" for dv in surface.axis]
+        title, ylabel = "Gamma Exposure Under Parallel IV Shifts", 'IV Shift'
+    fig.suptitle(f'{title} - {index} - {result["date"].strftime("%d %b %Y")}', fontsize=16, fontweight='bold')
+
+    rows = np.arange(len(labels))
+    limit = np.abs(values).max() or 1.0
+    mesh = ax.pcolormesh(surface.levels, rows, values, cmap='RdYlGn', vmin=-limit, vmax=limit, shading='nearest')
+    fig.colorbar(mesh, ax=ax, label='Gamma Exposure ($ billions/move)', pad=0.01)
+    if len(rows) > 1 and values.min() < 0 < values.max():
+        ax.contour(surface.levels, rows, values, levels=[0], colors='k', linewidths=1.5)
+    ax.axvline(x=spotPrice, color='b', lw=1.5, linestyle='--', label=f"{index} Spot: ${spotPrice:,.0f}")
+    ax.set_yticks(rows)
+    ax.set_yticklabels(labels)
+    if kind == 'time':
+        ax.invert_yaxis()
+    ax.set_xlabel('Index Price', fontweight="bold")
+    ax.set_ylabel(ylabel, fontweight="bold")
+    ax.legend(loc='upper right')
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    filename = f"{output_dir}/{index}_{kind}_surface.png"
+    fig.savefig(filename, dpi=100, bbox_inches='tight')
+    plt.close(fig)
+
+    return filename
+
+
+# Chart name -> renderer, for render_all and the daemon
+RENDERERS = {
+    'analysis': render_analysis,
+    'expiries': render_expiry_breakdown,
+    'surface_time': partial(render_surface, kind='time'),
+    'surface_vol': partial(render_surface, kind='vol'),
+}
+
+
+def _render_safe(result, output_dir, record=False, trace_memory=False, chart='analysis'):
+    # Timed in the worker itself; the records travel back with the filename
+    recorder = StageRecorder(record, trace_memory)
+    filename = None
+    try:
+        with recorder.stage(result['ticker'], 'render' if chart == 'analysis' else f'render_{chart}', 1):
+            filename = RENDERERS[chart](result, output_dir)
+    except Exception as e:
+        print(f"❌ Error rendering {result['ticker']}: {str(e)}")
+    return filename, recorder.records
+
+
+def render_all(results, output_dir="charts", max_workers: Optional[int] = None,
+               recorder: Optional[StageRecorder] = None, chart: str = 'analysis') -> List[Optional[str]]:
+    """
+    Render many tickers in parallel, one figure per worker process
+    chart picks the figure from RENDERERS
+    Returns the saved filenames in input order (None where rendering failed);
+    per-ticker render stages are added to recorder when it is enabled
+    """
+    results = list(results)
+    record = recorder is not None and recorder.enabled
+    traceMemory = record and recorder.trace_memory
+    if max_workers == 1 or len(results) <= 1:
+        rendered = [_render_safe(r, output_dir, record, traceMemory, chart) for r in results]
+    else:
+        workers = min(max_workers or os.cpu_count() or 1, len(results))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            n = len(results)
+            rendered = list(pool.map(_render_safe, results, [output_dir] * n, [record] * n, [traceMemory] * n,
+                                     [chart] * n))
+
+    for _, records in rendered:
+        for r in records:
+            recorder.add(r)
+    return [filename for filename, _ in rendered]
@@ -0,0 +1,30 @@
+"""
+Advisory inter-process lock for the index files of the on-disk stores
+snapshot_cache, result_cache and snapshot_archive each keep an index that
+several processes may update at once (generate_all_charts, the daemon, the
+archive CLI). Every change reads the current index while holding this
+lock and writes its update before releasing it, so concurrent writers no
+longer overwrite each other's entries.
+"""
+
+import contextlib
+import os
+
+try:
+    import fcntl
+except ImportError:         # Windows: only the per-instance threading locks apply
+    fcntl = None
+
+
+@contextlib.contextmanager
+def locked(path: str):
+    """Hold an exclusive flock on path (created if missing) for the duration of the block"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
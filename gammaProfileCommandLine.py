@@ -1,40 +1,43 @@
-import pandas as pd
 import numpy as np
-import scipy
-from scipy.stats import norm
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta, date
-import requests
+from datetime import date
 import sys
 
-pd.options.display.float_format = '{:,.4f}'.format
+from cboe_fetch import fetch_chain
+from gex_engine import PreparedChain, gamma_flip_points, gamma_profile
+from market_calendar import quote_time
+from option_chain import OptionChain
+from snapshot_cache import SnapshotCache
 
-# Black-Scholes European-Options Gamma
-def calcGammaEx(S, K, vol, T, r, q, optType, OI):
-    if T == 0 or vol == 0:
-        return 0
+index = sys.argv[1]
 
-    dp = (np.log(S/K) + (r - q + 0.5*vol**2)*T) / (vol*np.sqrt(T))
-    dm = dp - vol*np.sqrt(T) 
+# Live monitor instead of one-shot charts: python gammaProfileCommandLine.py SPX --watch [--interval 60]
+if '--watch' in sys.argv[2:]:
+    from gex_watch import main as watch
+    sys.exit(watch(sys.argv[1:], move=0.01))
 
-    if optType == 'call':
-        gamma = np.exp(-q*T) * norm.pdf(dp) / (S * vol * np.sqrt(T))
-        return OI * 100 * S * S * 0.01 * gamma 
-    else: # Gamma is same for calls and puts. This is just to cross-check
-        gamma = K * np.exp(-r*T) * norm.pdf(dm) / (S * S * vol * np.sqrt(T))
-        return OI * 100 * S * S * 0.01 * gamma 
+# Numbers only, no charts: python gammaProfileCommandLine.py SPX --json|--csv [--table profile]
+if '--json' in sys.argv[2:] or '--csv' in sys.argv[2:]:
+    from gex_compute import main as compute
+    rest = [a for a in sys.argv[2:] if a not in ('--json', '--csv')]
+    sys.exit(compute([index, '--format', 'csv' if '--csv' in sys.argv[2:] else 'json', '--move', '0.01'] + rest))
 
-def isThirdFriday(d):
-    return d.weekday() == 4 and 15 <= d.day <= 21
+# Charting needs pandas and matplotlib; imported only now so the branches above start fast
+import pandas as pd
+import matplotlib.pyplot as plt
+from chart_render import strike_bars
 
-index = sys.argv[1]
+pd.options.display.float_format = '{:,.4f}'.format
 
 # Get options data
-response = requests.get(url="https://cdn.cboe.com/api/global/delayed_quotes/options/_" + index + ".json")
-options = response.json()
+# Repeat runs within the cache TTL reuse the local snapshot; older ones are revalidated
+fetched = fetch_chain(index, cache=SnapshotCache(), ingest=True)
+if not fetched.ok:
+    print(f"Failed to fetch data for {index}: {fetched.error or 'HTTP ' + str(fetched.status_code)}")
+    exit()
+ingested = fetched.payload
 
 # Get SPX Spot
-spotPrice = options["data"]["close"]
+spotPrice = ingested.spot
 print(spotPrice)
 fromStrike = 0.8 * spotPrice
 toStrike = 1.2 * spotPrice
@@ -42,66 +45,27 @@ toStrike = 1.2 * spotPrice
 # Get Today's Date
 todayDate = date.today()
 
-# Get SPX Options Data
-data_df = pd.DataFrame(options["data"]["options"])
-
-data_df['CallPut'] = data_df['option'].str.slice(start=-9,stop=-8)
-data_df['ExpirationDate'] = data_df['option'].str.slice(start=-15,stop=-9)
-data_df['ExpirationDate'] = pd.to_datetime(data_df['ExpirationDate'], format='%y%m%d')
-data_df['Strike'] = data_df['option'].str.slice(start=-8,stop=-3)
-data_df['Strike'] = data_df['Strike'].str.lstrip('0')
-
-data_df_calls = data_df.loc[data_df['CallPut'] == "C"]
-data_df_puts = data_df.loc[data_df['CallPut'] == "P"]
-data_df_calls = data_df_calls.reset_index(drop=True)
-data_df_puts = data_df_puts.reset_index(drop=True)
-
-df = data_df_calls[['ExpirationDate','option','last_trade_price','change','bid','ask','volume','iv','delta','gamma','open_interest','Strike']]
-df_puts = data_df_puts[['ExpirationDate','option','last_trade_price','change','bid','ask','volume','iv','delta','gamma','open_interest','Strike']]
-df_puts.columns = ['put_exp','put_option','put_last_trade_price','put_change','put_bid','put_ask','put_volume','put_iv','put_delta','put_gamma','put_open_interest','put_strike']
-
-df = pd.concat([df, df_puts], axis=1)
-
-df['check'] = np.where((df['ExpirationDate'] == df['put_exp']) & (df['Strike'] == df['put_strike']), 0, 1)
-
-if df['check'].sum() != 0:
-    print("PUT CALL MERGE FAILED - OPTIONS ARE MISMATCHED.")
-    exit()
-
-df.drop(['put_exp', 'put_strike', 'check'], axis=1, inplace=True)
-
-print(df)
-
-df.columns = ['ExpirationDate','Calls','CallLastSale','CallNet','CallBid','CallAsk','CallVol',
-              'CallIV','CallDelta','CallGamma','CallOpenInt','StrikePrice','Puts','PutLastSale',
-              'PutNet','PutBid','PutAsk','PutVol','PutIV','PutDelta','PutGamma','PutOpenInt']
-
-df['ExpirationDate'] = pd.to_datetime(df['ExpirationDate'], format='%a %b %d %Y')
-df['ExpirationDate'] = df['ExpirationDate'] + timedelta(hours=16)
-df['StrikePrice'] = df['StrikePrice'].astype(float)
-df['CallIV'] = df['CallIV'].astype(float)
-df['PutIV'] = df['PutIV'].astype(float)
-df['CallGamma'] = df['CallGamma'].astype(float)
-df['PutGamma'] = df['PutGamma'].astype(float)
-df['CallOpenInt'] = df['CallOpenInt'].astype(float)
-df['PutOpenInt'] = df['PutOpenInt'].astype(float)
+# Pair calls with puts and keep the chain as contiguous typed arrays
+# Time to expiry runs from the snapshot's quote time to the 16:00 expiry, so 0DTE decays through the session
+chain = OptionChain.from_ingested(index, ingested, todayDate, now=quote_time(ingested.timestamp, todayDate))
 
+print(chain.to_frame())
 
 # ---=== CALCULATE SPOT GAMMA ===---
-# Gamma Exposure = Unit Gamma * Open Interest * Contract Size * Spot Price 
+# Gamma Exposure = Unit Gamma * Open Interest * Contract Size * Spot Price
 # To further convert into 'per 1% move' quantity, multiply by 1% of spotPrice
-df['CallGEX'] = df['CallGamma'] * df['CallOpenInt'] * 100 * spotPrice * spotPrice * 0.01
-df['PutGEX'] = df['PutGamma'] * df['PutOpenInt'] * 100 * spotPrice * spotPrice * 0.01 * -1
-
-df['TotalGamma'] = (df.CallGEX + df.PutGEX) / 10**9
-dfAgg = df.groupby(['StrikePrice']).sum(numeric_only=True)
+callGEX, putGEX = chain.spot_gex(move=0.01)
+totalGammaSum = np.nansum(callGEX + putGEX) / 10**9
+dfAgg = chain.by_strike(CallOpenInt=chain.call_oi, PutOpenInt=chain.put_oi, CallGEX=callGEX, PutGEX=putGEX,
+                        TotalGamma=(np.nan_to_num(callGEX) + np.nan_to_num(putGEX)) / 10**9)
 strikes = dfAgg.index.values
 
 # Chart 1: Absolute Gamma Exposure
 plt.grid()
-plt.bar(strikes, dfAgg['TotalGamma'].to_numpy(), width=6, linewidth=0.1, edgecolor='k', label="Gamma Exposure")
+# Strikes outside the +/-20% window are cropped and each series is drawn as one artist
+strike_bars(plt.gca(), strikes, dfAgg['TotalGamma'].to_numpy(), (fromStrike, toStrike), label="Gamma Exposure")
 plt.xlim([fromStrike, toStrike])
-chartTitle = "Total Gamma: $" + str("{:.2f}".format(df['TotalGamma'].sum())) + " Bn per 1% " + index + " Move"
+chartTitle = "Total Gamma: $" + str("{:.2f}".format(totalGammaSum)) + " Bn per 1% " + index + " Move"
 plt.title(chartTitle, fontweight="bold", fontsize=20)
 plt.xlabel('Strike', fontweight="bold")
 plt.ylabel('Spot Gamma Exposure ($ billions/1% move)', fontweight="bold")
@@ -111,8 +75,8 @@ plt.show()
 
 # Chart 2: Open Interest by Calls and Puts
 plt.grid()
-plt.bar(strikes, dfAgg['CallOpenInt'].to_numpy(), width=6, linewidth=0.1, edgecolor='k', label="Call OI")
-plt.bar(strikes, -1 * dfAgg['PutOpenInt'].to_numpy(), width=6, linewidth=0.1, edgecolor='k', label="Put OI")
+strike_bars(plt.gca(), strikes, dfAgg['CallOpenInt'].to_numpy(), (fromStrike, toStrike), label="Call OI")
+strike_bars(plt.gca(), strikes, -1 * dfAgg['PutOpenInt'].to_numpy(), (fromStrike, toStrike), color='C1', label="Put OI")
 plt.xlim([fromStrike, toStrike])
 chartTitle = "Total Open Interest for " + index
 plt.title(chartTitle, fontweight="bold", fontsize=20)
@@ -124,10 +88,10 @@ plt.show()
 
 # Chart 3: Absolute Gamma Exposure by Calls and Puts
 plt.grid()
-plt.bar(strikes, dfAgg['CallGEX'].to_numpy() / 10**9, width=6, linewidth=0.1, edgecolor='k', label="Call Gamma")
-plt.bar(strikes, dfAgg['PutGEX'].to_numpy() / 10**9, width=6, linewidth=0.1, edgecolor='k', label="Put Gamma")
+strike_bars(plt.gca(), strikes, dfAgg['CallGEX'].to_numpy() / 10**9, (fromStrike, toStrike), label="Call Gamma")
+strike_bars(plt.gca(), strikes, dfAgg['PutGEX'].to_numpy() / 10**9, (fromStrike, toStrike), color='C1', label="Put Gamma")
 plt.xlim([fromStrike, toStrike])
-chartTitle = "Total Gamma: $" + str("{:.2f}".format(df['TotalGamma'].sum())) + " Bn per 1% " + index + " Move"
+chartTitle = "Total Gamma: $" + str("{:.2f}".format(totalGammaSum)) + " Bn per 1% " + index + " Move"
 plt.title(chartTitle, fontweight="bold", fontsize=20)
 plt.xlabel('Strike', fontweight="bold")
 plt.ylabel('Spot Gamma Exposure ($ billions/1% move)', fontweight="bold")
@@ -138,52 +102,29 @@ plt.show()
 # ---=== CALCULATE GAMMA PROFILE ===---
 levels = np.linspace(fromStrike, toStrike, 30)
 
-# For 0DTE options, I'm setting DTE = 1 day, otherwise they get excluded
-df['daysTillExp'] = [1/262 if (np.busday_count(todayDate, x.date())) == 0 \
-                           else np.busday_count(todayDate, x.date())/262 for x in df.ExpirationDate]
-
-nextExpiry = df['ExpirationDate'].min()
-
-df['IsThirdFriday'] = [isThirdFriday(x) for x in df.ExpirationDate]
-thirdFridays = df.loc[df['IsThirdFriday'] == True]
-nextMonthlyExp = thirdFridays['ExpirationDate'].min()
-
-totalGamma = []
-totalGammaExNext = []
-totalGammaExFri = []
-
-# For each spot level, calc gamma exposure at that point
-for level in levels:
-    df['callGammaEx'] = df.apply(lambda row : calcGammaEx(level, row['StrikePrice'], row['CallIV'], 
-                                                          row['daysTillExp'], 0, 0, "call", row['CallOpenInt']), axis = 1)
-
-    df['putGammaEx'] = df.apply(lambda row : calcGammaEx(level, row['StrikePrice'], row['PutIV'], 
-                                                         row['daysTillExp'], 0, 0, "put", row['PutOpenInt']), axis = 1)    
-
-    totalGamma.append(df['callGammaEx'].sum() - df['putGammaEx'].sum())
-
-    exNxt = df.loc[df['ExpirationDate'] != nextExpiry]
-    totalGammaExNext.append(exNxt['callGammaEx'].sum() - exNxt['putGammaEx'].sum())
+nextExpiry = chain.next_expiry()
+nextMonthlyExp = chain.next_monthly_expiry()
 
-    exFri = df.loc[df['ExpirationDate'] != nextMonthlyExp]
-    totalGammaExFri.append(exFri['callGammaEx'].sum() - exFri['putGammaEx'].sum())
+# Spot-independent per-contract terms are computed once and shared by the profile and flip search
+prepared = PreparedChain.from_chain(chain, move=0.01)
 
-totalGamma = np.array(totalGamma) / 10**9
-totalGammaExNext = np.array(totalGammaExNext) / 10**9
-totalGammaExFri = np.array(totalGammaExFri) / 10**9
+# Evaluate every level x contract in batched NumPy blocks
+totalGamma, totalGammaExNext, totalGammaExFri = gamma_profile(prepared, levels, nextExpiry, nextMonthlyExp, move=0.01)
 
-# Find Gamma Flip Point
-zeroCrossIdx = np.where(np.diff(np.sign(totalGamma)))[0]
+# Find Gamma Flip Points: bracket sign changes on the profile grid, then refine each one
+gammaFlips = gamma_flip_points(prepared, levels, totalGamma, move=0.01)
 
-negGamma = totalGamma[zeroCrossIdx]
-posGamma = totalGamma[zeroCrossIdx+1]
-negStrike = levels[zeroCrossIdx]
-posStrike = levels[zeroCrossIdx+1]
+totalGamma = totalGamma / 10**9
+totalGammaExNext = totalGammaExNext / 10**9
+totalGammaExFri = totalGammaExFri / 10**9
 
 # Writing and sharing this code is only possible with your support! 
 # If you find it useful, consider supporting us at perfiliev.com/support :)
-zeroGamma = posStrike - ((posStrike - negStrike) * posGamma/(posGamma-negGamma))
-zeroGamma = zeroGamma[0]
+if len(gammaFlips) > 0:
+    zeroGamma = gammaFlips[0]
+else:
+    zeroGamma = 0  # No flip point found
+    print(f"No gamma flip between {fromStrike:,.0f} and {toStrike:,.0f}")
 
 # Chart 4: Gamma Exposure Profile
 fig, ax = plt.subplots()
@@ -196,11 +137,13 @@ plt.title(chartTitle, fontweight="bold", fontsize=20)
 plt.xlabel('Index Price', fontweight="bold")
 plt.ylabel('Gamma Exposure ($ billions/1% move)', fontweight="bold")
 plt.axvline(x=spotPrice, color='r', lw=1, label=index + " Spot: " + str("{:,.0f}".format(spotPrice)))
-plt.axvline(x=zeroGamma, color='g', lw=1, label="Gamma Flip: " + str("{:,.0f}".format(zeroGamma)))
+if zeroGamma != 0:
+    plt.axvline(x=zeroGamma, color='g', lw=1, label="Gamma Flip: " + str("{:,.0f}".format(zeroGamma)))
 plt.axhline(y=0, color='grey', lw=1)
 plt.xlim([fromStrike, toStrike])
 trans = ax.get_xaxis_transform()
-plt.fill_between([fromStrike, zeroGamma], min(totalGamma), max(totalGamma), facecolor='red', alpha=0.1, transform=trans)
-plt.fill_between([zeroGamma, toStrike], min(totalGamma), max(totalGamma), facecolor='green', alpha=0.1, transform=trans)
+if zeroGamma != 0:
+    plt.fill_between([fromStrike, zeroGamma], min(totalGamma), max(totalGamma), facecolor='red', alpha=0.1, transform=trans)
+    plt.fill_between([zeroGamma, toStrike], min(totalGamma), max(totalGamma), facecolor='green', alpha=0.1, transform=trans)
 plt.legend()
 plt.show()
\ No newline at end of file
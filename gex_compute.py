@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Compute-only gamma exposure: numbers and profiles, no charts
+Usage: python gex_compute.py SPX [NDX ...] [--format json|csv]
+                             [--table summary|profile|strikes|expiries|greeks|strike_greeks]
+                             [--move 0.001] [--second-order] [--output FILE] [--import-times]
+
+Imports neither matplotlib nor pandas, so cron jobs and per-request
+invocations start in a fraction of the charting scripts' time.
+generate_all_charts.py renders from the same compute_ticker results.
+"""
+
+import time
+_IMPORT_START = time.perf_counter()
+
+import argparse
+import csv
+import json
+import sys
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from cboe_fetch import fetch_chain, fetch_chains
+from gex_engine import GexSurface, PreparedChain, expiry_profile, gamma_flip_points, time_surface, vol_surface
+from market_calendar import calendar_for, quote_time
+from option_chain import OptionChain
+from pipeline_metrics import RECORDER, StageRecord
+from result_cache import ResultCache, result_key
+from snapshot_archive import SnapshotArchive
+from snapshot_cache import SnapshotCache
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+# Modules the compute path must not pull in; reported by --import-times
+HEAVY_MODULES = ('matplotlib', 'pandas', 'scipy')
+
+# Profile grid: levels from 80% to 120% of spot
+PROFILE_RANGE = (0.8, 1.2)
+PROFILE_POINTS = 30
+
+# Surface axes: business days ahead of today, and parallel IV shifts in vol points
+DEFAULT_SURFACE_DAYS = (0, 1, 2, 3, 5, 10, 15, 20)
+DEFAULT_VOL_SHIFTS = (-0.10, -0.05, -0.025, 0.0, 0.025, 0.05, 0.10)
+
+
+def surface_dates(today, business_days: Sequence[int] = DEFAULT_SURFACE_DAYS) -> np.ndarray:
+    """today plus each exchange business-day offset (0 is today itself, even on a weekend or holiday)"""
+    today = np.datetime64(today, 'D')
+    days = np.asarray(business_days, dtype=int)
+    calendar = calendar_for([today, today + 2 * int(days.max(initial=0)) + 7])
+    return np.where(days == 0, today, np.busday_offset(today, days, roll='forward', busdaycal=calendar))
+
+
+def compute_ticker(index, fetched=None, move: float = 0.001, log: Callable[[str], None] = print,
+                   surfaces: Sequence[str] = (), surface_days: Sequence[int] = DEFAULT_SURFACE_DAYS,
+                   vol_shifts: Sequence[float] = DEFAULT_VOL_SHIFTS, second_order: bool = False,
+                   intraday: bool = True, cache: Optional[ResultCache] = None,
+                   archive: Optional[SnapshotArchive] = None):
+    """
+    Compute gamma exposure for a single ticker without drawing anything
+    fetched is a prefetched cboe_fetch.FetchResult; the chain is downloaded if omitted.
+    surfaces lists 'time' and/or 'vol' GexSurfaces to add under result['surfaces'].
+    second_order adds vanna and charm exposure by strike and across the levels.
+    intraday measures time to expiry from the snapshot's own quote time (see
+    market_calendar.quote_time) to the 16:00 expiry; a snapshot too stale for
+    that falls back to whole days from today.
+    cache (result_cache.ResultCache) returns the stored result when the paired
+    chain and parameters hash to a key computed before; result['cache_key'] is set.
+    archive (snapshot_archive.SnapshotArchive) gets a copy of the paired chain.
+    Returns the result dict consumed by chart_render.render_analysis, or None on failure.
+    """
+
+    log(f"\n{'='*60}")
+    log(f"Processing {index}...")
+    log(f"{'='*60}")
+
+    try:
+        # Get options data
+        if fetched is None:
+            fetched = fetch_chain(index, timeout=10, cache=SnapshotCache(), ingest=True)
+        if fetched.error is not None:
+            raise fetched.error
+        if fetched.status_code != 200:
+            log(f"❌ Failed to fetch data for {index}: HTTP {fetched.status_code}")
+            return None
+
+        ingested = fetched.payload
+        # Download and JSON decode are interleaved by the streaming ingest; wall - cpu is network wait
+        RECORDER.add(StageRecord(index, 'fetch', fetched.elapsed, fetched.cpu, None, len(ingested), None))
+
+        # Get Index Spot Price
+        spotPrice = ingested.spot
+        log(f"✓ {index} Spot Price: ${spotPrice:.2f}")
+        fromStrike = PROFILE_RANGE[0] * spotPrice
+        toStrike = PROFILE_RANGE[1] * spotPrice
+
+        # Get Today's Date
+        todayDate = date.today()
+
+        # Pair calls with puts and keep the chain as contiguous typed arrays
+        with RECORDER.stage(index, 'pairing') as stage:
+            quoted = quote_time(ingested.timestamp, todayDate, log) if intraday else None
+            chain = OptionChain.from_ingested(index, ingested, todayDate, now=quoted)
+            stage.rows = len(chain)
+
+        if archive is not None and archive.append(chain, ingested.timestamp) is not None:
+            log(f"✓ {index} snapshot {ingested.timestamp} archived")
+
+        # Same chain content and parameters as an earlier run: nothing to recompute
+        cacheKey = None
+        if cache is not None:
+            # The clock comes from the payload (quote_time), so an unchanged snapshot keeps its key all day
+            params = {'move': move, 'range': PROFILE_RANGE, 'points': PROFILE_POINTS, 'date': todayDate,
+                      'intraday': intraday, 'quote_time': quoted,
+                      'second_order': second_order, 'surfaces': sorted(surfaces),
+                      'surface_days': list(surface_days) if 'time' in surfaces else None,
+                      'vol_shifts': list(vol_shifts) if 'vol' in surfaces else None}
+            cacheKey = result_key(chain, params)
+            cached = cache.get(cacheKey)
+            if cached is not None:
+                log(f"✓ {index} unchanged since a previous run, using cached result")
+                cached['timestamp'] = ingested.timestamp
+                return cached
+
+        log(f"✓ Processing {len(chain)} option pairs ({chain.one_sided} one-sided)...")
+
+        # ---=== CALCULATE SPOT GAMMA ===---
+        # Gamma Exposure = Unit Gamma * Open Interest * Contract Size * Spot Price
+        with RECORDER.stage(index, 'spot_gex', len(chain)):
+            callGEX, putGEX = chain.spot_gex(move=move)
+            totalGammaSum = np.nansum(callGEX + putGEX) / 10**9
+            # Same np.unique(expiry) order as the expiry_profile rows
+            _, byExpiryDate = chain.expiry_sums(TotalGamma=(np.nan_to_num(callGEX) + np.nan_to_num(putGEX)) / 10**9)
+        with RECORDER.stage(index, 'aggregate') as stage:
+            strikes, agg = chain.strike_sums(CallOpenInt=chain.call_oi, PutOpenInt=chain.put_oi, CallGEX=callGEX,
+                                             PutGEX=putGEX,
+                                             TotalGamma=(np.nan_to_num(callGEX) + np.nan_to_num(putGEX)) / 10**9)
+            stage.rows = len(strikes)
+
+        # ---=== CALCULATE GAMMA PROFILE ===---
+        levels = np.linspace(fromStrike, toStrike, PROFILE_POINTS)
+
+        nextExpiry = chain.next_expiry()
+        nextMonthlyExp = chain.next_monthly_expiry()
+        if np.isnat(nextMonthlyExp):
+            nextMonthlyExp = nextExpiry
+
+        with RECORDER.stage(index, 'profile', len(levels)):
+            # Spot-independent per-contract terms are computed once and shared by the profile and flip search
+            prepared = PreparedChain.from_chain(chain, move=move, second_order=second_order)
+
+            # One expiries x levels pass; the ex-next / ex-monthly curves are row subtractions.
+            # Vanna and charm come out of the same blocks, from the gamma kernel's d1/pdf terms
+            byExpiry = expiry_profile(prepared, levels, move=move, second_order=second_order)
+            totalGamma = byExpiry.total()
+            totalGammaExNext = byExpiry.excluding(nextExpiry)
+            totalGammaExFri = byExpiry.excluding(nextMonthlyExp)
+
+        # Find Gamma Flip Points: bracket sign changes on the profile grid, then refine each one
+        with RECORDER.stage(index, 'flips') as stage:
+            gammaFlips = gamma_flip_points(prepared, levels, totalGamma, move=move)
+            stage.rows = len(gammaFlips)
+
+        totalGamma = totalGamma / 10**9
+        totalGammaExNext = totalGammaExNext / 10**9
+        totalGammaExFri = totalGammaExFri / 10**9
+
+        zeroGamma = gammaFlips[0] if len(gammaFlips) > 0 else 0
+
+        # ---=== VANNA / CHARM ===---
+        secondOrder = {}
+        if second_order:
+            with RECORDER.stage(index, 'second_order', len(chain)):
+                _, spotVanna, spotCharm = prepared.second_order_terms([spotPrice])
+                _, bySide = chain.strike_sums(Vanna=spotVanna[0] / 10**9, Charm=spotCharm[0] / 10**9)
+                secondOrder = {
+                    'total_vanna': float(bySide['Vanna'].sum()),
+                    'total_charm': float(bySide['Charm'].sum()),
+                    'strike_vanna': bySide['Vanna'],
+                    'strike_charm': bySide['Charm'],
+                    'profile_vanna': byExpiry.greek('vanna').total() / 10**9,
+                    'profile_charm': byExpiry.greek('charm').total() / 10**9,
+                }
+
+        # ---=== SURFACES ===---
+        # Spot levels x forward dates / IV shifts, one blocked exposure pass per row
+        surfaceResults = {}
+        if surfaces:
+            with RECORDER.stage(index, 'surfaces') as stage:
+                if 'time' in surfaces:
+                    surfaceResults['time'] = time_surface(chain, levels, surface_dates(todayDate, surface_days),
+                                                          move=move).scaled(1 / 10**9)
+                if 'vol' in surfaces:
+                    surfaceResults['vol'] = vol_surface(chain, levels, vol_shifts, move=move).scaled(1 / 10**9)
+                stage.rows = sum(len(x.axis) for x in surfaceResults.values()) * len(levels)
+
+        log(f"✓ Computed {len(strikes)} strikes, {len(levels)} profile levels")
+
+        result = {
+            'ticker': index,
+            'date': todayDate,
+            'timestamp': ingested.timestamp,
+            'spot_price': spotPrice,
+            'from_strike': fromStrike,
+            'to_strike': toStrike,
+            'total_gamma': totalGammaSum,
+            'gamma_flip': zeroGamma if zeroGamma != 0 else None,
+            'gamma_flips': gammaFlips.tolist(),
+            'strikes': strikes,
+            'strike_total_gamma': agg['TotalGamma'],
+            'strike_call_oi': agg['CallOpenInt'],
+            'strike_put_oi': agg['PutOpenInt'],
+            'strike_call_gex': agg['CallGEX'],
+            'strike_put_gex': agg['PutGEX'],
+            'levels': levels,
+            'profile_total': totalGamma,
+            'profile_ex_next': totalGammaExNext,
+            'profile_ex_fri': totalGammaExFri,
+            'expiries': byExpiry.expiries,
+            'expiry_profile': byExpiry.matrix / 10**9,
+            'expiry_gamma': byExpiryDate['TotalGamma'],
+            'surfaces': surfaceResults,
+            **secondOrder,
+            'cache_key': cacheKey,
+        }
+        if cache is not None:
+            cache.put(cacheKey, result)
+        return result
+
+    except Exception as e:
+        log(f"❌ Error processing {index}: {str(e)}")
+        return None
+
+
+# ---=== EXPORT ===---
+# table -> (column name, result key) for the per-ticker array tables
+TABLES = {
+    'profile': (('level', 'levels'), ('total_gamma', 'profile_total'), ('total_gamma_ex_next', 'profile_ex_next'),
+                ('total_gamma_ex_fri', 'profile_ex_fri')),
+    'strikes': (('strike', 'strikes'), ('total_gamma', 'strike_total_gamma'), ('call_oi', 'strike_call_oi'),
+                ('put_oi', 'strike_put_oi'), ('call_gex', 'strike_call_gex'), ('put_gex', 'strike_put_gex')),
+    # compute_ticker(second_order=True) only
+    'greeks': (('level', 'levels'), ('total_gamma', 'profile_total'), ('total_vanna', 'profile_vanna'),
+               ('total_charm', 'profile_charm')),
+    'strike_greeks': (('strike', 'strikes'), ('total_gamma', 'strike_total_gamma'), ('vanna', 'strike_vanna'),
+                      ('charm', 'strike_charm')),
+}
+# Tables that need the vanna / charm keys
+SECOND_ORDER_TABLES = ('greeks', 'strike_greeks')
+# Expiries x levels breakdown (expiry_profile), exported long-form in CSV
+EXPIRY_FIELDS = ('expiry', 'level', 'total_gamma')
+TABLE_NAMES = ('summary',) + tuple(TABLES) + ('expiries',)
+SUMMARY_FIELDS = ('ticker', 'date', 'spot_price', 'total_gamma', 'gamma_flip', 'gamma_flips')
+
+
+def summary_record(result, move: float) -> Dict:
+    """JSON-safe scalar fields of a compute_ticker result"""
+    record = {k: result[k] for k in SUMMARY_FIELDS}
+    record['date'] = result['date'].isoformat()
+    record['spot_price'] = float(result['spot_price'])
+    record['total_gamma'] = float(result['total_gamma'])
+    record['move'] = move
+    for k in ('total_vanna', 'total_charm'):
+        if k in result:
+            record[k] = result[k]
+    return record
+
+
+def table_rows(result, table: str) -> List[Dict]:
+    """One dict per level (profile), strike (strikes) or expiry x level (expiries), ticker first"""
+    if table == 'expiries':
+        levels = np.asarray(result['levels'], dtype=float).tolist()
+        return [{'ticker': result['ticker'], 'expiry': str(expiry), 'level': level, 'total_gamma': value}
+                for expiry, row in zip(result['expiries'], np.asarray(result['expiry_profile']).tolist())
+                for level, value in zip(levels, row)]
+    columns = TABLES[table]
+    arrays = [np.asarray(result[key], dtype=float).tolist() for _, key in columns]
+    return [dict(ticker=result['ticker'], **{name: v for (name, _), v in zip(columns, values)})
+            for values in zip(*arrays)]
+
+
+def write_json(results, f, table: str = 'summary', move: float = 0.001):
+    out = []
+    for r in results:
+        record = summary_record(r, move)
+        if table == 'expiries':
+            record[table] = {'expiry': [str(e) for e in r['expiries']], 'level': np.asarray(r['levels']).tolist(),
+                             'total_gamma': np.asarray(r['expiry_profile']).tolist()}      # [expiry][level]
+        elif table != 'summary':
+            record[table] = {name: np.asarray(r[key], dtype=float).tolist() for name, key in TABLES[table]}
+        out.append(record)
+    json.dump(out, f, indent=2)
+    f.write("\n")
+
+
+def write_csv(results, f, table: str = 'summary', move: float = 0.001):
+    if table == 'summary':
+        fields = SUMMARY_FIELDS + ('move',)
+        if results and 'total_vanna' in results[0]:
+            fields += ('total_vanna', 'total_charm')
+        rows = []
+        for r in results:
+            row = summary_record(r, move)
+            row['gamma_flips'] = ';'.join(f"{x:.4f}" for x in row['gamma_flips'])
+            rows.append(row)
+    else:
+        fields = ('ticker',) + (EXPIRY_FIELDS if table == 'expiries' else tuple(name for name, _ in TABLES[table]))
+        rows = [row for r in results for row in table_rows(r, table)]
+    writer = csv.DictWriter(f, fieldnames=fields, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def save_surface(surface: GexSurface, path: str):
+    """Array export of a surface ($Bn): kind, axis, levels and the (axis x levels) values"""
+    np.savez(path, kind=surface.kind, axis=surface.axis, levels=surface.levels, values=surface.values)
+
+
+def import_report() -> str:
+    loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+    return (f"imports {IMPORT_SECONDS * 1000:.0f}ms, heavy modules loaded: "
+            f"{', '.join(loaded) if loaded else 'none'}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compute gamma exposure numbers and profiles without charts")
+    parser.add_argument('tickers', nargs='+', help="index tickers, e.g. SPX NDX")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json')
+    parser.add_argument('--table', choices=TABLE_NAMES, default='summary',
+                        help="summary scalars, or the per-level profile / per-strike / per-expiry arrays as well")
+    parser.add_argument('--move', type=float, default=0.001, help="spot move the exposure is quoted per")
+    parser.add_argument('--second-order', action='store_true',
+                        help="add vanna ($Bn per vol point) and charm ($Bn per day); implied by the greeks tables")
+    parser.add_argument('--output', default=None, help="write here instead of stdout")
+    parser.add_argument('--quiet', action='store_true', help="no progress lines on stderr")
+    parser.add_argument('--import-times', action='store_true',
+                        help="report module import time and whether plotting/pandas were loaded (stderr)")
+    args = parser.parse_args(argv)
+
+    # stdout carries the data, so progress goes to stderr
+    log = (lambda msg: None) if args.quiet else (lambda msg: print(msg, file=sys.stderr))
+
+    secondOrder = args.second_order or args.table in SECOND_ORDER_TABLES
+
+    fetched = fetch_chains(args.tickers, timeout=10, cache=SnapshotCache(), ingest=True)
+    results = [r for r in (compute_ticker(t, fetched[t], move=args.move, log=log, second_order=secondOrder)
+                           for t in args.tickers) if r]
+
+    write = write_json if args.format == 'json' else write_csv
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            write(results, f, args.table, args.move)
+        log(f"✓ Results saved to {args.output}")
+    else:
+        write(results, sys.stdout, args.table, args.move)
+
+    if args.import_times:
+        print(import_report(), file=sys.stderr)
+    return 0 if len(results) == len(args.tickers) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
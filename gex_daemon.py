@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Warm gamma exposure daemon and its thin client
+Usage: python gex_daemon.py serve [--socket PATH] [--ttl 300] [--output-dir charts]
+       python gex_daemon.py SPX [NDX ...] [--table summary|profile|strikes|expiries|greeks|strike_greeks] [--format json|csv]
+                            [--move 0.001] [--render] [--spawn] [--socket PATH]
+       python gex_daemon.py stats | stop
+
+The server keeps numpy, the fetch session, the snapshot cache and the last
+result per (ticker, move) in memory and answers over a Unix domain socket.
+Within the cache TTL a request is a dictionary lookup; after it the chain is
+revalidated and only recomputed when CBOE serves a new snapshot (not 304).
+The client side imports only the standard library.
+
+Protocol: one JSON object per line each way.
+    {"op": "compute", "ticker": "SPX", "move": 0.001, "table": "summary", "format": "json"}
+    {"op": "render", "ticker": "SPX", "move": 0.001, "chart": "analysis" | "expiries"}
+    {"op": "stats"} | {"op": "ping"} | {"op": "shutdown"}
+Replies are {"ok": true, ...} or {"ok": false, "error": "..."}; compute replies
+carry the gex_compute output text, render replies the PNG path.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_TIMEOUT = 60.0
+
+
+def default_socket_path() -> str:
+    """GEX_SOCKET, else gex.sock in XDG_RUNTIME_DIR, else /tmp/gex-<uid>.sock"""
+    if os.environ.get("GEX_SOCKET"):
+        return os.environ["GEX_SOCKET"]
+    runtimeDir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtimeDir and os.path.isdir(runtimeDir):
+        return os.path.join(runtimeDir, "gex.sock")
+    return f"/tmp/gex-{os.getuid()}.sock"
+
+
+# ---=== CLIENT ===---
+def request(message: Dict, socket_path: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """Send one request and return the decoded reply; raises OSError when no daemon is listening"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("daemon closed the connection without replying")
+    return json.loads(line)
+
+
+def is_running(socket_path: Optional[str] = None) -> bool:
+    try:
+        return request({'op': 'ping'}, socket_path, timeout=2.0).get('ok', False)
+    except OSError:
+        return False
+
+
+def spawn(socket_path: Optional[str] = None, wait: float = 30.0, extra_args: List[str] = ()) -> bool:
+    """Start a detached daemon and wait until it answers; True if one is (now) running"""
+    socketPath = socket_path or default_socket_path()
+    if is_running(socketPath):
+        return True
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve', '--socket', socketPath, *extra_args],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if is_running(socketPath):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+# ---=== SERVER ===---
+class _Entry:
+    __slots__ = ('result', 'snapshot', 'filenames')
+
+    def __init__(self, result, snapshot):
+        self.result = result
+        self.snapshot = snapshot        # SnapshotCache.snapshot_id the result was computed from
+        self.filenames = {}             # chart -> PNG path
+
+
+class GexDaemon:
+    """
+    Holds the warm state and answers requests; serve() runs it on a socket
+
+    Per ticker a lock serialises fetch + compute, so concurrent clients asking
+    for the same chain share one download. Rendering is serialised as well
+    (matplotlib is not thread-safe).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: Optional[float] = None, output_dir: str = "charts",
+                 timeout: float = 10):
+        # Heavy imports happen once, here, in the daemon process only
+        from cboe_fetch import fetch_chain, make_session
+        from snapshot_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL, SnapshotCache
+        import gex_compute
+
+        self._fetch_chain = fetch_chain
+        self._compute = gex_compute
+        self.cache = SnapshotCache(cache_dir or DEFAULT_CACHE_DIR, DEFAULT_TTL if ttl is None else ttl)
+        self.session = make_session()
+        self.output_dir = output_dir
+        self.timeout = timeout
+        self.entries: Dict[tuple, _Entry] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locksGuard = threading.Lock()
+        self._renderLock = threading.Lock()
+        self._rendered: Dict[str, _Entry] = {}     # PNG path -> entry last drawn there (one file per ticker)
+        self.started = time.time()
+        self.stats = {'requests': 0, 'memory': 0, 'revalidated': 0, 'computed': 0, 'rendered': 0, 'errors': 0}
+
+    def _lock(self, ticker) -> threading.Lock:
+        with self._locksGuard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _count(self, key):
+        with self._locksGuard:
+            self.stats[key] += 1
+
+    def entry(self, ticker: str, move: float) -> _Entry:
+        """Current result for (ticker, move), recomputed only when the snapshot changed"""
+        key = (ticker, move)
+        with self._lock(ticker):
+            entry = self.entries.get(key)
+            # Another move of the same ticker may have pulled a newer snapshot in the meantime
+            current = entry is not None and entry.snapshot == self.cache.snapshot_id(ticker)
+            if current and self.cache.is_fresh(ticker):
+                self._count('memory')
+                return entry
+
+            fetched = self._fetch_chain(ticker, session=self.session, timeout=self.timeout, cache=self.cache,
+                                        ingest=True, reload_unchanged=not current)
+            if current and fetched.status_code == 304:
+                self._count('revalidated')
+                return entry
+            if not fetched.ok:
+                raise RuntimeError(f"fetch failed for {ticker}: {fetched.error or 'HTTP ' + str(fetched.status_code)}")
+
+            # Vanna / charm ride along with the gamma pass, so every table is served from one warm result
+            result = self._compute.compute_ticker(ticker, fetched, move=move, log=lambda msg: None, second_order=True)
+            if result is None:
+                raise RuntimeError(f"could not compute {ticker}")
+            self._count('computed')
+            entry = _Entry(result, self.cache.snapshot_id(ticker))
+            self.entries[key] = entry
+            return entry
+
+    def handle(self, message: Dict) -> Dict:
+        self._count('requests')
+        op = message.get('op', 'compute')
+        if op == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        if op == 'stats':
+            with self._locksGuard:
+                stats = dict(self.stats)
+            return {'ok': True, 'stats': stats, 'uptime': time.time() - self.started,
+                    'tickers': sorted({f"{t}@{m:g}" for t, m in self.entries})}
+
+        ticker = str(message['ticker']).upper()
+        move = float(message.get('move', 0.001))
+        start = time.perf_counter()
+        entry = self.entry(ticker, move)
+
+        if op == 'compute':
+            import io
+            table = message.get('table', 'summary')
+            if table not in self._compute.TABLE_NAMES:
+                raise ValueError(f"unknown table {table!r}")
+            write = self._compute.write_csv if message.get('format') == 'csv' else self._compute.write_json
+            out = io.StringIO()
+            write([entry.result], out, table, move)
+            return {'ok': True, 'output': out.getvalue(), 'elapsed': time.perf_counter() - start}
+
+        if op == 'render':
+            chart = message.get('chart', 'analysis')
+            with self._renderLock:
+                filename = entry.filenames.get(chart)
+                if filename is None or self._rendered.get(filename) is not entry:
+                    import matplotlib
+                    matplotlib.use('Agg')
+                    from chart_render import RENDERERS
+                    if chart not in RENDERERS:
+                        raise ValueError(f"unknown chart {chart!r}")
+                    filename = os.path.abspath(RENDERERS[chart](entry.result, self.output_dir))
+                    entry.filenames[chart] = filename
+                    self._rendered[filename] = entry
+                    self._count('rendered')
+            return {'ok': True, 'filename': filename, 'elapsed': time.perf_counter() - start}
+
+        raise ValueError(f"unknown op {op!r}")
+
+    def serve(self, socket_path: Optional[str] = None):
+        """Listen on socket_path until a shutdown request or Ctrl+C"""
+        import socketserver
+
+        socketPath = socket_path or default_socket_path()
+        if os.path.exists(socketPath):
+            if is_running(socketPath):
+                raise RuntimeError(f"a daemon is already listening on {socketPath}")
+            os.unlink(socketPath)               # stale socket from a daemon that died
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        message = json.loads(line)
+                        if message.get('op') == 'shutdown':
+                            self.wfile.write(b'{"ok": true}\n')
+                            threading.Thread(target=self.server.shutdown, daemon=True).start()
+                            return
+                        reply = daemon.handle(message)
+                    except Exception as e:
+                        daemon._count('errors')
+                        reply = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                    self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        oldMask = os.umask(0o077)                      # socket readable by this user only
+        try:
+            server = Server(socketPath, Handler)
+        finally:
+            os.umask(oldMask)
+        print(f"✓ GEX daemon listening on {socketPath} (pid {os.getpid()})", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(socketPath):
+                os.unlink(socketPath)
+
+
+# ---=== CLI ===---
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['serve']:
+        parser = argparse.ArgumentParser(prog='gex_daemon.py serve', description="Run the warm GEX daemon")
+        parser.add_argument('--socket', default=None)
+        parser.add_argument('--ttl', type=float, default=None, help="seconds a snapshot is served without revalidating")
+        parser.add_argument('--cache-dir', default=None)
+        parser.add_argument('--output-dir', default="charts", help="where render requests save PNGs")
+        args = parser.parse_args(argv[1:])
+        GexDaemon(args.cache_dir, args.ttl, args.output_dir).serve(args.socket)
+        return 0
+
+    parser = argparse.ArgumentParser(description="Ask the warm GEX daemon for tickers (or stats / stop)")
+    parser.add_argument('tickers', nargs='+', help="index tickers, or 'stats' / 'stop'")
+    parser.add_argument('--table', default='summary',
+                        choices=('summary', 'profile', 'strikes', 'expiries', 'greeks', 'strike_greeks'))
+    parser.add_argument('--format', default='json', choices=('json', 'csv'))
+    parser.add_argument('--move', type=float, default=0.001)
+    parser.add_argument('--render', action='store_true', help="reply with the rendered PNG path instead")
+    parser.add_argument('--chart', default='analysis', choices=('analysis', 'expiries'), help="figure for --render")
+    parser.add_argument('--spawn', action='store_true', help="start the daemon first if it is not running")
+    parser.add_argument('--socket', default=None)
+    parser.add_argument('--timing', action='store_true', help="print round-trip times to stderr")
+    args = parser.parse_args(argv)
+
+    if args.spawn and not spawn(args.socket):
+        print("❌ Daemon did not start", file=sys.stderr)
+        return 1
+
+    try:
+        if args.tickers in (['stats'], ['stop']):
+            reply = request({'op': 'stats' if args.tickers == ['stats'] else 'shutdown'}, args.socket)
+            print(json.dumps(reply, indent=2) if args.tickers == ['stats'] else "✓ Daemon stopped")
+            return 0
+
+        status = 0
+        for ticker in args.tickers:
+            start = time.perf_counter()
+            message = {'op': 'render' if args.render else 'compute', 'ticker': ticker, 'move': args.move,
+                       'table': args.table, 'format': args.format, 'chart': args.chart}
+            reply = request(message, args.socket)
+            if not reply.get('ok'):
+                print(f"❌ {ticker}: {reply.get('error')}", file=sys.stderr)
+                status = 1
+                continue
+            sys.stdout.write(reply['filename'] + "\n" if args.render else reply['output'])
+            if args.timing:
+                print(f"{ticker}: {(time.perf_counter() - start) * 1000:.1f}ms round trip, "
+                      f"{reply['elapsed'] * 1000:.1f}ms in daemon", file=sys.stderr)
+        return status
+    except OSError as e:
+        print(f"❌ No daemon on {args.socket or default_socket_path()} ({e}); "
+              f"start one with: python gex_daemon.py serve  (or pass --spawn)", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
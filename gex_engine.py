@@ -0,0 +1,595 @@
+"""
+Batched gamma exposure engine
+Evaluates Black-Scholes gamma exposure for every spot level x every contract
+in NumPy blocks instead of one df.apply pass per level
+"""
+
+import numpy as np
+from typing import NamedTuple, Tuple
+
+# Default cap on (levels x contracts) elements evaluated per block.
+# 2M float64 values is ~16MB per temporary.
+DEFAULT_CHUNK_SIZE = 2_000_000
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+# Vanna exposure is quoted per 1 vol point (0.01) of IV
+VANNA_BUMP = 0.01
+SECOND_ORDER = ('gamma', 'vanna', 'charm')
+
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+# Black-Scholes European-Options Gamma (scalar reference implementation)
+def calcGammaEx(S, K, vol, T, r, q, optType, OI, move=0.01):
+    if T == 0 or vol == 0:
+        return 0
+
+    dp = (np.log(S/K) + (r - q + 0.5*vol**2)*T) / (vol*np.sqrt(T))
+    dm = dp - vol*np.sqrt(T)
+
+    if optType == 'call':
+        gamma = np.exp(-q*T) * _norm_pdf(dp) / (S * vol * np.sqrt(T))
+        return OI * 100 * S * S * move * gamma
+    else: # Gamma is same for calls and puts. This is just to cross-check
+        gamma = K * np.exp(-r*T) * _norm_pdf(dm) / (S * S * vol * np.sqrt(T))
+        return OI * 100 * S * S * move * gamma
+
+
+def isThirdFriday(d):
+    return d.weekday() == 4 and 15 <= d.day <= 21
+
+
+def _blocks(nLevels, nRows, chunk_size):
+    """Yield (level slice, row slice) pairs covering the grid within chunk_size elements"""
+    chunk_size = max(1, int(chunk_size))
+    levelStep = min(nLevels, chunk_size)
+    rowStep = max(1, chunk_size // levelStep)
+    for i in range(0, nLevels, levelStep):
+        for j in range(0, nRows, rowStep):
+            yield slice(i, i + levelStep), slice(j, j + rowStep)
+
+
+class PreparedChain:
+    """
+    Spot-independent per-contract terms of one chain snapshot
+
+    log(S/K) = log(S) - log(K), so with a = 1/(vol*sqrt(T)) and everything
+    else folded into per-contract constants, the exposure at spot S is
+
+        call: wCall * S * pdf(a * log(S) + cCall)
+        put:  wPut * pdf(a * log(S) + cPut)
+
+    a, c and w (OI * 100 * move * discount / (vol*sqrt(T))) are computed once
+    here. Evaluating new levels, refining flip points or refreshing after a
+    spot-only intraday move then costs one multiply-add and one exp per
+    contract and level. Contracts calcGammaEx would skip (T or vol zero, NaN
+    inputs) or that have already expired (T < 0) get w = 0.
+
+    With second_order=True the per-contract weights for vanna and charm
+    exposure are kept as well (see SECOND_ORDER); they are evaluated from the
+    same d+/d- and pdf terms as gamma by second_order_terms.
+    """
+
+    __slots__ = ('expiry', 'a', 'cCall', 'cPut', 'wCall', 'wPut', 'move', 'q', 'second')
+
+    def __init__(self, strikes, callIV, putIV, daysTillExp, callOI, putOI,
+                 r=0.0, q=0.0, move=0.01, expiry=None, second_order=False):
+        K = np.asarray(strikes, dtype=float)
+        T = np.asarray(daysTillExp, dtype=float)
+        self.expiry = None if expiry is None else np.asarray(expiry, dtype='datetime64[D]')
+        self.move = move
+
+        sqrtT = np.sqrt(np.where(T > 0, T, 1.0))
+        logK = np.log(np.where(K > 0, K, 1.0))
+
+        self.q = q
+
+        def side(vol, OI):
+            vol = np.asarray(vol, dtype=float)
+            OI = np.asarray(OI, dtype=float)
+            valid = (T > 0) & (vol != 0) & np.isfinite(vol) & np.isfinite(T) & np.isfinite(OI) & np.isfinite(K)
+            safeVol = np.where(valid, vol, 1.0)
+            volSqrtT = safeVol * sqrtT
+            a = np.where(valid, 1.0 / volSqrtT, 0.0)
+            c = np.where(valid, (-logK + (r - q + 0.5 * safeVol**2) * T) * a, 0.0)
+            return valid, safeVol, volSqrtT, a, c, np.where(valid, OI, 0.0) * 100
+
+        callValid, callVol, callVolSqrtT, aCall, self.cCall, callContracts = side(callIV, callOI)
+        putValid, putVol, putVolSqrtT, aPut, cPut, putContracts = side(putIV, putOI)
+
+        # Calls and puts carry their own IV, so each side keeps its own slope
+        self.a = np.stack([aCall, aPut])
+        callDiscount = np.exp(-q * np.where(callValid, T, 0.0))          # e^(-qT)
+        putStrikePV = np.where(putValid, K * np.exp(-r * T), 0.0)       # K e^(-rT)
+        self.wCall = callContracts * move * aCall * callDiscount
+        self.cPut = np.where(putValid, cPut - putVolSqrtT, 0.0)     # dm = dp - vol*sqrt(T)
+        self.wPut = putContracts * move * aPut * putStrikePV
+
+        self.second = None
+        if second_order:
+            safeT = np.where(T > 0, T, 1.0)
+            # Put terms are written in d- and phi(d-): S e^(-qT) phi(d+) = K e^(-rT) phi(d-)
+            self.second = {
+                'sCall': np.where(callValid, callVolSqrtT, 0.0),
+                'sPut': np.where(putValid, putVolSqrtT, 0.0),
+                'vCall': callContracts * VANNA_BUMP * callDiscount / callVol,
+                'vPut': putContracts * VANNA_BUMP * putStrikePV / putVol,
+                'chCall': callContracts * callDiscount / 365,
+                'chPut': putContracts * putStrikePV / 365,
+                'driftCall': np.where(callValid, (r - q) / callVolSqrtT, 0.0),
+                'driftPut': np.where(putValid, (r - q) / putVolSqrtT, 0.0),
+                'halfInvT': 0.5 / safeT,
+                'qCall': callContracts * q * callDiscount / 365,
+                'qPut': putContracts * q * np.where(putValid, np.exp(-q * T), 0.0) / 365,
+            }
+
+    @classmethod
+    def from_chain(cls, chain, r=0.0, q=0.0, move=0.01, second_order=False) -> 'PreparedChain':
+        """Prepare an option_chain.OptionChain"""
+        return cls(chain.strike, chain.call_iv, chain.put_iv, chain.days_till_exp,
+                   chain.call_oi, chain.put_oi, r, q, move, chain.expiry, second_order)
+
+    def __len__(self):
+        return len(self.wCall)
+
+    def take(self, rows) -> 'PreparedChain':
+        """Prepared terms of the given rows only"""
+        out = PreparedChain.__new__(PreparedChain)
+        out.expiry = None if self.expiry is None else self.expiry[rows]
+        out.a = self.a[:, rows]
+        out.cCall, out.cPut = self.cCall[rows], self.cPut[rows]
+        out.wCall, out.wPut = self.wCall[rows], self.wPut[rows]
+        out.move, out.q = self.move, self.q
+        out.second = None if self.second is None else {k: v[rows] for k, v in self.second.items()}
+        return out
+
+    def second_order_terms(self, levels, rows=slice(None)):
+        """
+        Net (call - put) gamma, vanna and charm exposure of a block of levels x contracts
+
+        x = a*log(S) + c is d+ for calls and d- for puts, and pdf(x) is
+        evaluated once per side for all three greeks. Vanna is in dollars of
+        delta per vol point (VANNA_BUMP), charm in dollars of delta per calendar
+        day. Needs second_order=True.
+        """
+        if self.second is None:
+            raise ValueError("PreparedChain was built without second_order=True")
+        t = {k: v[rows] for k, v in self.second.items()}
+        S = np.asarray(levels, dtype=float)[:, None]
+        logS = np.log(S)
+
+        xCall = logS * self.a[0, rows] + self.cCall[rows]               # d+
+        pdfCall = _norm_pdf(xCall)
+        d2Call = xCall - t['sCall']
+        SpdfCall = S * pdfCall
+        gamma = self.wCall[rows] * SpdfCall
+        vanna = -t['vCall'] * SpdfCall * d2Call
+        charm = -t['chCall'] * SpdfCall * (t['driftCall'] - d2Call * t['halfInvT'])
+
+        xPut = logS * self.a[1, rows] + self.cPut[rows]                 # d-
+        pdfPut = _norm_pdf(xPut)
+        gamma -= self.wPut[rows] * pdfPut
+        vanna -= -t['vPut'] * pdfPut * xPut
+        charm -= -t['chPut'] * pdfPut * (t['driftPut'] - xPut * t['halfInvT'])
+
+        if self.q != 0:
+            # Only dividend yield brings N() into charm; scipy is imported for that case alone
+            from scipy.special import ndtr
+            charm += S * (t['qCall'] * ndtr(xCall) + t['qPut'] * ndtr(-(xPut + t['sPut'])))
+
+        return gamma, vanna, charm
+
+    def exposure(self, levels, groupWeights=None, chunk_size=DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Net (call - put) gamma exposure at each level, reduced by contract weights
+
+        groupWeights is a (contracts, k) matrix; column j selects which contracts
+        count towards curve j. Defaults to a single all-contracts column.
+        Returns a (len(levels), k) array.
+        """
+        levels = np.asarray(levels, dtype=float)
+        if groupWeights is None:
+            groupWeights = np.ones((len(self), 1))
+        groupWeights = np.asarray(groupWeights, dtype=float)
+        if groupWeights.ndim == 1:
+            groupWeights = groupWeights[:, None]
+
+        logS = np.log(levels)
+        out = np.zeros((len(levels), groupWeights.shape[1]))
+        for lv, rows in _blocks(len(levels), len(self), chunk_size):
+            x = logS[lv, None]
+            callEx = _norm_pdf(x * self.a[0, rows] + self.cCall[rows]) @ (self.wCall[rows, None] * groupWeights[rows])
+            putEx = _norm_pdf(x * self.a[1, rows] + self.cPut[rows]) @ (self.wPut[rows, None] * groupWeights[rows])
+            out[lv] += levels[lv, None] * callEx - putEx
+
+        return out
+
+    def net_gamma(self, spots, chunk_size=DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """All-expiries net gamma exposure at each spot"""
+        return self.exposure(np.atleast_1d(spots), chunk_size=chunk_size)[:, 0]
+
+
+def prepare(chain, r=0.0, q=0.0, move=0.01, second_order=False) -> PreparedChain:
+    """PreparedChain for chain, or chain itself if it is already prepared"""
+    if isinstance(chain, PreparedChain):
+        if chain.move != move:
+            raise ValueError(f"Chain was prepared for move={chain.move}, not {move}")
+        if second_order and chain.second is None:
+            raise ValueError("Chain was prepared without second_order=True")
+        return chain
+    return PreparedChain.from_chain(chain, r, q, move, second_order)
+
+
+def profile_weights(expiry, nextExpiry, nextMonthlyExp) -> np.ndarray:
+    """(contracts, 3) weights for the all-expiries, ex-next and ex-next-monthly curves"""
+    expiry = np.asarray(expiry, dtype='datetime64[D]')
+    return np.column_stack([
+        np.ones(len(expiry)),
+        expiry != np.datetime64(nextExpiry, 'D'),
+        expiry != np.datetime64(nextMonthlyExp, 'D'),
+    ])
+
+
+def gamma_profile(chain, levels, nextExpiry, nextMonthlyExp, move=0.01, chunk_size=DEFAULT_CHUNK_SIZE
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Batched replacement for the per-level df.apply(calcGammaEx) loop
+
+    chain is an option_chain.OptionChain or a PreparedChain of one. Returns
+    (totalGamma, totalGammaExNext, totalGammaExFri) in dollars, the same three
+    curves the scripts build before dividing by 10**9.
+    """
+    prepared = prepare(chain, move=move)
+    out = prepared.exposure(levels, profile_weights(prepared.expiry, nextExpiry, nextMonthlyExp), chunk_size)
+
+    return out[:, 0], out[:, 1], out[:, 2]
+
+
+class ExpiryProfile:
+    """
+    Net gamma exposure per expiry x level, from one pass over the chain
+
+    matrix[i, j] is the exposure of every contract expiring on expiries[i]
+    at spot levels[j]. Any expiry-filtered curve is then a sum or a
+    subtraction of rows instead of a re-evaluation of the chain:
+
+        ep.total()                          all expiries
+        ep.excluding(nextExpiry)            total minus one row
+        ep.only(today)                      0DTE
+        ep.next_n(4, weeklies_only=True)    the next four weeklies
+
+    vanna and charm hold the matching matrices when built with
+    second_order=True; ep.greek('charm').excluding(...) works the same way.
+    """
+
+    __slots__ = ('expiries', 'levels', 'matrix', 'vanna', 'charm')
+
+    def __init__(self, expiries, levels, matrix, vanna=None, charm=None):
+        self.expiries = np.asarray(expiries, dtype='datetime64[D]')
+        self.levels = np.asarray(levels, dtype=float)
+        self.matrix = np.asarray(matrix, dtype=float)
+        self.vanna = vanna
+        self.charm = charm
+
+    def __len__(self):
+        return len(self.expiries)
+
+    def _rows(self, expiries) -> np.ndarray:
+        return np.isin(self.expiries, np.asarray(expiries, dtype='datetime64[D]').ravel())
+
+    def curve(self, mask) -> np.ndarray:
+        """Sum of the rows selected by a boolean mask over expiries"""
+        return self.matrix[np.asarray(mask, dtype=bool)].sum(axis=0)
+
+    def total(self) -> np.ndarray:
+        return self.matrix.sum(axis=0)
+
+    def only(self, *expiries) -> np.ndarray:
+        return self.curve(self._rows(expiries))
+
+    def excluding(self, *expiries) -> np.ndarray:
+        return self.total() - self.only(*expiries)
+
+    def next_n(self, n, after=None, weeklies_only=False) -> np.ndarray:
+        """The n nearest expiries on or after after (default: the first listed), optionally weeklies only"""
+        mask = np.ones(len(self), dtype=bool)
+        if after is not None:
+            mask &= self.expiries >= np.datetime64(after, 'D')
+        if weeklies_only:
+            from option_chain import third_friday_mask
+            mask &= ~third_friday_mask(self.expiries)
+        keep = np.zeros(len(self), dtype=bool)
+        keep[np.flatnonzero(mask)[:n]] = True                  # expiries are sorted
+        return self.curve(keep)
+
+    def at(self, spot) -> np.ndarray:
+        """Each expiry's exposure at spot, interpolated on the level grid"""
+        return np.array([np.interp(spot, self.levels, row) for row in self.matrix])
+
+    def greek(self, name) -> 'ExpiryProfile':
+        """The same view over the 'gamma', 'vanna' or 'charm' matrix"""
+        matrix = self.matrix if name == 'gamma' else getattr(self, name)
+        if matrix is None:
+            raise ValueError(f"{name} was not computed; use expiry_profile(..., second_order=True)")
+        return ExpiryProfile(self.expiries, self.levels, matrix)
+
+    def scaled(self, factor) -> 'ExpiryProfile':
+        return ExpiryProfile(self.expiries, self.levels, self.matrix * factor,
+                             None if self.vanna is None else self.vanna * factor,
+                             None if self.charm is None else self.charm * factor)
+
+
+def expiry_profile(chain, levels, move=0.01, chunk_size=DEFAULT_CHUNK_SIZE, second_order=False) -> ExpiryProfile:
+    """
+    Expiries x levels net gamma exposure in dollars, reduced by expiry in one pass
+
+    chain is an option_chain.OptionChain or a PreparedChain built with an
+    expiry column. Contracts are sorted by expiry once, so each block of
+    levels x contracts collapses to levels x expiries with one np.add.reduceat.
+    second_order=True adds vanna and charm matrices from the same blocks.
+    """
+    prepared = prepare(chain, move=move, second_order=second_order)
+    if prepared.expiry is None:
+        raise ValueError("expiry_profile needs a chain prepared with its expiry column")
+    levels = np.asarray(levels, dtype=float)
+
+    expiries, group = np.unique(prepared.expiry, return_inverse=True)
+    order = np.argsort(group, kind='stable')
+    group = group[order]
+    p = prepared.take(order)
+
+    logS = np.log(levels)
+    outs = [np.zeros((len(expiries), len(levels))) for _ in range(3 if second_order else 1)]
+    for lv, rows in _blocks(len(levels), len(p), chunk_size):
+        if second_order:
+            terms = p.second_order_terms(levels[lv], rows)
+        else:
+            x = logS[lv, None]
+            terms = (levels[lv, None] * p.wCall[rows] * _norm_pdf(x * p.a[0, rows] + p.cCall[rows])
+                     - p.wPut[rows] * _norm_pdf(x * p.a[1, rows] + p.cPut[rows]),)
+        g = group[rows]
+        starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+        for out, exposure in zip(outs, terms):
+            out[g[starts], lv] += np.add.reduceat(exposure, starts, axis=1).T
+
+    return ExpiryProfile(expiries, levels, *outs)
+
+
+class GexSurface(NamedTuple):
+    kind: str                   # 'time' (forward dates) or 'vol' (parallel IV shifts)
+    axis: np.ndarray            # datetime64[D] dates or IV shifts in vol points (0.05 = +5 vols)
+    levels: np.ndarray
+    values: np.ndarray          # (len(axis), len(levels)) net gamma exposure in dollars
+
+    def scaled(self, factor) -> 'GexSurface':
+        return self._replace(values=self.values * factor)
+
+
+def _scenario_exposure(chain, levels, rows, T, callIV, putIV, r, q, move, chunk_size):
+    prepared = PreparedChain(chain.strike[rows], callIV, putIV, T, chain.call_oi[rows], chain.put_oi[rows],
+                             r, q, move)
+    return prepared.exposure(levels, chunk_size=chunk_size)[:, 0]
+
+
+def time_surface(chain, levels, dates, r=0.0, q=0.0, move=0.01, chunk_size=DEFAULT_CHUNK_SIZE) -> GexSurface:
+    """
+    Net gamma profile at each forward date, IV held constant
+
+    Time to expiry is recomputed as of each date (days_till_expiry, so 0DTE
+    keeps its one-day floor) and contracts expiring before it drop out.
+    chain is an option_chain.OptionChain; every date is one blocked exposure pass.
+    """
+    from option_chain import days_till_expiry
+    levels = np.asarray(levels, dtype=float)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    values = np.zeros((len(dates), len(levels)))
+    for i, d in enumerate(dates):
+        alive = np.flatnonzero(chain.expiry >= d)
+        if len(alive):
+            T = days_till_expiry(chain.expiry[alive], d.item())
+            values[i] = _scenario_exposure(chain, levels, alive, T, chain.call_iv[alive], chain.put_iv[alive],
+                                           r, q, move, chunk_size)
+    return GexSurface('time', dates, levels, values)
+
+
+def vol_surface(chain, levels, shifts, r=0.0, q=0.0, move=0.01, chunk_size=DEFAULT_CHUNK_SIZE,
+                min_vol=0.01) -> GexSurface:
+    """
+    Net gamma profile under parallel IV shifts (added to call and put IV, floored at min_vol)
+    Zero IV stays zero so contracts calcGammaEx skips are still skipped.
+    """
+    levels = np.asarray(levels, dtype=float)
+    shifts = np.asarray(shifts, dtype=float)
+    rows = np.arange(len(chain))
+    values = np.zeros((len(shifts), len(levels)))
+
+    def shifted(iv, dv):
+        iv = np.asarray(iv, dtype=float)
+        return np.where(iv != 0, np.maximum(iv + dv, min_vol), 0.0)
+
+    for i, dv in enumerate(shifts):
+        values[i] = _scenario_exposure(chain, levels, rows, chain.days_till_exp, shifted(chain.call_iv, dv),
+                                       shifted(chain.put_iv, dv), r, q, move, chunk_size)
+    return GexSurface('vol', shifts, levels, values)
+
+
+def refine_brackets(f, a, b, fa, fb, xtol=0.01, max_iter=50) -> np.ndarray:
+    """
+    Roots of a vectorised f inside brackets [a[i], b[i]] with f(a) and f(b) of opposite sign
+
+    All brackets are refined together: each iteration calls f once with a
+    false-position pair c +/- xtol/4 and the midpoint of every bracket, so the
+    width at least halves per call and usually collapses to xtol once the
+    secant lands next to the root. Returns the roots in ascending order.
+    """
+    a, b = np.array(a, dtype=float), np.array(b, dtype=float)
+    fa, fb = np.array(fa, dtype=float), np.array(fb, dtype=float)
+    roots = []
+    delta = xtol / 4
+
+    for _ in range(max_iter):
+        active = (b - a) > xtol
+        if not active.any():
+            break
+        a_, b_, fa_, fb_ = a[active], b[active], fa[active], fb[active]
+
+        c = b_ - fb_ * (b_ - a_) / (fb_ - fa_)
+        c = np.clip(c, a_ + delta, b_ - delta)
+        probes = np.column_stack([c - delta, c + delta, 0.5 * (a_ + b_)])
+        probes = np.clip(probes, a_[:, None], b_[:, None])
+        fp = np.asarray(f(probes.ravel()), dtype=float).reshape(probes.shape)
+
+        pts = np.column_stack([a_, probes, b_])
+        vals = np.column_stack([fa_, fp, fb_])
+        order = np.argsort(pts, axis=1)
+        pts = np.take_along_axis(pts, order, axis=1)
+        vals = np.take_along_axis(vals, order, axis=1)
+
+        # Probes landing exactly on a root close their bracket immediately
+        hit = vals[:, 1:4] == 0
+        hitRow = hit.any(axis=1)
+        if hitRow.any():
+            roots.extend(pts[hitRow, 1:4][hit[hitRow]].tolist())
+
+        change = np.sign(vals[:, :-1]) * np.sign(vals[:, 1:]) < 0
+        j = np.argmax(change, axis=1)
+        rows = np.arange(len(j))
+        newA, newB = pts[rows, j], pts[rows, j + 1]
+        newFa, newFb = vals[rows, j], vals[rows, j + 1]
+        # Collapse brackets closed by an exact hit so they drop out
+        newB = np.where(hitRow, newA, newB)
+
+        a[active], b[active], fa[active], fb[active] = newA, newB, newFa, newFb
+
+    open_ = b > a
+    final = b[open_] - fb[open_] * (b[open_] - a[open_]) / (fb[open_] - fa[open_])
+    return np.sort(np.concatenate([np.asarray(roots, dtype=float), final]))
+
+
+def find_sign_changes(f, levels, values=None, xtol=0.01, max_iter=50) -> np.ndarray:
+    """
+    Every zero crossing of a vectorised f on [levels[0], levels[-1]]
+
+    Sign changes are bracketed on the levels grid (values may be passed in if
+    f was already evaluated there) and refined together by refine_brackets.
+    Returns the crossings in ascending order, accurate to xtol.
+    """
+    levels = np.asarray(levels, dtype=float)
+    values = np.asarray(f(levels) if values is None else values, dtype=float)
+
+    sign = np.sign(values)
+    exact = levels[sign == 0]
+    idx = np.where(sign[:-1] * sign[1:] < 0)[0]
+
+    roots = refine_brackets(f, levels[idx], levels[idx + 1], values[idx], values[idx + 1], xtol, max_iter)
+    return np.sort(np.concatenate([exact, roots]))
+
+
+def gamma_flip_points(chain, levels, totalGamma=None, move=0.01, xtol=0.01,
+                      chunk_size=DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    All gamma flip levels of the all-expiries profile between levels[0] and levels[-1]
+
+    Pass the unscaled totalGamma from gamma_profile to reuse it as the
+    bracketing grid instead of evaluating the chain there again, and a
+    PreparedChain to share its precomputed terms with gamma_profile.
+    """
+    prepared = prepare(chain, move=move)
+
+    def netGamma(spots):
+        return prepared.net_gamma(spots, chunk_size)
+
+    return find_sign_changes(netGamma, levels, totalGamma, xtol=xtol)
+
+
+def gamma_profile_scalar(chain, levels, nextExpiry, nextMonthlyExp, move=0.01):
+    """Original per-row df.apply loop, kept as the reference for check_against_scalar"""
+    df = chain.to_frame()
+    nextExpiry = np.datetime64(nextExpiry, 'D') + np.timedelta64(16, 'h')
+    nextMonthlyExp = np.datetime64(nextMonthlyExp, 'D') + np.timedelta64(16, 'h')
+
+    totalGamma = []
+    totalGammaExNext = []
+    totalGammaExFri = []
+
+    for level in levels:
+        # Negative T (expired rows) gives NaN here, which the sums skip
+        with np.errstate(invalid='ignore'):
+            callGammaEx = df.apply(lambda row : calcGammaEx(level, row['StrikePrice'], row['CallIV'],
+                                                            row['daysTillExp'], 0, 0, "call", row['CallOpenInt'], move), axis = 1)
+            putGammaEx = df.apply(lambda row : calcGammaEx(level, row['StrikePrice'], row['PutIV'],
+                                                           row['daysTillExp'], 0, 0, "put", row['PutOpenInt'], move), axis = 1)
+
+        totalGamma.append(callGammaEx.sum() - putGammaEx.sum())
+
+        exNxt = df['ExpirationDate'] != nextExpiry
+        totalGammaExNext.append(callGammaEx[exNxt].sum() - putGammaEx[exNxt].sum())
+
+        exFri = df['ExpirationDate'] != nextMonthlyExp
+        totalGammaExFri.append(callGammaEx[exFri].sum() - putGammaEx[exFri].sum())
+
+    return np.array(totalGamma), np.array(totalGammaExNext), np.array(totalGammaExFri)
+
+
+def check_against_scalar(chain, levels, nextExpiry, nextMonthlyExp, move=0.01,
+                         chunk_size=DEFAULT_CHUNK_SIZE, rtol=1e-9) -> float:
+    """
+    Compare the batched engine with the scalar df.apply path
+    Returns the worst relative error; raises AssertionError above rtol
+    """
+    batched = gamma_profile(chain, levels, nextExpiry, nextMonthlyExp, move, chunk_size)
+    scalar = gamma_profile_scalar(chain, levels, nextExpiry, nextMonthlyExp, move)
+
+    worst = 0.0
+    for b, s in zip(batched, scalar):
+        scale = max(np.max(np.abs(s)), 1e-300)
+        worst = max(worst, float(np.max(np.abs(b - s)) / scale))
+
+    if worst > rtol:
+        raise AssertionError(f"Batched gamma profile differs from scalar path: rel err {worst:.3e}")
+    return worst
+
+
+def _synthetic_chain(nExpiries=8, nStrikes=60, spot=5000.0, seed=0):
+    """Small random OptionChain used by the self-check"""
+    from option_chain import OptionChain
+
+    rng = np.random.default_rng(seed)
+    expiries = np.datetime64('today', 'D') + np.sort(rng.choice(np.arange(0, 120), nExpiries, replace=False))
+    strikes = np.round(np.linspace(0.7 * spot, 1.3 * spot, nStrikes))
+    exp, k = np.meshgrid(expiries, strikes, indexing='ij')
+    n = exp.size
+    callIV = rng.uniform(0.08, 0.6, n)
+    callIV[rng.choice(n, n // 20, replace=False)] = 0
+    # Expired listings of a stale payload: negative T, which the scalar path leaves out (NaN)
+    days = np.maximum(rng.integers(0, 80, n), 1)
+    days[rng.choice(n, n // 20, replace=False)] *= -1
+    return OptionChain('SYN', spot, None, np.full(n, b'SYN'), exp.ravel(), k.ravel(), days / 262,
+                       callIV, rng.uniform(0.08, 0.6, n),
+                       rng.integers(0, 5000, n), rng.integers(0, 5000, n),
+                       np.zeros(n), np.zeros(n))
+
+
+def self_check(chunk_sizes=(DEFAULT_CHUNK_SIZE, 1000, 7), log=print):
+    """
+    check_against_scalar on the synthetic chain for each chunk_size (one block,
+    many blocks, blocks smaller than a row); raises AssertionError on a mismatch
+    """
+    chain = _synthetic_chain()
+    levels = np.linspace(4000, 6000, 30)
+    nextExpiry = chain.next_expiry()
+    nextMonthlyExp = chain.expiry.max()
+    for chunk in chunk_sizes:
+        err = check_against_scalar(chain, levels, nextExpiry, nextMonthlyExp, chunk_size=chunk)
+        log(f"✓ chunk_size={chunk}: max relative error {err:.2e}")
+    return chain, levels, nextExpiry, nextMonthlyExp
+
+
+if __name__ == "__main__":
+    chain, levels, nextExpiry, nextMonthlyExp = self_check()
+    totalGamma, _, _ = gamma_profile(chain, levels, nextExpiry, nextMonthlyExp)
+    flips = gamma_flip_points(chain, levels, totalGamma, xtol=1e-3)
+    print(f"✓ Gamma flips: {', '.join(f'{x:,.3f}' for x in flips) or 'none'}")
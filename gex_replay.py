@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Historical replay of archived chain snapshots into GEX time series
+Usage: python gex_replay.py SPX [NDX ...] [--archive data/archive] [--output data/replay]
+                            [--workers N] [--move 0.001] [--csv FILE]
+
+Walks the snapshot archive (snapshot_archive.py), evaluates spot GEX, the
+gamma profile, flip levels and per-strike exposure for every snapshot not
+already replayed across a process pool, and keeps one compact columnar
+series per ticker (<output>/<TICKER>.npz). Later runs only process new
+snapshots. Prints where the latest reading ranks against the last 30/60/90
+days of history.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from gex_engine import PreparedChain, gamma_flip_points, gamma_profile
+from snapshot_archive import DEFAULT_ARCHIVE_DIR, SnapshotArchive
+
+DEFAULT_REPLAY_DIR = os.path.join("data", "replay")
+
+# Profile levels as fractions of each snapshot's spot, the same grid compute_ticker uses
+PROFILE_GRID = np.linspace(0.8, 1.2, 30)
+RANK_WINDOWS = (30, 60, 90)
+
+
+class ReplaySeries(NamedTuple):
+    """One row per snapshot; per-strike exposure is ragged, row i is strikes[offsets[i]:offsets[i + 1]]"""
+    timestamp: np.ndarray               # str, payload timestamp
+    spot: np.ndarray
+    total_gamma: np.ndarray             # $Bn at spot
+    gamma_flip: np.ndarray              # first flip level, NaN if none
+    profile: np.ndarray                 # snapshots x PROFILE_GRID, $Bn
+    offsets: np.ndarray                 # snapshots + 1
+    strikes: np.ndarray                 # strikes within the profile window
+    strike_gamma: np.ndarray            # $Bn per strike
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def strike_ladder(self, i):
+        rows = slice(self.offsets[i], self.offsets[i + 1])
+        return self.strikes[rows], self.strike_gamma[rows]
+
+
+def empty_series() -> ReplaySeries:
+    return ReplaySeries(np.array([], dtype='U32'), np.zeros(0), np.zeros(0), np.zeros(0),
+                        np.zeros((0, len(PROFILE_GRID))), np.zeros(1, dtype=np.int64), np.zeros(0), np.zeros(0))
+
+
+def load_series(path: str) -> ReplaySeries:
+    try:
+        with np.load(path) as f:
+            return ReplaySeries(*(f[field] for field in ReplaySeries._fields))
+    except OSError:
+        return empty_series()
+
+
+def save_series(series: ReplaySeries, path: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **series._asdict())
+    os.replace(tmp, path)
+
+
+def replay_chain(chain, move: float = 0.001) -> Dict:
+    """Spot GEX, profile, flips and per-strike exposure of one OptionChain ($Bn)"""
+    callGEX, putGEX = chain.spot_gex(move=move)
+    totalGEX = np.nan_to_num(callGEX) + np.nan_to_num(putGEX)
+    strikes, agg = chain.strike_sums(TotalGamma=totalGEX / 10**9)
+    levels = PROFILE_GRID * chain.spot
+    visible = (strikes >= levels[0]) & (strikes <= levels[-1])
+
+    prepared = PreparedChain.from_chain(chain, move=move)
+    totalGamma, _, _ = gamma_profile(prepared, levels, chain.next_expiry(), chain.next_monthly_expiry(), move=move)
+    flips = gamma_flip_points(prepared, levels, totalGamma, move=move)
+    return {
+        'timestamp': chain.timestamp,
+        'spot': chain.spot,
+        'total_gamma': float(totalGEX.sum()) / 10**9,
+        'gamma_flip': float(flips[0]) if len(flips) else np.nan,
+        'profile': totalGamma / 10**9,
+        'strikes': strikes[visible],
+        'strike_gamma': agg['TotalGamma'][visible],
+    }
+
+
+# ---=== WORKERS ===---
+_archive: Optional[SnapshotArchive] = None
+
+
+def _init_worker(archive_dir):
+    # Each worker opens (memory-maps) the archive once
+    global _archive
+    _archive = SnapshotArchive(archive_dir)
+
+
+def _replay_entry(entry, move):
+    return replay_chain(_archive.load(entry), move)
+
+
+def replay(ticker: str, archive_dir: str = DEFAULT_ARCHIVE_DIR, output_dir: str = DEFAULT_REPLAY_DIR,
+           move: float = 0.001, max_workers: Optional[int] = None, log=print) -> ReplaySeries:
+    """Bring <output_dir>/<ticker>.npz up to date with the archive; returns the full series"""
+    path = os.path.join(output_dir, f"{ticker}.npz")
+    series = load_series(path)
+    done = set(series.timestamp.tolist())
+    entries = [e for e in SnapshotArchive(archive_dir).snapshots(ticker) if e['timestamp'] not in done]
+    if not entries:
+        log(f"✓ {ticker}: {len(series)} snapshots, nothing new")
+        return series
+
+    start = time.perf_counter()
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1 or len(entries) == 1:
+        _init_worker(archive_dir)
+        records = [_replay_entry(e, move) for e in entries]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(entries)), initializer=_init_worker,
+                                 initargs=(archive_dir,)) as pool:
+            records = list(pool.map(_replay_entry, entries, [move] * len(entries),
+                                    chunksize=max(1, len(entries) // (4 * workers))))
+
+    series = merge(series, records)
+    save_series(series, path)
+    log(f"✓ {ticker}: replayed {len(records)} new snapshots in {time.perf_counter() - start:.1f}s "
+        f"({len(series)} total) -> {path}")
+    return series
+
+
+def merge(series: ReplaySeries, records: List[Dict]) -> ReplaySeries:
+    """Append replayed records to a series, in timestamp order"""
+    ladders = [series.strike_ladder(i) for i in range(len(series))] + \
+              [(r['strikes'], r['strike_gamma']) for r in records]
+    rows = {
+        'timestamp': np.concatenate([series.timestamp, np.array([str(r['timestamp']) for r in records], dtype='U32')]),
+        'spot': np.concatenate([series.spot, [r['spot'] for r in records]]),
+        'total_gamma': np.concatenate([series.total_gamma, [r['total_gamma'] for r in records]]),
+        'gamma_flip': np.concatenate([series.gamma_flip, [r['gamma_flip'] for r in records]]),
+        'profile': np.concatenate([series.profile, np.array([r['profile'] for r in records])]),
+    }
+    order = np.argsort(rows['timestamp'], kind='stable')
+    rows = {k: v[order] for k, v in rows.items()}
+    ladders = [ladders[i] for i in order]
+    counts = [len(s) for s, _ in ladders]
+    return ReplaySeries(**rows, offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+                        strikes=np.concatenate([s for s, _ in ladders]) if ladders else np.zeros(0),
+                        strike_gamma=np.concatenate([g for _, g in ladders]) if ladders else np.zeros(0))
+
+
+# ---=== PERCENTILE RANKS ===---
+def percentile_rank(history: np.ndarray, value: float) -> float:
+    """Percent of finite history values at or below value (NaN without history)"""
+    history = np.asarray(history, dtype=float)
+    history = history[np.isfinite(history)]
+    return float(np.mean(history <= value) * 100) if len(history) else np.nan
+
+
+def history_ranks(series: ReplaySeries, windows: Sequence[int] = RANK_WINDOWS, i: int = -1) -> Dict[str, Dict]:
+    """
+    Percentile of snapshot i's total GEX and flip distance from spot (%) within
+    the previous N calendar days of history (snapshot i itself excluded)
+    """
+    times = np.array([datetime.fromisoformat(t) for t in series.timestamp])
+    i = i % len(series)
+    flipDistance = (series.gamma_flip / series.spot - 1) * 100
+    ranks = {}
+    for days in windows:
+        prior = (times < times[i]) & (times >= times[i] - timedelta(days=days))
+        ranks[f"{days}d"] = {
+            'snapshots': int(prior.sum()),
+            'total_gamma': percentile_rank(series.total_gamma[prior], series.total_gamma[i]),
+            'flip_distance': percentile_rank(flipDistance[prior], flipDistance[i]),
+        }
+    return ranks
+
+
+def write_csv(series_by_ticker: Dict[str, ReplaySeries], f):
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(('ticker', 'timestamp', 'spot', 'total_gamma', 'gamma_flip'))
+    for ticker, s in series_by_ticker.items():
+        for row in zip(s.timestamp, s.spot, s.total_gamma, s.gamma_flip):
+            writer.writerow((ticker, row[0], f"{row[1]:.4f}", f"{row[2]:.6f}", "" if np.isnan(row[3]) else f"{row[3]:.4f}"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay archived snapshots into GEX time series")
+    parser.add_argument('tickers', nargs='+')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE_DIR)
+    parser.add_argument('--output', default=DEFAULT_REPLAY_DIR, help="directory of per-ticker series (.npz)")
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: all CPUs)")
+    parser.add_argument('--move', type=float, default=0.001)
+    parser.add_argument('--csv', default=None, help="also write the scalar series of every ticker here")
+    args = parser.parse_args(argv)
+
+    allSeries = {}
+    for ticker in args.tickers:
+        series = replay(ticker, args.archive, args.output, args.move, args.workers)
+        allSeries[ticker] = series
+        if len(series) == 0:
+            continue
+        latest = series.timestamp[-1]
+        flip = series.gamma_flip[-1]
+        print(f"  {latest}: total ${series.total_gamma[-1]:.2f} Bn, flip "
+              f"{'none' if np.isnan(flip) else f'{flip:,.0f}'}")
+        for window, r in history_ranks(series).items():
+            print(f"    vs {window:<4} ({r['snapshots']:>4} snapshots): total gamma {r['total_gamma']:5.1f}th pct, "
+                  f"flip distance {r['flip_distance']:5.1f}th pct")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            write_csv(allSeries, f)
+        print(f"✓ Series saved to {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
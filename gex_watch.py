@@ -0,0 +1,434 @@
+"""
+Live watch mode for gammaProfileCommandLine
+Polls one chain on an interval, diffs each snapshot against the previous
+one and updates the per-strike aggregates, the gamma profile and the flip
+levels only for the contracts that changed. Charts are redrawn (and
+re-saved) only when the total gamma or a flip level moves past a threshold.
+"""
+
+import argparse
+import os
+import time
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from cboe_fetch import fetch_chain, make_session
+from gex_engine import PreparedChain, find_sign_changes, profile_weights, refine_brackets
+from option_chain import OptionChain
+from snapshot_cache import SnapshotCache
+
+DEFAULT_INTERVAL = 60                   # seconds between polls
+DEFAULT_GEX_THRESHOLD = 0.05            # $Bn change in total gamma before redrawing
+DEFAULT_FLIP_THRESHOLD = 0.001          # flip level change, as a fraction of spot, before redrawing
+FLIP_XTOL = 1e-5                        # flip levels are tracked to this fraction of spot
+RECENTER_BAND = 0.05                    # re-grid the profile once spot drifts 5% from the grid centre
+FULL_RECOMPUTE_FRACTION = 0.5           # above this share of changed contracts a full pass is cheaper
+
+CHAIN_FIELDS = ('days_till_exp', 'call_iv', 'put_iv', 'call_oi', 'put_oi', 'call_gamma', 'put_gamma')
+
+
+class ChainDiff(NamedTuple):
+    removed: np.ndarray                 # rows of the old chain no longer listed
+    added: np.ndarray                   # rows of the new chain not in the old one
+    changed_old: np.ndarray             # old rows whose DTE, IV, OI or gamma changed ...
+    changed_new: np.ndarray             # ... and their rows in the new chain
+
+    @property
+    def size(self) -> int:
+        return len(self.removed) + len(self.added) + len(self.changed_new)
+
+
+def _differs(a, b):
+    return ~((a == b) | (np.isnan(a) & np.isnan(b)))
+
+
+def diff_chains(old: OptionChain, new: OptionChain, rootCodes: Dict[bytes, int],
+                oldKeys: Optional[np.ndarray] = None, newKeys: Optional[np.ndarray] = None) -> ChainDiff:
+    """
+    Match two snapshots on (root, expiry, strike) and list the rows that differ
+    Keys already computed with the same rootCodes may be passed in.
+    """
+    oldKeys = old.keys(rootCodes) if oldKeys is None else oldKeys
+    newKeys = new.keys(rootCodes) if newKeys is None else newKeys
+    _, iOld, iNew = np.intersect1d(oldKeys, newKeys, assume_unique=True, return_indices=True)
+
+    changed = np.zeros(len(iOld), dtype=bool)
+    for f in CHAIN_FIELDS:
+        changed |= _differs(getattr(old, f)[iOld], getattr(new, f)[iNew])
+
+    removed = np.setdiff1d(np.arange(len(old)), iOld, assume_unique=True)
+    added = np.setdiff1d(np.arange(len(new)), iNew, assume_unique=True)
+    return ChainDiff(removed, added, iOld[changed], iNew[changed])
+
+
+class WatchUpdate(NamedTuple):
+    timestamp: Optional[str]
+    spot: float
+    total_gamma: float                  # $Bn at spot
+    flips: np.ndarray
+    changed: int                        # contracts re-evaluated (len(chain) on a full pass)
+    full: bool
+    elapsed: float
+
+
+class GexWatcher:
+    """
+    Incremental gamma state for one ticker
+
+    Holds the last OptionChain and its PreparedChain, the (levels x 3)
+    profile in dollars, net gamma at a probe pair flip +/- xtol/2 around
+    every flip, and spot-independent per-strike sums (gamma * OI, OI).
+    update() subtracts the old contribution of every removed or changed
+    contract and adds the new one at all of those points, so a poll costs
+    O(changed contracts x levels); the full chain is only evaluated to
+    re-locate flips whose probe pair no longer straddles zero.
+    """
+
+    def __init__(self, ticker: str, move: float = 0.01, nLevels: int = 30, xtol: Optional[float] = None):
+        self.ticker = ticker
+        self.move = move
+        self.nLevels = nLevels
+        self.xtol = xtol                    # None: FLIP_XTOL * spot of the first snapshot
+        self.rootCodes: Dict[bytes, int] = {}
+        self.chain: Optional[OptionChain] = None
+        self.chainKeys = None
+        self.prepared: Optional[PreparedChain] = None
+        self.weights = None
+        self.center = None
+        self.levels = None
+        self.profile = None
+        self.flips = np.array([])
+        self.probes = np.zeros((0, 2))          # (flip - xtol/2, flip + xtol/2) when last located
+        self.probeValues = np.zeros((0, 2))     # net gamma there, kept current incrementally
+        self.strikes = np.array([])
+        self.strikeSums = np.zeros((4, 0))      # call gamma*OI, put gamma*OI, call OI, put OI
+
+    # ---=== PER-STRIKE AGGREGATES ===---
+    def _strike_slots(self, strike):
+        """Slots of strike in the aggregate arrays, growing them for new strikes"""
+        strike = np.asarray(strike, dtype=float)
+        missing = np.setdiff1d(strike, self.strikes)
+        if len(missing):
+            merged = np.union1d(self.strikes, missing)
+            sums = np.zeros((4, len(merged)))
+            sums[:, np.searchsorted(merged, self.strikes)] = self.strikeSums
+            self.strikes, self.strikeSums = merged, sums
+        return np.searchsorted(self.strikes, strike)
+
+    def _accumulate(self, chain: OptionChain, rows, sign):
+        terms = np.stack([chain.call_gamma[rows] * chain.call_oi[rows], chain.put_gamma[rows] * chain.put_oi[rows],
+                          chain.call_oi[rows], chain.put_oi[rows]]).astype(float)
+        slots = self._strike_slots(chain.strike[rows])
+        for i in range(4):
+            np.add.at(self.strikeSums[i], slots, sign * np.nan_to_num(terms[i]))
+
+    def strike_gex(self, spot):
+        """(callGEX, putGEX) per strike in dollars at spot; puts are negative"""
+        scale = 100 * spot * spot * self.move
+        return self.strikeSums[0] * scale, -self.strikeSums[1] * scale
+
+    # ---=== UPDATES ===---
+    def _set_flips(self, flips, probes=None, probeValues=None):
+        """Store flips with their probe pairs, evaluating the full chain at new probes"""
+        self.flips = np.asarray(flips, dtype=float)
+        if probes is None:
+            probes = np.column_stack([self.flips - self.xtol / 2, self.flips + self.xtol / 2])
+            probeValues = self.prepared.net_gamma(probes.ravel()).reshape(-1, 2)
+        self.probes, self.probeValues = probes, probeValues
+
+    def _full(self, chain: OptionChain):
+        self.center = chain.spot
+        self.xtol = self.xtol or FLIP_XTOL * chain.spot
+        self.levels = np.linspace(0.8 * chain.spot, 1.2 * chain.spot, self.nLevels)
+        self.weights = profile_weights(chain.expiry, chain.next_expiry(), chain.next_monthly_expiry())
+        self.profile = self.prepared.exposure(self.levels, self.weights)
+        self.strikes, self.strikeSums = np.array([]), np.zeros((4, 0))
+        self._accumulate(chain, slice(None), 1)
+        self._set_flips(find_sign_changes(self.prepared.net_gamma, self.levels, self.profile[:, 0], xtol=self.xtol))
+
+    def _apply(self, prepared: PreparedChain, weights, sign):
+        """Add (sign=1) or remove (sign=-1) contracts' exposure at the levels and flip probes"""
+        out = prepared.exposure(np.concatenate([self.levels, self.probes.ravel()]), weights)
+        self.profile += sign * out[:self.nLevels]
+        self.probeValues += sign * out[self.nLevels:, 0].reshape(-1, 2)
+
+    def _refine_flips(self):
+        """
+        Re-locate flips after an incremental update
+
+        A flip whose probe pair still straddles zero is re-interpolated inside
+        it for free. Otherwise a Newton step from the pair's slope is checked
+        with one batched full-chain call, and only brackets that step misses
+        (or new sign changes on the grid) go through refine_brackets.
+        """
+        values = self.profile[:, 0]
+        sign = np.sign(values)
+        half = self.xtol / 2
+        found = [(x, (x - half, x + half), None) for x in self.levels[sign == 0]]
+        brackets = []                       # known (points, values) per unresolved grid bracket
+        guesses = []                        # (bracket number, Newton estimate)
+
+        for i in np.where(sign[:-1] * sign[1:] < 0)[0]:
+            pts = [self.levels[i], self.levels[i + 1]]
+            vals = [values[i], values[i + 1]]
+            inside = np.where((self.flips >= pts[0]) & (self.flips <= pts[1]))[0]
+            if len(inside) == 1:
+                (lo, hi), (fLo, fHi) = self.probes[inside[0]], self.probeValues[inside[0]]
+                if pts[0] <= lo and hi <= pts[1] and np.sign(fLo) * np.sign(fHi) <= 0:
+                    x = lo - fLo * (hi - lo) / (fHi - fLo) if fHi != fLo else 0.5 * (lo + hi)
+                    found.append((x, (lo, hi), (fLo, fHi)))
+                    continue
+                pts += [lo, hi]
+                vals += [fLo, fHi]
+                if fHi != fLo:
+                    x = 0.5 * (lo + hi) - 0.5 * (fLo + fHi) * (hi - lo) / (fHi - fLo)
+                    guesses.append((len(brackets), float(np.clip(x, pts[0] + half, pts[1] - half))))
+            brackets.append((pts, vals))
+
+        if guesses:
+            g = np.array([x for _, x in guesses])
+            fg = self.prepared.net_gamma(np.column_stack([g - half, g + half]).ravel()).reshape(-1, 2)
+            for (k, x), (fLo, fHi) in zip(guesses, fg):
+                if np.sign(fLo) * np.sign(fHi) <= 0:
+                    root = x - half - fLo * self.xtol / (fHi - fLo) if fHi != fLo else x
+                    found.append((root, (x - half, x + half), (fLo, fHi)))
+                    brackets[k] = None
+                else:
+                    brackets[k][0].extend([x - half, x + half])
+                    brackets[k][1].extend([fLo, fHi])
+
+        a, b, fa, fb = [], [], [], []
+        for bracket in filter(None, brackets):
+            order = np.argsort(bracket[0])
+            pts, vals = np.asarray(bracket[0])[order], np.asarray(bracket[1])[order]
+            k = np.where(np.sign(vals[:-1]) * np.sign(vals[1:]) <= 0)[0][0]
+            a.append(pts[k]), b.append(pts[k + 1]), fa.append(vals[k]), fb.append(vals[k + 1])
+        if a:
+            found += [(x, (x - half, x + half), None)
+                      for x in refine_brackets(self.prepared.net_gamma, a, b, fa, fb, xtol=self.xtol)]
+
+        found.sort(key=lambda f: f[0])
+        flips = np.array([f[0] for f in found])
+        probes = np.array([f[1] for f in found]).reshape(-1, 2)
+        probeValues = np.zeros_like(probes)
+        known = np.array([f[2] is not None for f in found], dtype=bool)
+        if known.any():
+            probeValues[known] = [f[2] for f in found if f[2] is not None]
+        if (~known).any():
+            probeValues[~known] = self.prepared.net_gamma(probes[~known].ravel()).reshape(-1, 2)
+        self._set_flips(flips, probes, probeValues)
+
+    def update(self, chain: OptionChain) -> WatchUpdate:
+        start = time.perf_counter()
+        old, oldPrepared, oldWeights, oldKeys = self.chain, self.prepared, self.weights, self.chainKeys
+        self.chain = chain
+        self.chainKeys = chain.keys(self.rootCodes)
+        self.prepared = PreparedChain.from_chain(chain, move=self.move)
+
+        diff = None
+        if old is not None and abs(chain.spot - self.center) <= RECENTER_BAND * self.center \
+                and chain.next_expiry() == old.next_expiry() \
+                and chain.next_monthly_expiry() == old.next_monthly_expiry():
+            diff = diff_chains(old, chain, self.rootCodes, oldKeys, self.chainKeys)
+            if diff.size > FULL_RECOMPUTE_FRACTION * len(chain):
+                diff = None
+
+        if diff is None:
+            self._full(chain)
+            changed, full = len(chain), True
+        else:
+            self.weights = profile_weights(chain.expiry, chain.next_expiry(), chain.next_monthly_expiry())
+            outRows = np.concatenate([diff.removed, diff.changed_old])
+            inRows = np.concatenate([diff.added, diff.changed_new])
+            if len(outRows):
+                self._apply(oldPrepared.take(outRows), oldWeights[outRows], -1)
+                self._accumulate(old, outRows, -1)
+            if len(inRows):
+                self._apply(self.prepared.take(inRows), self.weights[inRows], 1)
+                self._accumulate(chain, inRows, 1)
+            if diff.size:
+                self._refine_flips()
+            changed, full = diff.size, False
+
+        callGEX, putGEX = self.strike_gex(chain.spot)
+        return WatchUpdate(chain.timestamp, chain.spot, (callGEX.sum() + putGEX.sum()) / 10**9, self.flips,
+                           changed, full, time.perf_counter() - start)
+
+    def result(self) -> dict:
+        """Current state in the shape of a generate_all_charts result dict"""
+        callGEX, putGEX = self.strike_gex(self.chain.spot)
+        profile = self.profile / 10**9
+        return {
+            'ticker': self.ticker,
+            'date': date.today(),
+            'spot_price': self.chain.spot,
+            'from_strike': self.levels[0],
+            'to_strike': self.levels[-1],
+            'total_gamma': (callGEX.sum() + putGEX.sum()) / 10**9,
+            'gamma_flip': self.flips[0] if len(self.flips) else None,
+            'gamma_flips': self.flips.tolist(),
+            'strikes': self.strikes,
+            'strike_total_gamma': (callGEX + putGEX) / 10**9,
+            'strike_call_oi': self.strikeSums[2],
+            'strike_put_oi': self.strikeSums[3],
+            'strike_call_gex': callGEX,
+            'strike_put_gex': putGEX,
+            'levels': self.levels,
+            'profile_total': profile[:, 0],
+            'profile_ex_next': profile[:, 1],
+            'profile_ex_fri': profile[:, 2],
+        }
+
+
+def needs_redraw(update: WatchUpdate, drawn: Optional[WatchUpdate], gexThreshold: float,
+                 flipThreshold: float) -> bool:
+    """
+    True if total gamma ($Bn) or any flip level (fraction of spot) moved past
+    its threshold since the last drawing
+    """
+    if drawn is None:
+        return True
+    if abs(update.total_gamma - drawn.total_gamma) > gexThreshold:
+        return True
+    if len(update.flips) != len(drawn.flips):
+        return True
+    return bool(len(update.flips)) and np.max(np.abs(update.flips - drawn.flips)) > flipThreshold * update.spot
+
+
+def draw(fig, result: dict, move: float):
+    """Redraw the four command-line charts in place on one figure"""
+    from chart_render import strike_bars
+
+    moveLabel = f"{move:.0%}" if move >= 0.01 else f"{move * 10**4:.0f}bps"
+    index = result['ticker']
+    spotPrice = result['spot_price']
+    fromStrike, toStrike = result['from_strike'], result['to_strike']
+    strikes = result['strikes']
+    zeroGamma = result['gamma_flip']
+
+    fig.clear()
+    ax1, ax2, ax3, ax4 = fig.subplots(2, 2).ravel()
+    fig.suptitle(f"{index} gamma exposure (live) - spot {spotPrice:,.2f} - {time.strftime('%H:%M:%S')}",
+                 fontweight="bold")
+
+    # Chart 1: Absolute Gamma Exposure
+    window = (fromStrike, toStrike)
+    strike_bars(ax1, strikes, result['strike_total_gamma'], window, label="Gamma Exposure")
+    ax1.set_title(f"Total Gamma: ${result['total_gamma']:.2f} Bn per {moveLabel} {index} Move", fontweight="bold")
+
+    # Chart 2: Open Interest by Calls and Puts
+    strike_bars(ax2, strikes, result['strike_call_oi'], window, label="Call OI")
+    strike_bars(ax2, strikes, -1 * result['strike_put_oi'], window, color='C1', label="Put OI")
+    ax2.set_title(f"Total Open Interest for {index}", fontweight="bold")
+
+    # Chart 3: Absolute Gamma Exposure by Calls and Puts
+    strike_bars(ax3, strikes, result['strike_call_gex'] / 10**9, window, label="Call Gamma")
+    strike_bars(ax3, strikes, result['strike_put_gex'] / 10**9, window, color='C1', label="Put Gamma")
+    ax3.set_title(f"Gamma by Type per {moveLabel} {index} Move", fontweight="bold")
+
+    # Chart 4: Gamma Exposure Profile
+    ax4.plot(result['levels'], result['profile_total'], label="All Expiries")
+    ax4.plot(result['levels'], result['profile_ex_next'], label="Ex-Next Expiry")
+    ax4.plot(result['levels'], result['profile_ex_fri'], label="Ex-Next Monthly Expiry")
+    ax4.axhline(y=0, color='grey', lw=1)
+    if zeroGamma is not None:
+        ax4.axvline(x=zeroGamma, color='g', lw=1, label=f"Gamma Flip: {zeroGamma:,.0f}")
+    ax4.set_title("Gamma Exposure Profile", fontweight="bold")
+
+    for ax in (ax1, ax2, ax3, ax4):
+        ax.grid()
+        ax.set_xlim([fromStrike, toStrike])
+        ax.axvline(x=spotPrice, color='r', lw=1, label=f"{index} Spot: {spotPrice:,.0f}")
+        ax.legend(fontsize=8)
+
+
+def watch(ticker: str, move: float = 0.01, interval: float = DEFAULT_INTERVAL,
+          gexThreshold: float = DEFAULT_GEX_THRESHOLD, flipThreshold: float = DEFAULT_FLIP_THRESHOLD,
+          output_dir: str = "charts", polls: Optional[int] = None) -> List[WatchUpdate]:
+    """
+    Poll ticker until interrupted (or for polls iterations)
+    Unchanged snapshots (HTTP 304 or same payload timestamp) cost one
+    conditional request; changed ones are applied incrementally.
+    """
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    interactive = matplotlib.get_backend().lower() not in ('agg', 'pdf', 'svg', 'ps', 'cairo', 'template')
+    if interactive:
+        plt.ion()
+    fig = plt.figure(figsize=(16, 10))
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.join(output_dir, f"{ticker}_watch.png")
+
+    cache = SnapshotCache(ttl=0)        # every poll revalidates; 304 means nothing changed
+    session = make_session(pool_size=1) # one keep-alive connection for every poll
+    watcher = GexWatcher(ticker, move=move)
+    drawn = None
+    updates = []
+    n = 0
+
+    try:
+        while polls is None or n < polls:
+            if n:
+                if interactive:
+                    plt.pause(interval)
+                else:
+                    time.sleep(interval)
+            n += 1
+
+            first = watcher.chain is None
+            fetched = fetch_chain(ticker, session, cache=cache, ingest=True, reload_unchanged=first)
+            stamp = time.strftime('%H:%M:%S')
+            if fetched.status_code == 304 or (fetched.ok and not first
+                                               and fetched.payload.timestamp == watcher.chain.timestamp):
+                print(f"[{stamp}] {ticker} unchanged")
+                continue
+            if not fetched.ok:
+                print(f"[{stamp}] ❌ {ticker}: {fetched.error or 'HTTP ' + str(fetched.status_code)}")
+                continue
+
+            update = watcher.update(OptionChain.from_ingested(ticker, fetched.payload, date.today()))
+            updates.append(update)
+            flips = ', '.join(f"{x:,.0f}" for x in update.flips) or 'none'
+            print(f"[{stamp}] {ticker} spot {update.spot:,.2f}  total gamma ${update.total_gamma:.2f}Bn  "
+                  f"flips {flips}  ({'full pass' if update.full else f'{update.changed} contracts changed'}, "
+                  f"{update.elapsed * 1000:.0f} ms)")
+
+            if needs_redraw(update, drawn, gexThreshold, flipThreshold):
+                draw(fig, watcher.result(), move)
+                fig.savefig(filename, dpi=100)
+                if interactive:
+                    fig.canvas.draw_idle()
+                drawn = update
+                print(f"[{stamp}] ✓ Chart updated: {filename}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        session.close()
+        plt.close(fig)
+
+    return updates
+
+
+def main(argv=None, move: float = 0.01):
+    parser = argparse.ArgumentParser(description="Watch one ticker's gamma exposure and redraw on material changes")
+    parser.add_argument('ticker')
+    parser.add_argument('--watch', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="seconds between polls")
+    parser.add_argument('--gex-threshold', type=float, default=DEFAULT_GEX_THRESHOLD,
+                        help="total gamma change ($Bn) that triggers a redraw")
+    parser.add_argument('--flip-threshold', type=float, default=DEFAULT_FLIP_THRESHOLD,
+                        help="flip level change (fraction of spot) that triggers a redraw")
+    parser.add_argument('--output-dir', default="charts")
+    parser.add_argument('--polls', type=int, default=None, help="stop after this many polls")
+    args = parser.parse_args(argv)
+
+    watch(args.ticker, move=move, interval=args.interval, gexThreshold=args.gex_threshold,
+          flipThreshold=args.flip_threshold, output_dir=args.output_dir, polls=args.polls)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
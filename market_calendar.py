@@ -0,0 +1,144 @@
+"""
+Exchange trading calendar
+Rule-based US equity/index options holidays (NYSE schedule) as a
+np.busdaycalendar, plus the session clock used for intraday time to expiry.
+Options expire at the 16:00 close; the regular session opens at 09:30.
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+
+EXCHANGE_TZ = 'America/New_York'
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+SESSION_HOURS = 6.5
+
+# Business days per year used to annualise time to expiry
+TRADING_DAYS = 262
+
+# One-off closures not covered by the rules (national days of mourning, weather)
+SPECIAL_CLOSURES = ('2018-12-05', '2025-01-09')
+
+
+def _nth_weekday(year, month, weekday, n) -> date:
+    """n-th (1-based) weekday of a month; n=-1 is the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month, day = divmod(h + l - 7 * m + 90, 25)
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def exchange_holidays(year: int) -> List[date]:
+    """Full-day closures in a calendar year"""
+    days = [
+        _nth_weekday(year, 1, 0, 3),                # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),                # Washington's Birthday
+        _easter(year) - timedelta(days=2),          # Good Friday
+        _nth_weekday(year, 5, 0, -1),               # Memorial Day
+        _observed(date(year, 7, 4)),                # Independence Day
+        _nth_weekday(year, 9, 0, 1),                # Labor Day
+        _nth_weekday(year, 11, 3, 4),               # Thanksgiving
+        _observed(date(year, 12, 25)),              # Christmas
+    ]
+    # New Year's Day falling on a Saturday is not observed on the Friday before
+    newYear = date(year, 1, 1)
+    if newYear.weekday() != 5:
+        days.append(_observed(newYear))
+    if year >= 2022:
+        days.append(_observed(date(year, 6, 19)))   # Juneteenth
+    days += [d for d in map(date.fromisoformat, SPECIAL_CLOSURES) if d.year == year]
+    return sorted(days)
+
+
+@lru_cache(maxsize=8)
+def busday_calendar(first_year: int, last_year: int) -> np.busdaycalendar:
+    """Mon-Fri calendar without exchange holidays for first_year..last_year"""
+    holidays = [d for y in range(first_year, last_year + 1) for d in exchange_holidays(y)]
+    return np.busdaycalendar(holidays=np.array(holidays, dtype='datetime64[D]'))
+
+
+def calendar_for(dates: Iterable) -> np.busdaycalendar:
+    """Calendar covering every date given (datetime64 arrays or dates)"""
+    years = np.asarray(list(dates) if not isinstance(dates, np.ndarray) else dates,
+                       dtype='datetime64[D]').astype('datetime64[Y]').astype(int) + 1970
+    return busday_calendar(int(years.min()), int(years.max()))
+
+
+def exchange_now() -> datetime:
+    """Naive wall-clock time at the exchange (local time if tzdata is unavailable)"""
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo(EXCHANGE_TZ)).replace(tzinfo=None)
+    except (ImportError, LookupError):
+        return datetime.now()
+
+
+def quote_time(timestamp: Optional[str], today: Optional[date] = None,
+               log: Callable[[str], None] = print) -> Optional[datetime]:
+    """
+    Clock for intraday time to expiry: the exchange time of a CBOE snapshot
+    ('YYYY-MM-DD HH:MM:SS'), clamped to that day's 16:00 close, so the quotes
+    and their time to expiry describe the same moment. A snapshot from an
+    earlier day keeps its own time as long as no full session has traded
+    since (Friday's close on Saturday or before Monday's open).
+    Returns None, i.e. whole-day time to expiry from today, with a warning
+    when the timestamp is missing or unreadable or the snapshot is older
+    """
+    today = today or exchange_now().date()
+    try:
+        quoted = datetime.fromisoformat(str(timestamp)).replace(tzinfo=None)
+    except ValueError:
+        log(f"⚠️ Unreadable snapshot time {timestamp!r}, using whole-day time to expiry")
+        return None
+    day = np.datetime64(quoted.date(), 'D')
+    missed = int(np.busday_count(day + 1, np.datetime64(today, 'D'), busdaycal=calendar_for([day, today])))
+    if missed > 0:
+        log(f"⚠️ Snapshot from {quoted:%Y-%m-%d %H:%M} predates {missed} full session(s), "
+            f"using whole-day time to expiry from {today}")
+        return None
+    return min(quoted, datetime.combine(quoted.date(), SESSION_CLOSE))
+
+
+def session_remaining(now: datetime, calendar: Optional[np.busdaycalendar] = None) -> float:
+    """
+    Fraction of today's regular session still to trade: 1 before the open,
+    0 after the close or on a non-trading day
+    """
+    calendar = calendar or calendar_for([now.date()])
+    if not np.is_busday(np.datetime64(now.date(), 'D'), busdaycal=calendar):
+        return 0.0
+    close = datetime.combine(now.date(), SESSION_CLOSE)
+    return min(max((close - now).total_seconds() / (SESSION_HOURS * 3600), 0.0), 1.0)
+
+
+if __name__ == "__main__":
+    import sys
+    year = int(sys.argv[1]) if len(sys.argv) > 1 else date.today().year
+    for d in exchange_holidays(year):
+        print(f"{d:%a %d %b %Y}")
@@ -0,0 +1,355 @@
+"""
+Option chain parsing
+Turns CBOE option symbols into typed NumPy columns, pairs calls with
+puts on (root, expiry, strike) and holds the result as an OptionChain
+"""
+
+import numpy as np
+from datetime import date
+from typing import TYPE_CHECKING, Dict, NamedTuple, Tuple
+
+# pandas is only needed for the DataFrame views; importing it lazily keeps
+# the compute-only path (gex_compute.py) from paying its import time
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Shortest time to expiry with intraday decay: one minute of a 6.5 hour session, in days
+MIN_SESSION_DAYS = 1 / 390
+
+# OCC symbol tail: YYMMDD + C/P + 8-digit strike in thousandths, e.g. SPXW241108C05500000
+OCC_TAIL = 15
+
+
+class OCCSymbols(NamedTuple):
+    root: np.ndarray        # bytes (S) array, e.g. b'SPXW'
+    expiry: np.ndarray      # datetime64[D]
+    is_call: np.ndarray     # bool
+    strike: np.ndarray      # float64, OCC strike / 1000
+
+
+def _digits(mat, cols):
+    """Integer value of the digit columns cols of a uint8 character matrix"""
+    d = mat[:, cols].astype(np.int64) - ord('0')
+    if ((d < 0) | (d > 9)).any():
+        raise ValueError("Malformed OCC option symbol: non-digit in date or strike field")
+    return d @ (10 ** np.arange(len(cols) - 1, -1, -1, dtype=np.int64))
+
+
+def parse_occ_symbols(symbols) -> OCCSymbols:
+    """
+    Decode an array of OCC option symbols in one vectorised pass
+
+    Roots may have any length; the date, call/put flag and strike are read
+    from the fixed 15-character tail. Strikes keep their decimals
+    (SPX241108C05512500 -> 5512.5), unlike a [-8:-3] string slice.
+    """
+    raw = np.array(symbols, dtype='S')
+    n = len(raw)
+    width = raw.dtype.itemsize
+    if n == 0:
+        return OCCSymbols(np.array([], dtype='S1'), np.array([], dtype='datetime64[D]'),
+                          np.array([], dtype=bool), np.array([], dtype=float))
+
+    mat = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(n, width)
+    lengths = np.char.str_len(raw)
+    if (lengths < OCC_TAIL).any():
+        raise ValueError("Malformed OCC option symbol: shorter than 15 characters")
+
+    # Right-align each symbol's tail into a fixed (n, 15) matrix
+    tailStart = lengths - OCC_TAIL
+    tail = np.take_along_axis(mat, tailStart[:, None] + np.arange(OCC_TAIL), axis=1)
+
+    yy = _digits(tail, [0, 1])
+    mm = _digits(tail, [2, 3])
+    dd = _digits(tail, [4, 5])
+    expiry = (((2000 + yy - 1970) * 12 + mm - 1).astype('datetime64[M]').astype('datetime64[D]')
+              + (dd - 1).astype('timedelta64[D]'))
+
+    flag = tail[:, 6]
+    isCall = flag == ord('C')
+    if not (isCall | (flag == ord('P'))).all():
+        raise ValueError("Malformed OCC option symbol: call/put flag must be C or P")
+
+    strike = _digits(tail, list(range(7, 15))) / 1000.0
+
+    # Null out everything past the root and reinterpret as fixed-width bytes
+    rootWidth = max(int(tailStart.max()), 1)
+    rootMat = np.where(np.arange(rootWidth) < tailStart[:, None], mat[:, :rootWidth], 0).astype(np.uint8)
+    root = rootMat.view(f'S{rootWidth}').ravel()
+
+    return OCCSymbols(root, expiry, isCall, strike)
+
+
+class ContractPairs(NamedTuple):
+    root: np.ndarray
+    expiry: np.ndarray      # datetime64[D]
+    strike: np.ndarray      # float64
+    call_idx: np.ndarray    # row of the call in the source chain, -1 if missing
+    put_idx: np.ndarray     # row of the put in the source chain, -1 if missing
+
+
+# Contract fields chain_ingest copies out of the payload -> (call column, put column)
+PAIR_FIELDS: Dict[str, Tuple[str, str]] = {
+    'option': ('Calls', 'Puts'),
+    'bid': ('CallBid', 'PutBid'),
+    'ask': ('CallAsk', 'PutAsk'),
+    'volume': ('CallVol', 'PutVol'),
+    'iv': ('CallIV', 'PutIV'),
+    'delta': ('CallDelta', 'PutDelta'),
+    'gamma': ('CallGamma', 'PutGamma'),
+    'open_interest': ('CallOpenInt', 'PutOpenInt'),
+}
+
+# A missing side has no position, so it contributes no exposure
+ZERO_FILL_FIELDS = ('gamma', 'open_interest')
+
+
+def contract_key(rootCode, expiry, strike) -> np.ndarray:
+    """int64 (root, expiry, strike) key: root code << 50 | epoch days << 34 | strike * 1000"""
+    days = np.asarray(expiry, dtype='datetime64[D]').astype(np.int64)
+    strikeMilli = np.rint(np.asarray(strike, dtype=float) * 1000).astype(np.int64)
+    return (np.asarray(rootCode, dtype=np.int64) << 50) | (days << 34) | strikeMilli
+
+
+def pair_contracts(occ: OCCSymbols) -> ContractPairs:
+    """
+    Join calls to puts on (root, expiry, strike) with a sorted-key join
+
+    Every contract is kept: strikes listed on one side only get -1 for the
+    missing side instead of aborting the whole chain. Rows come out sorted
+    by root, expiry and strike. The root is part of the key so SPX and SPXW
+    listings on the same date and strike stay separate contracts.
+    """
+    roots, rootCode = np.unique(occ.root, return_inverse=True)
+    key = contract_key(rootCode, occ.expiry, occ.strike)
+
+    uniq, first, pairId = np.unique(key, return_index=True, return_inverse=True)
+    callIdx = np.full(len(uniq), -1, dtype=np.int64)
+    putIdx = np.full(len(uniq), -1, dtype=np.int64)
+    rows = np.arange(len(key))
+    callIdx[pairId[occ.is_call]] = rows[occ.is_call]
+    putIdx[pairId[~occ.is_call]] = rows[~occ.is_call]
+
+    return ContractPairs(occ.root[first], occ.expiry[first], occ.strike[first], callIdx, putIdx)
+
+
+def _take(values, idx, fill):
+    """values[idx] as float, with fill where the side is missing (idx -1)"""
+    out = np.asarray(values, dtype=float)[np.maximum(idx, 0)]
+    out[idx < 0] = fill
+    return out
+
+
+class OptionChain:
+    """
+    Compact struct-of-arrays option chain, one row per paired (root, expiry, strike)
+
+    Every column is a contiguous NumPy array, float64 by default or float32
+    when dtype=np.float32 is requested, so many chains and snapshots can stay
+    resident. The spot GEX calculation, the per-strike aggregation and the
+    gex_engine profile functions all read these arrays directly.
+    """
+
+    __slots__ = ('ticker', 'spot', 'timestamp', 'root', 'expiry', 'strike', 'days_till_exp',
+                 'call_iv', 'put_iv', 'call_oi', 'put_oi', 'call_gamma', 'put_gamma', 'one_sided')
+
+    FLOAT_FIELDS = ('strike', 'days_till_exp', 'call_iv', 'put_iv', 'call_oi', 'put_oi',
+                    'call_gamma', 'put_gamma')
+
+    def __init__(self, ticker, spot, timestamp, root, expiry, strike, days_till_exp,
+                 call_iv, put_iv, call_oi, put_oi, call_gamma, put_gamma, dtype=np.float64, one_sided=0):
+        self.ticker = ticker
+        self.spot = float(spot)
+        self.timestamp = timestamp
+        self.root = np.asarray(root)
+        self.expiry = np.asarray(expiry, dtype='datetime64[D]')
+        self.strike = np.ascontiguousarray(strike, dtype=dtype)
+        self.days_till_exp = np.ascontiguousarray(days_till_exp, dtype=dtype)
+        self.call_iv = np.ascontiguousarray(call_iv, dtype=dtype)
+        self.put_iv = np.ascontiguousarray(put_iv, dtype=dtype)
+        self.call_oi = np.ascontiguousarray(call_oi, dtype=dtype)
+        self.put_oi = np.ascontiguousarray(put_oi, dtype=dtype)
+        self.call_gamma = np.ascontiguousarray(call_gamma, dtype=dtype)
+        self.put_gamma = np.ascontiguousarray(put_gamma, dtype=dtype)
+        self.one_sided = one_sided      # pairs listed on one side only
+
+    @classmethod
+    def from_columns(cls, ticker, columns, spot, timestamp=None, today=None, dtype=np.float64,
+                     now=None) -> 'OptionChain':
+        """
+        Parse, pair and project raw contract columns (option, iv, gamma, open_interest)
+        now (exchange-local datetime) switches time to expiry to intraday session time
+        """
+        pairs = pair_contracts(parse_occ_symbols(columns['option']))
+
+        def side(field, idx):
+            fill = 0.0 if field in ZERO_FILL_FIELDS else np.nan
+            return _take(columns[field], idx, fill)
+
+        return cls(ticker, spot, timestamp, pairs.root, pairs.expiry, pairs.strike,
+                   days_till_expiry(pairs.expiry, today, now),
+                   side('iv', pairs.call_idx), side('iv', pairs.put_idx),
+                   side('open_interest', pairs.call_idx), side('open_interest', pairs.put_idx),
+                   side('gamma', pairs.call_idx), side('gamma', pairs.put_idx),
+                   dtype=dtype, one_sided=int(((pairs.call_idx < 0) | (pairs.put_idx < 0)).sum()))
+
+    @classmethod
+    def from_ingested(cls, ticker, ingested, today=None, dtype=np.float64, now=None) -> 'OptionChain':
+        """Build from a chain_ingest.IngestedChain"""
+        return cls.from_columns(ticker, ingested.columns, ingested.spot, ingested.timestamp, today, dtype, now)
+
+    def __len__(self):
+        return len(self.strike)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, f).nbytes for f in self.__slots__ if isinstance(getattr(self, f), np.ndarray))
+
+    def astype(self, dtype) -> 'OptionChain':
+        return OptionChain(self.ticker, self.spot, self.timestamp, self.root, self.expiry,
+                           *(getattr(self, f) for f in self.FLOAT_FIELDS), dtype=dtype,
+                           one_sided=self.one_sided)
+
+    def take(self, rows) -> 'OptionChain':
+        """Chain restricted to the given rows"""
+        return OptionChain(self.ticker, self.spot, self.timestamp, self.root[rows], self.expiry[rows],
+                           *(getattr(self, f)[rows] for f in self.FLOAT_FIELDS), dtype=self.strike.dtype)
+
+    def keys(self, rootCodes: Dict[bytes, int]) -> np.ndarray:
+        """
+        contract_key per row; rootCodes maps root -> code and is extended in place,
+        so keys from successive snapshots of one ticker stay comparable
+        """
+        roots, inverse = np.unique(self.root, return_inverse=True)
+        codes = np.array([rootCodes.setdefault(bytes(r), len(rootCodes)) for r in roots], dtype=np.int64)
+        return contract_key(codes[inverse], self.expiry, self.strike)
+
+    def next_expiry(self) -> np.datetime64:
+        return self.expiry.min() if len(self) else np.datetime64('NaT')
+
+    def next_monthly_expiry(self) -> np.datetime64:
+        """Earliest third-Friday expiry, NaT if the chain has none"""
+        monthly = self.expiry[third_friday_mask(self.expiry)]
+        return monthly.min() if len(monthly) else np.datetime64('NaT')
+
+    def spot_gex(self, move=0.01):
+        """
+        Dollar gamma exposure per contract at the current spot
+        Unit Gamma * Open Interest * 100 * Spot^2 * move; puts are negative.
+        """
+        scale = 100 * self.spot * self.spot * move
+        callGEX = self.call_gamma.astype(float) * self.call_oi * scale
+        putGEX = self.put_gamma.astype(float) * self.put_oi * scale * -1
+        return callGEX, putGEX
+
+    def strike_sums(self, **columns) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Sum each per-contract column by strike: (sorted unique strikes, {name: sums})"""
+        strikes, inverse = np.unique(self.strike, return_inverse=True)
+        sums = {name: np.bincount(inverse, weights=np.nan_to_num(np.asarray(values, dtype=float)),
+                                  minlength=len(strikes))
+                for name, values in columns.items()}
+        return strikes.astype(float), sums
+
+    def expiry_sums(self, **columns) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Sum each per-contract column by expiry: (sorted unique expiries, {name: sums})"""
+        expiries, inverse = np.unique(self.expiry, return_inverse=True)
+        sums = {name: np.bincount(inverse, weights=np.nan_to_num(np.asarray(values, dtype=float)),
+                                  minlength=len(expiries))
+                for name, values in columns.items()}
+        return expiries, sums
+
+    def by_strike(self, **columns) -> 'pd.DataFrame':
+        """strike_sums as a DataFrame indexed by StrikePrice; replaces df.groupby('StrikePrice').sum()"""
+        import pandas as pd
+        strikes, sums = self.strike_sums(**columns)
+        return pd.DataFrame(sums, index=pd.Index(strikes, name='StrikePrice'))
+
+    def to_frame(self) -> 'pd.DataFrame':
+        """Script-style DataFrame view (ExpirationDate at 16:00, StrikePrice, CallIV, ...)"""
+        import pandas as pd
+        return pd.DataFrame({
+            'ExpirationDate': self.expiry.astype('datetime64[s]') + np.timedelta64(16, 'h'),
+            'StrikePrice': self.strike,
+            'CallIV': self.call_iv, 'PutIV': self.put_iv,
+            'CallGamma': self.call_gamma, 'PutGamma': self.put_gamma,
+            'CallOpenInt': self.call_oi, 'PutOpenInt': self.put_oi,
+            'daysTillExp': self.days_till_exp,
+        })
+
+
+def third_friday_mask(expiry) -> np.ndarray:
+    """Vectorised isThirdFriday over a datetime64 array"""
+    days = np.asarray(expiry, dtype='datetime64[D]')
+    weekday = (days.astype(np.int64) + 3) % 7                          # 1970-01-01 was a Thursday
+    dayOfMonth = (days - days.astype('datetime64[M]')).astype(np.int64) + 1
+    return (weekday == 4) & (dayOfMonth >= 15) & (dayOfMonth <= 21)
+
+
+def days_till_expiry(expiry, today=None, now=None, holidays=True) -> np.ndarray:
+    """
+    Exchange business days to expiry / 262 per contract
+    Counted once per calendar day in the expiry range and looked up per row.
+
+    Whole-day mode (now is None): business days from today to the expiry,
+    today included. 0DTE options get 1 day, so they are never dropped.
+
+    Intraday mode (now is an exchange-local datetime, see
+    market_calendar.quote_time): today is now's date, and the time is what
+    is left of that day's session plus the full sessions up to the 16:00
+    expiry, so 0DTE decays with the clock (floored at one session minute).
+    Expiries before today, and today's once the session is over, get 0 and
+    are excluded; later expiries with no session left before them keep 1 day.
+
+    holidays=False counts plain Mon-Fri days.
+    """
+    from market_calendar import TRADING_DAYS, calendar_for, session_remaining
+
+    if now is not None:
+        today = now.date()
+    today = np.datetime64(today or date.today(), 'D')
+    offset = (np.asarray(expiry, dtype='datetime64[D]') - today).astype(np.int64)
+    if len(offset) == 0:
+        return np.zeros(0)
+    # Evaluate every calendar day between the nearest and furthest expiry once, then index
+    # by day offset: a lookup per row instead of a sort or a busday_count per row
+    first = int(offset.min())
+    expiries = today + np.arange(first, int(offset.max()) + 1)
+    calendar = calendar_for([today, expiries[0], expiries[-1]]) if holidays else np.busdaycalendar()
+
+    if now is None:
+        busDays = np.busday_count(today, expiries, busdaycal=calendar)
+        days = np.where(busDays == 0, 1, busDays)
+    else:
+        remaining = session_remaining(now, calendar)
+        fullSessions = np.busday_count(today + 1, np.maximum(expiries, today) + 1, busdaycal=calendar)
+        days = remaining + fullSessions
+        days = np.where(days == 0, 1, np.maximum(days, MIN_SESSION_DAYS))
+        # Already expired, or expiring today after the close / on a day without a session
+        expired = (expiries < today) | ((expiries == today) & (remaining == 0))
+        days = np.where(expired, 0, days)
+    return (days / TRADING_DAYS)[offset - first]
+
+
+if __name__ == "__main__":
+    from datetime import datetime
+    from market_calendar import TRADING_DAYS, quote_time
+
+    # Intraday time to expiry around the close and over a weekend (Fri 16 Oct 2026)
+    expiries = np.array(['2026-10-15', '2026-10-16', '2026-10-17', '2026-10-19', '2026-10-23'], dtype='datetime64[D]')
+    cases = (
+        (datetime(2026, 10, 16, 15, 0), [0, 1 / 6.5, 1 / 6.5, 1 / 6.5 + 1, 1 / 6.5 + 5]),
+        (datetime(2026, 10, 16, 18, 0), [0, 0, 1, 1, 5]),
+        (datetime(2026, 10, 17, 12, 0), [0, 0, 0, 1, 5]),
+    )
+    for now, expected in cases:
+        days = days_till_expiry(expiries, now=now) * TRADING_DAYS
+        assert np.allclose(days, expected), f"{now}: {days} != {expected}"
+        print(f"✓ {now:%a %H:%M}: {', '.join(f'{d:.3f}' for d in days)} days")
+
+    # The clock is the snapshot's own time (clamped to the close) until a full session trades past it
+    friday = '2026-10-16 16:14:59'
+    assert quote_time(friday, date(2026, 10, 16)) == datetime(2026, 10, 16, 16, 0)
+    assert quote_time(friday, date(2026, 10, 19)) == datetime(2026, 10, 16, 16, 0)
+    assert quote_time(friday, date(2026, 10, 20), log=lambda msg: None) is None
+    print(f"✓ quote_time of {friday}: Fri/Mon 16:00, Tue whole days")
+
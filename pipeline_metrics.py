@@ -0,0 +1,151 @@
+"""
+Per-stage instrumentation for the ticker pipeline
+Records wall time, CPU time, tracemalloc peak and row counts for each
+(ticker, stage) and exports them as JSON lines or Prometheus text.
+Disabled by default; a disabled recorder hands out one shared no-op
+context, so instrumented code costs a function call per stage.
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from typing import List, NamedTuple, Optional, TextIO
+
+
+class StageRecord(NamedTuple):
+    ticker: str
+    stage: str
+    wall: float                         # seconds
+    cpu: float                          # process CPU seconds (all threads)
+    peak_bytes: Optional[int]           # tracemalloc peak during the stage, None if not traced
+    rows: Optional[int]                 # rows the stage produced (contracts, pairs, strikes, ...)
+    started: Optional[float]            # epoch seconds, None when measured outside a stage()
+
+
+class _NullStage:
+    """Shared stand-in used while recording is disabled"""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('recorder', 'ticker', 'name', 'rows', '_wall', '_cpu', '_started')
+
+    def __init__(self, recorder, ticker, name, rows):
+        self.recorder = recorder
+        self.ticker = ticker
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        if self.recorder.trace_memory:
+            tracemalloc.reset_peak()
+        self._started = time.time()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak = tracemalloc.get_traced_memory()[1] if self.recorder.trace_memory else None
+        self.recorder.add(StageRecord(self.ticker, self.name, wall, cpu, peak, self.rows, self._started))
+        return False
+
+
+class StageRecorder:
+    """
+    Collects StageRecords
+
+        with RECORDER.stage('SPX', 'profile') as s:
+            ...
+            s.rows = len(levels)
+
+    Stages should not nest while memory is traced: each one resets the
+    tracemalloc peak when it starts.
+    """
+
+    def __init__(self, enabled: bool = False, trace_memory: bool = False):
+        self.enabled = False
+        self.trace_memory = False
+        self.records: List[StageRecord] = []
+        self._lock = threading.Lock()
+        if enabled:
+            self.enable(trace_memory)
+
+    def enable(self, trace_memory: bool = False):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    def stage(self, ticker: str, name: str, rows: Optional[int] = None):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, ticker, name, rows)
+
+    def add(self, record: StageRecord):
+        """Append a record measured elsewhere (worker process, fetch thread)"""
+        if self.enabled:
+            with self._lock:
+                self.records.append(record)
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+    # ---=== EXPORT ===---
+    def write_jsonl(self, f: TextIO):
+        for r in self.records:
+            f.write(json.dumps(r._asdict()) + "\n")
+
+    def prometheus(self, prefix: str = "gex_stage") -> str:
+        """Prometheus text exposition; the last record wins for a repeated (ticker, stage)"""
+        latest = {(r.ticker, r.stage): r for r in self.records}
+        metrics = (
+            ('wall_seconds', 'Wall time of the pipeline stage', lambda r: r.wall),
+            ('cpu_seconds', 'Process CPU time during the pipeline stage', lambda r: r.cpu),
+            ('peak_bytes', 'tracemalloc peak during the pipeline stage', lambda r: r.peak_bytes),
+            ('rows', 'Rows produced by the pipeline stage', lambda r: r.rows),
+        )
+        lines = []
+        for suffix, help_, value in metrics:
+            samples = [(k, value(r)) for k, r in latest.items() if value(r) is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {prefix}_{suffix} {help_}")
+            lines.append(f"# TYPE {prefix}_{suffix} gauge")
+            for (ticker, stage), v in samples:
+                lines.append(f'{prefix}_{suffix}{{ticker="{_escape(ticker)}",stage="{_escape(stage)}"}} {v:.9g}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One line per ticker: stage wall times in ms"""
+        byTicker = {}
+        for r in self.records:
+            byTicker.setdefault(r.ticker, []).append(r)
+        return "\n".join(f"{t:<6} " + "  ".join(f"{r.stage} {r.wall * 1000:.0f}ms" for r in rs)
+                         for t, rs in byTicker.items())
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide recorder used by the pipeline scripts
+RECORDER = StageRecorder()
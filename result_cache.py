@@ -0,0 +1,221 @@
+"""
+Content-addressed cache of computed ticker results and their charts
+Keys are a hash of the paired option chain plus the compute parameters, so
+a ticker whose snapshot has not changed since the last run is neither
+recomputed nor re-rendered. Least-recently-used entries are evicted once
+the cache grows past a size bound.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from file_lock import locked
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "results")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bump when compute_ticker's output changes for the same inputs, so old entries stop matching
+RESULT_VERSION = 2
+
+# Chain columns the result depends on. Time to expiry is not hashed: it follows from the expiries
+# and the clock parameters (date, intraday, quote time) callers put in params
+_KEY_FIELDS = ('expiry', 'strike', 'call_iv', 'put_iv', 'call_oi', 'put_oi', 'call_gamma', 'put_gamma')
+
+
+def result_key(chain, params: Dict) -> str:
+    """sha256 of an option_chain.OptionChain's columns and spot plus JSON-able compute parameters"""
+    h = hashlib.sha256()
+    h.update(json.dumps({'version': RESULT_VERSION, 'ticker': chain.ticker, 'spot': chain.spot,
+                         'params': params}, sort_keys=True, default=str).encode())
+    for field in _KEY_FIELDS:
+        h.update(np.ascontiguousarray(getattr(chain, field)).view(np.uint8))
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Pickled compute_ticker results plus the PNGs rendered from them, by result key
+
+    Layout: <cache_dir>/<key[:2]>/<key>.pkl and <key>.<chart>.png, plus one
+    index.json recording per key the ticker, the size of each file, last
+    access and the output file name of each cached chart. Changes re-read
+    and rewrite it under an inter-process lock (index.lock).
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock_path = os.path.join(cache_dir, "index.lock")
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._index_path + f".{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Current index.json under the inter-process lock, written back when the block ends"""
+        with self._lock, locked(self._lock_path):
+            self._index = self._load_index()
+            yield self._index
+            self._save_index()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}{suffix}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached result for key, or None on a miss"""
+        with self._transaction() as index:
+            entry = index.get(key)
+            if entry is not None:
+                try:
+                    with open(self._path(key, '.pkl'), 'rb') as f:
+                        result = pickle.load(f)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    self._drop(key)
+                    entry = None
+                else:
+                    entry['last_access'] = time.time()
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: Dict):
+        """Pickle a result under key, then enforce the size bound"""
+        path = self._path(key, '.pkl')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + f".{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+        with self._transaction() as index:
+            entry = index.setdefault(key, {'ticker': result.get('ticker'), 'sizes': {}, 'charts': {}})
+            entry['sizes']['result'] = os.path.getsize(path)
+            entry['last_access'] = time.time()
+            self._evict(keep=key)
+
+    # ---=== CHARTS ===---
+    def restore_chart(self, key: Optional[str], chart: str, output_dir: str) -> Optional[str]:
+        """
+        Put the PNG cached for (key, chart) back into output_dir, copying only if
+        the file there differs; returns its filename, or None if it must be rendered
+        """
+        with self._transaction() as index:
+            entry = index.get(key) if key else None
+            name = entry['charts'].get(chart) if entry else None
+            if name is None:
+                return None
+            cached = self._path(key, f".{chart}.png")
+            if not os.path.exists(cached):
+                del entry['charts'][chart]
+                return None
+            entry['last_access'] = time.time()
+
+        filename = os.path.join(output_dir, name)
+        if not (os.path.exists(filename) and _same_file(cached, filename)):
+            os.makedirs(output_dir, exist_ok=True)
+            shutil.copyfile(cached, filename)
+        return filename
+
+    def store_chart(self, key: Optional[str], chart: str, filename: str):
+        """Keep a copy of a freshly rendered PNG alongside the result it was drawn from"""
+        with self._transaction() as index:
+            entry = index.get(key) if key else None
+            if entry is None:
+                return
+            cached = self._path(key, f".{chart}.png")
+            shutil.copyfile(filename, cached)
+            entry['charts'][chart] = os.path.basename(filename)
+            entry['sizes'][chart] = os.path.getsize(cached)
+            self._evict(keep=key)
+
+    # ---=== EVICTION ===---
+    def total_bytes(self) -> int:
+        return sum(sum(e['sizes'].values()) for e in self._index.values())
+
+    def _drop(self, key: str):
+        entry = self._index.pop(key)
+        for suffix in ['.pkl'] + [f".{chart}.png" for chart in entry['charts']]:
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _evict(self, keep: Optional[str] = None):
+        # Oldest access first; the entry just written goes last
+        total = self.total_bytes()
+        for key, entry in sorted(self._index.items(), key=lambda kv: (kv[0] == keep, kv[1]['last_access'])):
+            if total <= self.max_bytes:
+                break
+            total -= sum(entry['sizes'].values())
+            self._drop(key)
+
+    def clear(self):
+        with self._transaction() as index:
+            for key in list(index):
+                self._drop(key)
+
+
+def _same_file(a: str, b: str) -> bool:
+    if os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, 'rb') as fa, open(b, 'rb') as fb:
+        return fa.read() == fb.read()
+
+
+if __name__ == "__main__":
+    # An unchanged snapshot from the previous session, computed twice minutes apart, is one cache entry
+    import tempfile
+    from datetime import date, datetime, timedelta
+    from unittest import mock
+
+    import market_calendar
+    from cboe_fetch import FetchResult
+    from chain_ingest import ingest_payload
+    from gex_compute import compute_ticker
+
+    today = date.today()
+    calendar = market_calendar.calendar_for([today - timedelta(days=10), today])
+    previous = np.busday_offset(np.datetime64(today, 'D'), -1, roll='forward', busdaycal=calendar).item()
+    expiries = [previous + timedelta(days=7 * i) for i in range(5)]
+    options = [{'option': f"SYN{e:%y%m%d}{cp}{k * 1000:08d}", 'iv': 0.2 + 0.001 * abs(k - 100),
+                'gamma': 0.01, 'open_interest': 1000 + 10 * k}
+               for e in expiries for k in range(80, 121, 5) for cp in 'CP']
+    ingested = ingest_payload({'timestamp': f"{previous} 16:15:00", 'data': {'close': 100.0, 'options': options}})
+    fetched = FetchResult('SYN', 200, ingested, None, 0.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(tmp)
+        clock = datetime.combine(today, market_calendar.SESSION_OPEN) + timedelta(hours=1)
+        keys = []
+        for minutes in (0, 7):
+            with mock.patch.object(market_calendar, 'exchange_now', return_value=clock + timedelta(minutes=minutes)):
+                keys.append(compute_ticker('SYN', fetched, cache=cache, log=lambda msg: None)['cache_key'])
+        assert keys[0] == keys[1] and (cache.hits, cache.misses) == (1, 1), (keys, cache.hits, cache.misses)
+        print(f"✓ Snapshot of {previous} computed once, served from cache {cache.hits}x")
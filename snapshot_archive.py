@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Append-only archive of paired option chains in a memory-mappable columnar layout
+Usage: python snapshot_archive.py report [--archive DIR]
+       python snapshot_archive.py list SPX [--start 2026-01-01] [--end 2026-03-31]
+       python snapshot_archive.py compact [SPX ...]
+       python snapshot_archive.py backfill [--cache-dir .cache/cboe]
+
+Each snapshot is stored as one .npy file per OptionChain column, partitioned
+by ticker and date, plus an index (index.json and an append-only index.log).
+Loading memory-maps the columns, so months of snapshots come back as
+OptionChains without any JSON parsing.
+compact merges a partition's per-snapshot segments into one set of column
+files, with each snapshot addressed by (offset, rows).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from file_lock import locked
+from option_chain import OptionChain
+
+DEFAULT_ARCHIVE_DIR = os.path.join("data", "archive")
+
+# Columns written per snapshot, in OptionChain constructor order after ticker/spot/timestamp
+COLUMNS = ('root', 'expiry') + OptionChain.FLOAT_FIELDS
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', value)
+
+
+def _fresh_dir(path: str):
+    """Empty directory at path, clearing what a crashed run may have left there"""
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def snapshot_date(timestamp: Optional[str]) -> str:
+    """Partition date (YYYY-MM-DD) of a CBOE payload timestamp, today if it has none"""
+    try:
+        return datetime.fromisoformat(str(timestamp)).date().isoformat()
+    except ValueError:
+        return date.today().isoformat()
+
+
+class SnapshotArchive:
+    """
+    Columnar snapshot store
+
+    Layout: <archive_dir>/<ticker>/<date>/seg-<time>/<column>.npy for freshly
+    appended snapshots and <ticker>/<date>/part-<n>/<column>.npy once a
+    partition is compacted. Every snapshot has an index entry with its ticker,
+    date, timestamp, spot, one-sided count, directory, offset and rows.
+    append adds one JSON line to index.log; compact rewrites index.json with
+    every entry and empties the log. Both run under an inter-process lock
+    (index.lock), and each instance keeps the entries in memory, reading only
+    what other processes appended since, so appending stays O(1).
+    """
+
+    def __init__(self, archive_dir: str = DEFAULT_ARCHIVE_DIR):
+        self.archive_dir = archive_dir
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(archive_dir, "index.json")
+        self._log_path = os.path.join(archive_dir, "index.log")
+        self._lock_path = os.path.join(archive_dir, "index.lock")
+        self._index: Dict = {'snapshots': []}
+        self._keys = set()              # (ticker, timestamp) of every indexed snapshot
+        self._stamp = None              # index.json (inode, mtime, size) the entries were loaded from
+        self._log_read = 0              # bytes of index.log applied to the entries
+        self._maps: Dict[Tuple[str, str], np.ndarray] = {}
+        with self._lock, locked(self._lock_path):
+            self._refresh()
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('snapshots', [])
+        return index
+
+    def _index_stamp(self):
+        try:
+            st = os.stat(self._index_path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _refresh(self):
+        """
+        Bring the in-memory entries up to date: reload index.json if another
+        process rewrote it, then apply the log lines appended since the last call
+        """
+        try:
+            logSize = os.path.getsize(self._log_path)
+        except OSError:
+            logSize = 0
+        stamp = self._index_stamp()
+        if stamp != self._stamp or logSize < self._log_read:
+            self._index = self._load_index()
+            self._keys = set()
+            self._index['snapshots'] = [e for e in self._index['snapshots'] if self._add_key(e)]
+            self._stamp, self._log_read = stamp, 0
+        if logSize > self._log_read:
+            with open(self._log_path, 'rb') as f:
+                f.seek(self._log_read)
+                data = f.read(logSize - self._log_read)
+            # A line cut short by a crash has no newline yet; append() ends it before writing
+            end = data.rfind(b'\n') + 1
+            for line in data[:end].splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if self._add_key(entry):
+                    self._index['snapshots'].append(entry)
+            self._log_read += end
+
+    def _add_key(self, entry: Dict) -> bool:
+        """Record entry's (ticker, timestamp); False if it is already indexed"""
+        key = (entry['ticker'], entry['timestamp'])
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def _save_index(self):
+        """Write every entry to index.json and empty index.log (lock held)"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        tmp = self._index_path + f".{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path)
+        # A crash here leaves logged entries that are also in index.json; _refresh skips the repeats
+        open(self._log_path, 'wb').close()
+        self._stamp, self._log_read = self._index_stamp(), 0
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Up-to-date index under the inter-process lock, rewritten to index.json when the block ends"""
+        with self._lock, locked(self._lock_path):
+            self._refresh()
+            yield self._index
+            self._save_index()
+
+    def __len__(self):
+        return len(self._index['snapshots'])
+
+    # ---=== WRITE ===---
+    def append(self, chain: OptionChain, timestamp: Optional[str] = None) -> Optional[Dict]:
+        """
+        Store a paired chain; returns its index entry, or None if a snapshot of
+        the ticker with the same timestamp is already archived
+        """
+        timestamp = str(timestamp or chain.timestamp or time.strftime('%Y-%m-%d %H:%M:%S'))
+        day = snapshot_date(timestamp)
+        relpath = os.path.join(_safe_name(chain.ticker), day, f"seg-{_safe_name(timestamp)}")
+        path = os.path.join(self.archive_dir, relpath)
+
+        with self._lock, locked(self._lock_path):
+            self._refresh()
+            if os.path.exists(self._log_path) and os.path.getsize(self._log_path) > self._log_read:
+                # The last log line was cut short by a crash: end it, so the next entry gets its own line
+                with open(self._log_path, 'ab') as f:
+                    f.write(b'\n')
+                self._refresh()
+            if (chain.ticker, timestamp) in self._keys:
+                return None
+            tmp = path + f".{threading.get_ident()}.tmp"
+            _fresh_dir(tmp)
+            for column in COLUMNS:
+                np.save(os.path.join(tmp, f"{column}.npy"), np.ascontiguousarray(getattr(chain, column)))
+            # Not indexed, so anything already at path was left by a run that crashed before logging it
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+
+            entry = {'ticker': chain.ticker, 'date': day, 'timestamp': timestamp, 'spot': chain.spot,
+                     'one_sided': chain.one_sided, 'dir': relpath, 'offset': 0, 'rows': len(chain)}
+            with open(self._log_path, 'ab') as f:
+                f.write(json.dumps(entry).encode() + b'\n')
+                self._log_read = f.tell()
+            self._add_key(entry)
+            self._index['snapshots'].append(entry)
+        return entry
+
+    # ---=== READ ===---
+    def snapshots(self, ticker: Optional[str] = None, start: Optional[str] = None,
+                  end: Optional[str] = None) -> List[Dict]:
+        """Index entries in timestamp order, optionally for one ticker and a date range (inclusive)"""
+        with self._lock, locked(self._lock_path):
+            # Under the lock so a compact cannot empty the log between reading it and index.json
+            self._refresh()
+            entries = [s for s in self._index['snapshots']
+                       if (ticker is None or s['ticker'] == ticker)
+                       and (start is None or s['date'] >= str(start)) and (end is None or s['date'] <= str(end))]
+        return sorted(entries, key=lambda s: (s['ticker'], s['timestamp']))
+
+    def _column(self, relpath: str, column: str) -> np.ndarray:
+        key = (relpath, column)
+        array = self._maps.get(key)
+        if array is None:
+            array = self._maps[key] = np.load(os.path.join(self.archive_dir, relpath, f"{column}.npy"), mmap_mode='r')
+        return array
+
+    def load(self, entry: Dict) -> OptionChain:
+        """OptionChain over memory-mapped column slices (nothing is read until the arrays are used)"""
+        rows = slice(entry['offset'], entry['offset'] + entry['rows'])
+        columns = [self._column(entry['dir'], column)[rows] for column in COLUMNS]
+        return OptionChain(entry['ticker'], entry['spot'], entry['timestamp'], *columns,
+                           dtype=columns[2].dtype, one_sided=entry['one_sided'])
+
+    def iter_chains(self, ticker: str, start: Optional[str] = None,
+                    end: Optional[str] = None) -> Iterator[Tuple[Dict, OptionChain]]:
+        for entry in self.snapshots(ticker, start, end):
+            yield entry, self.load(entry)
+
+    # ---=== COMPACTION ===---
+    def compact(self, ticker: Optional[str] = None) -> int:
+        """
+        Merge every (ticker, date) partition held in more than one directory into
+        a single part-<n> directory; returns the number of partitions rewritten
+        Each partition is rewritten while holding the index lock, so appends
+        from other processes wait for it instead of being lost.
+        """
+        partitions = sorted({(e['ticker'], e['date']) for e in self.snapshots(ticker)})
+
+        rewritten = 0
+        for name, day in partitions:
+            with self._transaction() as index:
+                # Re-select from the index just read: other processes may have appended meanwhile
+                entries = sorted((e for e in index['snapshots'] if e['ticker'] == name and e['date'] == day),
+                                 key=lambda e: e['timestamp'])
+                dirs = sorted({e['dir'] for e in entries})
+                if len(dirs) < 2:
+                    continue
+                partDir = os.path.dirname(dirs[0])
+                n = 1 + max([int(d.rsplit('-', 1)[1]) for d in os.listdir(os.path.join(self.archive_dir, partDir))
+                             if re.fullmatch(r'part-\d+', d)], default=0)
+                relpath = os.path.join(partDir, f"part-{n}")
+                path = os.path.join(self.archive_dir, relpath)
+                tmp = path + ".tmp"
+                _fresh_dir(tmp)
+                for column in COLUMNS:
+                    parts = [self._column(e['dir'], column)[e['offset']:e['offset'] + e['rows']] for e in entries]
+                    np.save(os.path.join(tmp, f"{column}.npy"), np.concatenate(parts))
+                shutil.rmtree(path, ignore_errors=True)
+                os.replace(tmp, path)
+
+                offset = 0
+                for e in entries:
+                    e['dir'], e['offset'] = relpath, offset
+                    offset += e['rows']
+            # Drop the maps of the merged directories before deleting them
+            self._maps = {k: v for k, v in self._maps.items() if k[0] not in dirs}
+            for d in dirs:
+                shutil.rmtree(os.path.join(self.archive_dir, d), ignore_errors=True)
+            rewritten += 1
+        return rewritten
+
+    # ---=== SIZE REPORT ===---
+    def size_report(self) -> Dict[str, Dict]:
+        """Per ticker: snapshots, dates, directories, rows and bytes on disk"""
+        report: Dict[str, Dict] = {}
+        for entry in self.snapshots():
+            r = report.setdefault(entry['ticker'], {'snapshots': 0, 'dates': set(), 'dirs': set(), 'rows': 0,
+                                                    'bytes': 0})
+            r['snapshots'] += 1
+            r['dates'].add(entry['date'])
+            r['dirs'].add(entry['dir'])
+            r['rows'] += entry['rows']
+        for r in report.values():
+            r['bytes'] = sum(os.path.getsize(os.path.join(self.archive_dir, d, f))
+                             for d in r['dirs'] for f in os.listdir(os.path.join(self.archive_dir, d)))
+            r['dates'], r['dirs'] = len(r['dates']), len(r['dirs'])
+        return report
+
+
+def backfill(archive: SnapshotArchive, cache_dir: str) -> int:
+    """Archive every payload held by a snapshot_cache directory; returns snapshots added"""
+    import gzip
+    from chain_ingest import ingest_chain
+
+    added = 0
+    for ticker in sorted(os.listdir(cache_dir)):
+        tickerDir = os.path.join(cache_dir, ticker)
+        if not os.path.isdir(tickerDir):
+            continue
+        for name in sorted(f for f in os.listdir(tickerDir) if f.endswith('.json.gz')):
+            with gzip.open(os.path.join(tickerDir, name), 'rb') as f:
+                ingested = ingest_chain(iter(lambda: f.read(1 << 16), b''))
+            day = date.fromisoformat(snapshot_date(ingested.timestamp))
+            if archive.append(OptionChain.from_ingested(ticker, ingested, day)) is not None:
+                added += 1
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar option chain snapshot archive")
+    parser.add_argument('command', choices=('report', 'list', 'compact', 'backfill'))
+    parser.add_argument('tickers', nargs='*')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE_DIR)
+    parser.add_argument('--start', default=None, help="first date (YYYY-MM-DD), list only")
+    parser.add_argument('--end', default=None, help="last date (YYYY-MM-DD), list only")
+    parser.add_argument('--cache-dir', default=os.path.join(".cache", "cboe"), help="snapshot cache to backfill from")
+    args = parser.parse_args()
+
+    archive = SnapshotArchive(args.archive)
+    if args.command == 'backfill':
+        print(f"✓ Archived {backfill(archive, args.cache_dir)} snapshots from {args.cache_dir}")
+    elif args.command == 'compact':
+        rewritten = sum(archive.compact(t) for t in args.tickers) if args.tickers else archive.compact()
+        print(f"✓ Compacted {rewritten} partitions")
+    elif args.command == 'list':
+        for ticker in args.tickers or sorted({s['ticker'] for s in archive.snapshots()}):
+            for s in archive.snapshots(ticker, args.start, args.end):
+                print(f"{s['ticker']:<6} {s['timestamp']}  spot {s['spot']:>10,.2f}  {s['rows']:>7,} pairs  {s['dir']}")
+
+    if args.command in ('report', 'compact'):
+        report = archive.size_report()
+        for ticker, r in sorted(report.items()):
+            print(f"{ticker:<6} {r['snapshots']:>5} snapshots  {r['dates']:>4} dates  {r['dirs']:>5} dirs  "
+                  f"{r['rows']:>11,} pairs  {r['bytes'] / 1e6:9.1f} MB  {r['bytes'] / max(r['rows'], 1):5.0f} B/pair")
+        total = sum(r['bytes'] for r in report.values())
+        print(f"{'total':<6} {sum(r['snapshots'] for r in report.values()):>5} snapshots  {total / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+On-disk snapshot cache for CBOE chain payloads
+Stores each payload gzip-compressed under its ticker and payload timestamp,
+serves it without network access within a TTL, revalidates with
+ETag / If-Modified-Since afterwards, and evicts least-recently-used
+snapshots once the cache grows past a size bound
+"""
+
+import contextlib
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+from file_lock import locked
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "cboe")
+DEFAULT_TTL = 300                       # CBOE delayed quotes refresh on a 15 minute cycle
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', value)
+
+
+class SnapshotCache:
+    """
+    Compressed payload store with TTL, HTTP validators and LRU eviction
+
+    Layout: <cache_dir>/<ticker>/<timestamp>.json.gz plus one index.json
+    recording, per ticker, the latest snapshot file, its validators and
+    fetch time, and per file its size and last access time. Changes re-read
+    and rewrite it under an inter-process lock (index.lock).
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock_path = os.path.join(cache_dir, "index.lock")
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('tickers', {})
+        index.setdefault('files', {})
+        return index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._index_path + f".{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self._index_path)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Current index.json under the inter-process lock, written back when the block ends"""
+        with self._lock, locked(self._lock_path):
+            self._index = self._load_index()
+            yield self._index
+            self._save_index()
+
+    def _current(self, ticker: str) -> Optional[Dict]:
+        # Another process may have stored or revalidated since; index.json is replaced atomically
+        with self._lock:
+            self._index = self._load_index()
+            return self._entry(ticker)
+
+    def _entry(self, ticker: str) -> Optional[Dict]:
+        entry = self._index['tickers'].get(ticker)
+        if entry and os.path.exists(os.path.join(self.cache_dir, entry['file'])):
+            return entry
+        return None
+
+    def is_fresh(self, ticker: str) -> bool:
+        """True if the latest snapshot was fetched or revalidated within the TTL"""
+        entry = self._current(ticker)
+        return entry is not None and time.time() - entry['fetched_at'] < self.ttl
+
+    def snapshot_id(self, ticker: str) -> Optional[tuple]:
+        """Identity of the latest snapshot (file, ETag); changes only when new content is stored"""
+        entry = self._current(ticker)
+        return None if entry is None else (entry['file'], entry.get('etag'))
+
+    def validators(self, ticker: str) -> Dict[str, str]:
+        """Conditional request headers for the latest snapshot of ticker"""
+        entry = self._current(ticker)
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _open(self, ticker: str):
+        with self._transaction() as index:
+            entry = self._entry(ticker)
+            if entry is None:
+                return None
+            index['files'][entry['file']]['last_access'] = time.time()
+        return gzip.open(os.path.join(self.cache_dir, entry['file']), 'rb')
+
+    def load_raw(self, ticker: str) -> Optional[bytes]:
+        """Decompressed JSON bytes of the latest snapshot, or None on a miss"""
+        f = self._open(ticker)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def iter_raw(self, ticker: str, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+        """Decompressed JSON bytes of the latest snapshot in chunks (nothing on a miss)"""
+        f = self._open(ticker)
+        if f is None:
+            return
+        with f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def load(self, ticker: str) -> Optional[dict]:
+        raw = self.load_raw(ticker)
+        return None if raw is None else json.loads(raw)
+
+    def touch(self, ticker: str, headers=None):
+        """Mark the latest snapshot as revalidated (HTTP 304) and restart its TTL"""
+        with self._transaction():
+            entry = self._entry(ticker)
+            if entry is None:
+                return
+            entry['fetched_at'] = time.time()
+            if headers is not None:
+                entry['etag'] = headers.get('ETag', entry.get('etag'))
+                entry['last_modified'] = headers.get('Last-Modified', entry.get('last_modified'))
+
+    def store(self, ticker: str, raw: bytes, payload: dict, headers=None):
+        """Compress and record a freshly downloaded payload, then enforce the size bound"""
+        headers = headers or {}
+        stamp = _safe_name(str(payload.get('timestamp') or time.strftime('%Y-%m-%d %H:%M:%S')))
+        relpath = os.path.join(_safe_name(ticker), f"{stamp}.json.gz")
+        path = os.path.join(self.cache_dir, relpath)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + f".{threading.get_ident()}.tmp"
+        with gzip.open(tmp, 'wb', compresslevel=6) as f:
+            f.write(raw)
+        os.replace(tmp, path)
+
+        now = time.time()
+        with self._transaction() as index:
+            index['files'][relpath] = {'size': os.path.getsize(path), 'last_access': now}
+            index['tickers'][ticker] = {
+                'file': relpath,
+                'timestamp': payload.get('timestamp'),
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'fetched_at': now,
+            }
+            self._evict()
+
+    def total_bytes(self) -> int:
+        return sum(f['size'] for f in self._index['files'].values())
+
+    def _evict(self):
+        # Oldest access first; latest snapshot of each ticker goes last
+        latest = {e['file'] for e in self._index['tickers'].values()}
+        files = sorted(self._index['files'].items(),
+                       key=lambda kv: (kv[0] in latest, kv[1]['last_access']))
+        total = self.total_bytes()
+        for relpath, meta in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, relpath))
+            except OSError:
+                pass
+            total -= meta['size']
+            del self._index['files'][relpath]
+            for ticker, entry in list(self._index['tickers'].items()):
+                if entry['file'] == relpath:
+                    del self._index['tickers'][ticker]
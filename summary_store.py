@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+SQLite history of per-run GEX summaries
+Usage: python summary_store.py latest [SPX ...] [--db data/historical_gamma.db]
+       python summary_store.py range SPX [--start 2026-01-01] [--end 2026-03-31] [--csv]
+       python summary_store.py expiries SPX [--timestamp "2026-03-31 16:15:00"]
+       python summary_store.py export [SPX ...] [--output charts/summary.csv]
+
+One row per (ticker, snapshot timestamp) with spot, total GEX, first flip
+and vanna/charm totals, plus the spot GEX of every expiry of that snapshot.
+generate_all_charts.py records each run in a single transaction, and
+charts/summary.csv is an export of the summary_csv view (latest snapshot
+per ticker) instead of the only copy of the numbers.
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+DEFAULT_DB = os.path.join("data", "historical_gamma.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    timestamp TEXT NOT NULL,        -- CBOE payload time, exchange local
+    spot REAL NOT NULL,
+    total_gamma REAL NOT NULL,      -- $Bn per move at spot
+    gamma_flip REAL,                -- first flip level, NULL if none
+    total_vanna REAL,
+    total_charm REAL,
+    move REAL NOT NULL,
+    description TEXT,
+    recorded_at TEXT NOT NULL,
+    UNIQUE (ticker, timestamp)
+);
+CREATE TABLE IF NOT EXISTS expiry_gamma (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    expiry TEXT NOT NULL,
+    total_gamma REAL NOT NULL,      -- $Bn per move at spot, contracts of this expiry
+    PRIMARY KEY (snapshot_id, expiry)
+) WITHOUT ROWID;
+-- MAX(timestamp) per ticker walks the (ticker, timestamp) unique index
+CREATE VIEW IF NOT EXISTS latest AS
+    SELECT s.* FROM snapshots s
+    JOIN (SELECT ticker, MAX(timestamp) AS timestamp FROM snapshots GROUP BY ticker) USING (ticker, timestamp);
+-- Columns of the charts/summary.csv generate_all_charts always wrote
+CREATE VIEW IF NOT EXISTS summary_csv AS
+    SELECT ticker AS "Ticker", description AS "Description", spot AS "Spot Price",
+           total_gamma AS "Total Gamma (Bn/10bps)", gamma_flip AS "Gamma Flip"
+    FROM latest;
+"""
+
+_UPSERT = """
+INSERT INTO snapshots (ticker, timestamp, spot, total_gamma, gamma_flip, total_vanna, total_charm, move,
+                       description, recorded_at)
+VALUES (:ticker, :timestamp, :spot, :total_gamma, :gamma_flip, :total_vanna, :total_charm, :move,
+        :description, :recorded_at)
+ON CONFLICT (ticker, timestamp) DO UPDATE SET
+    spot = excluded.spot, total_gamma = excluded.total_gamma, gamma_flip = excluded.gamma_flip,
+    total_vanna = excluded.total_vanna, total_charm = excluded.total_charm, move = excluded.move,
+    description = COALESCE(excluded.description, snapshots.description), recorded_at = excluded.recorded_at
+"""
+
+
+class Summary(NamedTuple):
+    ticker: str
+    timestamp: str
+    spot: float
+    total_gamma: float
+    gamma_flip: Optional[float]
+    total_vanna: Optional[float]
+    total_charm: Optional[float]
+    move: float
+    description: Optional[str]
+    recorded_at: str
+
+
+_COLUMNS = ', '.join(Summary._fields)
+
+
+def summary_row(result: Dict, move: float, recorded_at: str) -> Dict:
+    """snapshots row of a compute_ticker result (snapshot time falls back to recorded_at)"""
+    flip = result.get('gamma_flip')
+    return {
+        'ticker': result['ticker'],
+        'timestamp': str(result.get('timestamp') or recorded_at),
+        'spot': float(result['spot_price']),
+        'total_gamma': float(result['total_gamma']),
+        'gamma_flip': None if flip is None else float(flip),
+        'total_vanna': result.get('total_vanna'),
+        'total_charm': result.get('total_charm'),
+        'move': move,
+        'description': result.get('description'),
+        'recorded_at': recorded_at,
+    }
+
+
+def _day_after(day: str) -> str:
+    return (date.fromisoformat(str(day)) + timedelta(days=1)).isoformat()
+
+
+class SummaryStore:
+    """
+    Indexed summary history in one SQLite file
+
+    Write-ahead logging lets dashboards read while a run is being recorded.
+    Recording the same (ticker, timestamp) again replaces its row and
+    expiry totals, so re-runs on an unchanged snapshot add nothing.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    # ---=== WRITE ===---
+    def record(self, results: Sequence[Dict], move: float = 0.001, recorded_at: Optional[str] = None) -> int:
+        """Upsert every result and its per-expiry totals in one transaction; returns rows written"""
+        recordedAt = recorded_at or time.strftime('%Y-%m-%d %H:%M:%S')
+        rows = [summary_row(r, move, recordedAt) for r in results]
+        if not rows:
+            return 0
+        with self._conn:
+            self._conn.executemany(_UPSERT, rows)
+            # Every row of this run now carries recordedAt, so one query maps them back to their ids
+            ids = {(ticker, timestamp): i for i, ticker, timestamp in self._conn.execute(
+                "SELECT id, ticker, timestamp FROM snapshots WHERE recorded_at = ?", (recordedAt,))}
+            snapshotIds = [ids[row['ticker'], row['timestamp']] for row in rows]
+            self._conn.executemany("DELETE FROM expiry_gamma WHERE snapshot_id = ?", [(i,) for i in snapshotIds])
+            self._conn.executemany(
+                "INSERT INTO expiry_gamma (snapshot_id, expiry, total_gamma) VALUES (?, ?, ?)",
+                [(i, str(expiry), float(value)) for i, r in zip(snapshotIds, results)
+                 for expiry, value in zip(r.get('expiries', ()), r.get('expiry_gamma', ()))])
+        return len(rows)
+
+    # ---=== READ ===---
+    def latest(self, tickers: Optional[Iterable[str]] = None) -> List[Summary]:
+        """Most recent snapshot of each ticker (or of the given ones), by ticker"""
+        tickers = list(tickers) if tickers is not None else None
+        where = f"WHERE ticker IN ({', '.join('?' * len(tickers))})" if tickers else ""
+        rows = self._conn.execute(f"SELECT {_COLUMNS} FROM latest {where} ORDER BY ticker", tickers or ())
+        return [Summary(*row) for row in rows]
+
+    def history(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Summary]:
+        """Snapshots of one ticker in timestamp order, optionally between two dates (inclusive)"""
+        sql = f"SELECT {_COLUMNS} FROM snapshots WHERE ticker = ?"
+        args = [ticker]
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            args.append(str(start))
+        if end is not None:
+            sql += " AND timestamp < ?"
+            args.append(_day_after(end))
+        return [Summary(*row) for row in self._conn.execute(sql + " ORDER BY timestamp", args)]
+
+    def expiry_totals(self, ticker: str, timestamp: Optional[str] = None) -> List[tuple]:
+        """(expiry, total GEX $Bn) of a snapshot, the latest one if no timestamp is given"""
+        snapshot = "SELECT id FROM latest WHERE ticker = ?" if timestamp is None else \
+                   "SELECT id FROM snapshots WHERE ticker = ? AND timestamp = ?"
+        args = (ticker,) if timestamp is None else (ticker, str(timestamp))
+        return self._conn.execute(f"SELECT expiry, total_gamma FROM expiry_gamma WHERE snapshot_id = ({snapshot}) "
+                                  "ORDER BY expiry", args).fetchall()
+
+    # ---=== CSV EXPORT ===---
+    def export_csv(self, f, tickers: Optional[Sequence[str]] = None):
+        """summary_csv view as CSV; rows follow the order of tickers when given"""
+        tickers = list(tickers) if tickers is not None else None
+        where = f"WHERE \"Ticker\" IN ({', '.join('?' * len(tickers))})" if tickers else ""
+        cursor = self._conn.execute(f"SELECT * FROM summary_csv {where} ORDER BY \"Ticker\"", tickers or ())
+        rows = cursor.fetchall()
+        if tickers:
+            order = {t: i for i, t in enumerate(tickers)}
+            rows.sort(key=lambda row: order[row[0]])
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow([c[0] for c in cursor.description])
+        writer.writerows(rows)
+
+
+def _flip(value) -> str:
+    return 'none' if value is None else f"{value:,.2f}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query the SQLite history of GEX summaries")
+    parser.add_argument('command', choices=('latest', 'range', 'expiries', 'export'))
+    parser.add_argument('tickers', nargs='*')
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--start', default=None, help="first date (YYYY-MM-DD), range only")
+    parser.add_argument('--end', default=None, help="last date (YYYY-MM-DD), range only")
+    parser.add_argument('--timestamp', default=None, help="snapshot to break down, expiries only (default latest)")
+    parser.add_argument('--csv', action='store_true', help="print range rows as CSV")
+    parser.add_argument('--output', default=None, help="export: write here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.command in ('range', 'expiries') and len(args.tickers) != 1:
+        parser.error(f"{args.command} takes exactly one ticker")
+
+    with SummaryStore(args.db) as store:
+        if args.command == 'latest':
+            for s in store.latest(args.tickers or None):
+                print(f"{s.ticker:<6} {s.timestamp}  spot {s.spot:>10,.2f}  total ${s.total_gamma:8.4f} Bn  "
+                      f"flip {_flip(s.gamma_flip)}")
+        elif args.command == 'range':
+            rows = store.history(args.tickers[0], args.start, args.end)
+            if args.csv:
+                writer = csv.writer(sys.stdout, lineterminator="\n")
+                writer.writerow(Summary._fields)
+                writer.writerows(rows)
+            else:
+                for s in rows:
+                    print(f"{s.timestamp}  spot {s.spot:>10,.2f}  total ${s.total_gamma:8.4f} Bn  "
+                          f"flip {_flip(s.gamma_flip)}")
+        elif args.command == 'expiries':
+            for expiry, total in store.expiry_totals(args.tickers[0], args.timestamp):
+                print(f"{expiry}  ${total:8.4f} Bn")
+        elif args.command == 'export':
+            if args.output:
+                with open(args.output, 'w', newline='') as f:
+                    store.export_csv(f, args.tickers or None)
+                print(f"✓ Summary saved to {args.output}")
+            else:
+                store.export_csv(sys.stdout, args.tickers or None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,36 +3,43 @@
 
 import requests
 import json
-from typing import Dict, List, Tuple
+from typing import Tuple
+
+from cboe_fetch import FetchResult, fetch_chain, fetch_chains
+
+def describe_result(result: FetchResult) -> Tuple[bool, str, float]:
+    """
+    Interpret a fetched chain
+    Returns: (success, message, spot_price)
+    """
+    if result.error is not None:
+        try:
+            raise result.error
+        except requests.exceptions.Timeout:
+            return False, "Timeout", 0
+        except requests.exceptions.RequestException as e:
+            return False, f"Request failed: {str(e)[:30]}", 0
+        except json.JSONDecodeError:
+            return False, "Invalid JSON", 0
+        except Exception as e:
+            return False, f"Error: {str(e)[:30]}", 0
+
+    if result.status_code != 200:
+        return False, f"HTTP {result.status_code}", 0
+
+    data = result.payload
+    if "data" in data and "options" in data["data"]:
+        spot_price = data["data"].get("close", 0)
+        options_count = len(data["data"]["options"])
+        return True, f"✓ Found {options_count} options", spot_price
+    return False, "Invalid data structure", 0
 
 def test_ticker(ticker: str) -> Tuple[bool, str, float]:
     """
     Test if a ticker is available through CBOE API
     Returns: (success, message, spot_price)
     """
-    url = f"https://cdn.cboe.com/api/global/delayed_quotes/options/_{ticker}.json"
-
-    try:
-        response = requests.get(url, timeout=5)
-
-        if response.status_code == 200:
-            data = response.json()
-            if "data" in data and "options" in data["data"]:
-                spot_price = data["data"].get("close", 0)
-                options_count = len(data["data"]["options"])
-                return True, f"✓ Found {options_count} options", spot_price
-            else:
-                return False, "Invalid data structure", 0
-        else:
-            return False, f"HTTP {response.status_code}", 0
-    except requests.exceptions.Timeout:
-        return False, "Timeout", 0
-    except requests.exceptions.RequestException as e:
-        return False, f"Request failed: {str(e)[:30]}", 0
-    except json.JSONDecodeError:
-        return False, "Invalid JSON", 0
-    except Exception as e:
-        return False, f"Error: {str(e)[:30]}", 0
+    return describe_result(fetch_chain(ticker, timeout=5))
 
 def main():
     # Common index tickers to test
@@ -115,9 +122,11 @@ def main():
     working_tickers = []
     failed_tickers = []
 
+    fetched = fetch_chains([ticker for ticker, _ in tickers_to_test], timeout=5)
+
     for ticker, description in tickers_to_test:
         print(f"Testing {ticker:6s} ({description})...", end=" ")
-        success, message, spot_price = test_ticker(ticker)
+        success, message, spot_price = describe_result(fetched[ticker])
 
         if success:
             print(f"{message} | Spot: ${spot_price:.2f}")